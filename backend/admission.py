@@ -0,0 +1,179 @@
+"""
+Admission control for mutating routes.
+
+Each POST/PUT/PATCH/DELETE route gets a gate that lets ADMISSION_MAX_CONCURRENCY
+requests run at once and queues up to ADMISSION_MAX_QUEUE more. A request is
+rejected straight away with 503 and Retry-After when the queue is full or when
+its expected wait (queue position x recent service time / concurrency) exceeds
+ADMISSION_LATENCY_BUDGET_MS, and a queued request that waits past the budget is
+rejected too. Waiting happens on the event loop, so a busy database no longer
+pins threadpool threads that reads need.
+
+Routes can override the limits with @admission_limit(concurrency, queue), applied
+below the route decorator like @sql_budget.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+
+from dotenv import load_dotenv
+
+import metrics
+import route_match
+
+# Load environment variables
+load_dotenv()
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "4"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_LATENCY_BUDGET_MS = float(os.getenv("ADMISSION_LATENCY_BUDGET_MS", "2000"))
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+admission_queue_depth = metrics.Gauge("admission_queue_depth", "Requests waiting for admission", ["route"])
+admission_in_flight = metrics.Gauge("admission_in_flight", "Admitted requests currently running", ["route"])
+admission_wait = metrics.Histogram("admission_wait_seconds", "Time spent queued before admission", ["route"])
+admission_rejected = metrics.Counter(
+    "admission_rejected_total", "Requests shed with 503 by admission control", ["route", "reason"]
+)
+
+
+def admission_limit(concurrency=None, queue=None):
+    """Override the admission limits of one route; apply below the route decorator."""
+    def decorator(func):
+        func.admission_limit = (concurrency, queue)
+        return func
+    return decorator
+
+
+class Rejected(Exception):
+    def __init__(self, reason, retry_after):
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Gate:
+    """Concurrency limit and bounded FIFO queue for one route."""
+
+    def __init__(self, label, concurrency, max_queue, budget):
+        self.label = label
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.budget = budget
+        self.in_flight = 0
+        self.waiters = deque()
+        # Moving average of how long an admitted request runs, used to estimate queue wait
+        self.service_time = 0.05
+
+    def expected_wait(self, position):
+        return position * self.service_time / self.concurrency
+
+    def retry_after(self):
+        return max(1, math.ceil(self.expected_wait(len(self.waiters) + 1)))
+
+    async def acquire(self):
+        if self.in_flight < self.concurrency and not self.waiters:
+            self._admit()
+            return
+        if len(self.waiters) >= self.max_queue:
+            raise Rejected("queue_full", self.retry_after())
+        if self.expected_wait(len(self.waiters) + 1) > self.budget:
+            raise Rejected("latency_budget", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        admission_queue_depth.set(len(self.waiters), route=self.label)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.budget)
+        except BaseException as e:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # Admitted just as we gave up; pass the slot on
+                self.release(0.0)
+            if isinstance(e, asyncio.TimeoutError):
+                raise Rejected("timeout", self.retry_after())
+            raise
+        finally:
+            admission_queue_depth.set(len(self.waiters), route=self.label)
+        admission_wait.observe(time.perf_counter() - start, route=self.label)
+
+    def _admit(self):
+        self.in_flight += 1
+        admission_in_flight.set(self.in_flight, route=self.label)
+
+    def release(self, elapsed):
+        if elapsed:
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+        self.in_flight -= 1
+        # Hand the slot straight to the oldest waiter still waiting
+        while self.waiters and self.in_flight < self.concurrency:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+        admission_in_flight.set(self.in_flight, route=self.label)
+        admission_queue_depth.set(len(self.waiters), route=self.label)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits, queues or sheds requests to mutating routes."""
+
+    def __init__(self, app, router, concurrency=ADMISSION_MAX_CONCURRENCY, max_queue=ADMISSION_MAX_QUEUE,
+                 budget_ms=ADMISSION_LATENCY_BUDGET_MS):
+        self.app = app
+        self.router = router
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.budget = budget_ms / 1000
+        self.gates = {}
+
+    def _gate(self, scope, route):
+        label = f"{scope['method']} {route.path}"
+        gate = self.gates.get(label)
+        if gate is None:
+            concurrency, queue = getattr(getattr(route, "endpoint", None), "admission_limit", (None, None))
+            gate = self.gates[label] = Gate(label, concurrency or self.concurrency,
+                                            self.max_queue if queue is None else queue, self.budget)
+        return gate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in MUTATING_METHODS:
+            await self.app(scope, receive, send)
+            return
+        route = route_match.route_for(self.router, scope)
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        gate = self._gate(scope, route)
+        try:
+            await gate.acquire()
+        except Rejected as rejected:
+            admission_rejected.inc(route=gate.label, reason=rejected.reason)
+            await self._reject(send, rejected.retry_after)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.perf_counter() - start)
+
+    async def _reject(self, send, retry_after):
+        body = b'{"detail":"Server is busy, please retry later"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,179 @@
+"""
+Structured application log.
+
+Server code logs through get_logger(__name__) instead of print. Loggers hand
+records to a QueueHandler, so the calling thread (the event loop or a request
+thread) only builds the record, stamps it with the current request's id,
+route and elapsed time, and puts it on a bounded queue. A background
+QueueListener formats each record as one JSON line and writes it to LOG_FILE
+(stderr when unset):
+
+    {"ts": "2024-06-10T09:12:03.512Z", "level": "WARNING", "logger": "feedback_system.email_service",
+     "msg": "Email send failed", "request_id": "9f2c51d07ab34e18", "route": "/users",
+     "duration_ms": 31.4, "email": "welcome", "error": "Connection refused", "suppressed": 12}
+
+Fields passed with extra={...} are added to the line. When the queue is full
+records are dropped (counted in log_records_dropped_total) rather than making
+a request wait for the disk.
+
+Warnings and errors are rate limited per call site: a message repeated within
+LOG_RATE_LIMIT_SECONDS is dropped, and the next one let through reports how
+many were suppressed. extra={"rate_key": ...} limits per key instead (per
+route, per email type), so one noisy source doesn't hide the others.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from dotenv import load_dotenv
+
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", "")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_LIMIT_SECONDS = float(os.getenv("LOG_RATE_LIMIT_SECONDS", "60"))
+
+ROOT_LOGGER = "feedback_system"
+
+log_records_dropped = metrics.Counter(
+    "log_records_dropped_total", "Log records not written, by reason (queue_full, rate_limited)", ["reason"]
+)
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+_STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_CONTEXT_FIELDS = ("request_id", "route", "duration_ms")
+_HIDDEN_FIELDS = _STANDARD_ATTRIBUTES | set(_CONTEXT_FIELDS) | {"rate_key", "suppressed"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; runs on the writer thread."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name in _CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        entry.update((name, value) for name, value in vars(record).items() if name not in _HIDDEN_FIELDS)
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through one warning or error per call site (or rate_key) per interval."""
+
+    MAX_KEYS = 1000
+
+    def __init__(self, interval=LOG_RATE_LIMIT_SECONDS):
+        super().__init__()
+        self.interval = interval
+        self._lock = threading.Lock()
+        # key -> [time of the last record let through, records suppressed since]
+        self._seen = {}
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or self.interval <= 0:
+            return True
+        key = (record.name, record.msg, getattr(record, "rate_key", None))
+        now = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.interval:
+                seen[1] += 1
+                log_records_dropped.inc(reason="rate_limited")
+                return False
+            if len(self._seen) >= self.MAX_KEYS:
+                self._seen.clear()
+            self._seen[key] = [now, 0]
+        if seen is not None and seen[1]:
+            record.suppressed = seen[1]
+        return True
+
+
+class RequestQueueHandler(QueueHandler):
+    """Queues records without formatting them, tagged with the current request."""
+
+    def prepare(self, record):
+        # Runs on the calling thread, so only the request context is read here; formatting
+        # (message arguments, tracebacks) happens on the writer thread
+        stats = metrics.current_request.get()
+        if stats is not None:
+            record.request_id = stats.request_id
+            record.route = stats.route
+            record.duration_ms = round((time.perf_counter() - stats.start) * 1000, 2)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc(reason="queue_full")
+
+
+_listeners = []
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def background(handler, queue_size=LOG_QUEUE_SIZE):
+    """A RequestQueueHandler whose records `handler` writes on a background thread."""
+    records = queue.Queue(queue_size)
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return RequestQueueHandler(records)
+
+
+@atexit.register
+def flush():
+    """Write out every queued record and stop the writer threads."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def configure():
+    """Send the feedback_system loggers to LOG_FILE (or stderr) as JSON lines; idempotent."""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        if LOG_FILE:
+            target = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+        else:
+            target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(JsonFormatter())
+        handler = background(target)
+        handler.addFilter(RateLimitFilter())
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.addHandler(handler)
+        logger.setLevel(LOG_LEVEL)
+        # Uvicorn configures the root logger; don't write records twice
+        logger.propagate = False
+        _configured = True
+
+
+def get_logger(name):
+    configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
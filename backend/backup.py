@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Online backups of the Feedback System database.
+
+Copies a live SQLite database with the online backup API in small page steps,
+sleeping between steps, while a read transaction pins the snapshot being
+copied. In WAL mode that reader never blocks writers, and pinning keeps
+concurrent commits from restarting the copy. The copy is checked with
+PRAGMA integrity_check, gzip-compressed and described by a JSON manifest
+(checksum, schema version, row counts) that `check_db.py --snapshot` verifies.
+
+    python backup.py
+    python backup.py --tenant acme --output-dir /var/backups/feedback
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app_log
+
+# Load environment variables
+load_dotenv()
+
+logger = app_log.get_logger(__name__)
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_PAUSE_MS = float(os.getenv("BACKUP_STEP_PAUSE_MS", "5"))
+
+TABLES = ["users", "feedback", "tags", "feedback_tags", "feedback_requests"]
+
+
+class BackupProgress:
+    """State of one backup, readable while it runs."""
+
+    def __init__(self, tenant):
+        self.tenant = tenant
+        self.state = "running"
+        self.pages_total = 0
+        self.pages_done = 0
+        self.steps = 0
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+        self.snapshot = None
+        self.error = None
+
+    def as_dict(self):
+        return {
+            "tenant": self.tenant,
+            "state": self.state,
+            "pages_done": self.pages_done,
+            "pages_total": self.pages_total,
+            "percent": round(100 * self.pages_done / self.pages_total, 1) if self.pages_total else 0.0,
+            "steps": self.steps,
+            "started_at": self.started_at.isoformat() + "Z",
+            "finished_at": self.finished_at.isoformat() + "Z" if self.finished_at else None,
+            "snapshot": self.snapshot,
+            "error": self.error,
+        }
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def inspect_database(path):
+    """Integrity check result, schema version and row counts of a SQLite file."""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        integrity = connection.execute("PRAGMA integrity_check").fetchone()[0]
+        schema_version = connection.execute("PRAGMA user_version").fetchone()[0]
+        existing = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        counts = {table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in TABLES if table in existing}
+        return integrity, schema_version, counts
+    finally:
+        connection.close()
+
+
+def copy_database(source_path, destination_path, progress, pages=BACKUP_PAGES_PER_STEP, pause_ms=BACKUP_STEP_PAUSE_MS):
+    """Copy a live database page-step by page-step into destination_path."""
+    # Read-only and never created: a wrong path must fail, not back up a new empty file
+    try:
+        source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True, timeout=60)
+    except sqlite3.OperationalError as e:
+        raise RuntimeError(f"Cannot open database {source_path}: {e}") from e
+    destination = sqlite3.connect(destination_path)
+    try:
+        # Pin one snapshot; otherwise every commit from the app would restart the copy
+        source.execute("BEGIN")
+        existing = {row[0] for row in source.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        missing = [table for table in TABLES if table not in existing]
+        if missing:
+            raise RuntimeError(f"{source_path} is not a Feedback System database (missing tables: {', '.join(missing)})")
+
+        def on_step(status, remaining, total):
+            progress.pages_total = total
+            progress.pages_done = total - remaining
+            progress.steps += 1
+            # Yield between steps so the app's threads and checkpoints get the CPU and disk
+            time.sleep(pause_ms / 1000)
+
+        source.backup(destination, pages=pages, progress=on_step)
+        source.rollback()
+        # A self-contained file: no -wal/-shm needed to open the snapshot
+        destination.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        destination.close()
+        source.close()
+
+
+def create_snapshot(source_path, output_dir=BACKUP_DIR, tenant="default", progress=None,
+                    pages=BACKUP_PAGES_PER_STEP, pause_ms=BACKUP_STEP_PAUSE_MS):
+    """Back up, verify and compress a database; returns the manifest written next to the snapshot."""
+    progress = progress or BackupProgress(tenant)
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"{tenant}_{datetime.utcnow():%Y%m%dT%H%M%SZ}.db.gz"
+    snapshot_path = os.path.join(output_dir, name)
+    work_dir = tempfile.mkdtemp(prefix="backup-", dir=output_dir)
+    try:
+        copy_path = os.path.join(work_dir, "snapshot.db")
+        started = time.perf_counter()
+        copy_database(source_path, copy_path, progress, pages=pages, pause_ms=pause_ms)
+        copy_seconds = time.perf_counter() - started
+
+        progress.state = "verifying"
+        integrity, schema_version, counts = inspect_database(copy_path)
+        if integrity != "ok":
+            raise RuntimeError(f"Backup failed integrity check: {integrity}")
+
+        progress.state = "compressing"
+        with open(copy_path, "rb") as src, gzip.open(snapshot_path + ".partial", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(snapshot_path + ".partial", snapshot_path)
+
+        manifest = {
+            "snapshot": name,
+            "tenant": tenant,
+            "created_at": progress.started_at.isoformat() + "Z",
+            "schema_version": schema_version,
+            "pages": progress.pages_total,
+            "database_bytes": os.path.getsize(copy_path),
+            "compressed_bytes": os.path.getsize(snapshot_path),
+            "sha256": file_sha256(copy_path),
+            "row_counts": counts,
+            "copy_seconds": round(copy_seconds, 3),
+            "steps": progress.steps,
+        }
+        with open(snapshot_path + ".json", "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        progress.state = "completed"
+        progress.snapshot = snapshot_path
+        return manifest
+    except Exception as e:
+        progress.state = "failed"
+        progress.error = str(e)
+        raise
+    finally:
+        progress.finished_at = datetime.utcnow()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def verify_snapshot(snapshot_path):
+    """Decompress a snapshot and check it against its manifest; returns (ok, messages)."""
+    messages = []
+    manifest_path = snapshot_path + ".json"
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    else:
+        messages.append("⚠️  No manifest found; checking integrity only")
+
+    work_dir = tempfile.mkdtemp(prefix="snapshot-check-")
+    try:
+        copy_path = os.path.join(work_dir, "snapshot.db")
+        try:
+            with gzip.open(snapshot_path, "rb") as src, open(copy_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+        except (OSError, EOFError) as e:
+            return False, messages + [f"❌ Cannot decompress snapshot: {e}"]
+
+        ok = True
+        if manifest is not None:
+            if file_sha256(copy_path) == manifest["sha256"]:
+                messages.append("✅ Checksum matches manifest")
+            else:
+                ok = False
+                messages.append("❌ Checksum does not match manifest")
+
+        try:
+            integrity, schema_version, counts = inspect_database(copy_path)
+        except sqlite3.DatabaseError as e:
+            return False, messages + [f"❌ Not a valid SQLite database: {e}"]
+
+        if integrity == "ok":
+            messages.append("✅ Integrity check passed")
+        else:
+            ok = False
+            messages.append(f"❌ Integrity check failed: {integrity}")
+
+        missing = [table for table in TABLES if table not in counts]
+        if missing:
+            ok = False
+            messages.append(f"❌ Missing tables: {', '.join(missing)}")
+        else:
+            messages.append(f"✅ All {len(TABLES)} tables present (schema version {schema_version})")
+
+        if manifest is not None:
+            if counts == manifest["row_counts"]:
+                messages.append("✅ Row counts match manifest: " + ", ".join(f"{t} {n}" for t, n in counts.items()))
+            else:
+                ok = False
+                messages.append(f"❌ Row counts {counts} differ from manifest {manifest['row_counts']}")
+        return ok, messages
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class BackupRunner:
+    """Runs one backup at a time on a background thread for the admin API."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = None
+
+    def start(self, tenant_name, source_path):
+        with self._lock:
+            if self.current is not None and self.current.state not in ("completed", "failed"):
+                return None
+            progress = self.current = BackupProgress(tenant_name)
+
+        def run():
+            try:
+                create_snapshot(source_path, tenant=tenant_name, progress=progress)
+            except Exception as e:
+                logger.exception("Backup failed", extra={"tenant": tenant_name})
+
+        threading.Thread(target=run, name="backup", daemon=True).start()
+        return progress
+
+
+runner = BackupRunner()
+
+
+def show_progress(progress, stop):
+    while not stop.wait(0.5):
+        print(f"   📦 {progress.state}: {progress.pages_done}/{progress.pages_total} pages "
+              f"({progress.as_dict()['percent']}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Take an online, verified, compressed backup of the database.")
+    parser.add_argument("--tenant", default=None, help="Back up this tenant's database (default: DATABASE_URL)")
+    parser.add_argument("--output-dir", default=BACKUP_DIR)
+    parser.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP, help="Pages copied per step")
+    parser.add_argument("--pause-ms", type=float, default=BACKUP_STEP_PAUSE_MS, help="Sleep between steps")
+    args = parser.parse_args()
+
+    import database
+
+    if args.tenant and not database.TENANT_DB_DIR:
+        print("❌ Set TENANT_DB_DIR to back up a tenant database")
+        sys.exit(1)
+    try:
+        tenant = database.tenants.get(args.tenant or database.DEFAULT_TENANT)
+    except (database.UnknownTenant, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    source_path = tenant.engine.url.database
+    if tenant.engine.dialect.name != "sqlite" or not source_path:
+        print("❌ Online backups are only supported for SQLite file databases")
+        sys.exit(1)
+
+    print("🚀 Feedback System Online Backup")
+    print("=" * 35)
+    print(f"💾 Backing up {os.path.abspath(source_path)}...")
+
+    progress = BackupProgress(tenant.name)
+    stop = threading.Event()
+    reporter = threading.Thread(target=show_progress, args=(progress, stop), daemon=True)
+    reporter.start()
+    try:
+        manifest = create_snapshot(source_path, args.output_dir, tenant.name, progress, args.pages, args.pause_ms)
+    except Exception as e:
+        print(f"❌ Backup failed: {e}")
+        sys.exit(1)
+    finally:
+        stop.set()
+
+    print(f"✅ Snapshot written to {os.path.join(args.output_dir, manifest['snapshot'])}")
+    print(f"   {manifest['pages']} pages in {manifest['steps']} steps ({manifest['copy_seconds']}s), "
+          f"{manifest['database_bytes']:,} → {manifest['compressed_bytes']:,} bytes")
+    print(f"   Verify with: python check_db.py --snapshot {os.path.join(args.output_dir, manifest['snapshot'])}")
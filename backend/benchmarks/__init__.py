@@ -0,0 +1,6 @@
+"""
+Benchmarks for the Feedback System API.
+
+Run from the backend directory, for example:
+    python -m benchmarks.load_test --scale 1k --profile mixed --duration 30
+"""
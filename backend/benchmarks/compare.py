@@ -0,0 +1,49 @@
+"""
+Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+
+import argparse
+import json
+
+
+def _change(before, after):
+    if before in (None, 0) or after is None:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def compare(before, after):
+    """Return rows of (name, metric, before, after, change) for overall and per-operation latency."""
+    rows = [("overall", "throughput_rps", before.get("throughput_rps"), after.get("throughput_rps"),
+             _change(before.get("throughput_rps"), after.get("throughput_rps")))]
+    for metric in ("p50", "p95", "p99"):
+        b, a = before["latency_ms"][metric], after["latency_ms"][metric]
+        rows.append(("overall", metric, b, a, _change(b, a)))
+    for name in sorted(set(before.get("operations", {})) | set(after.get("operations", {}))):
+        b_op = before.get("operations", {}).get(name, {}).get("latency_ms", {})
+        a_op = after.get("operations", {}).get(name, {}).get("latency_ms", {})
+        for metric in ("p50", "p95", "p99"):
+            rows.append((name, metric, b_op.get(metric), a_op.get(metric), _change(b_op.get(metric), a_op.get(metric))))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"{'operation':<24}{'metric':<16}{'before':>12}{'after':>12}{'change':>10}")
+    for name, metric, b, a, change in compare(before, after):
+        print(f"{name:<24}{metric:<16}{str(b):>12}{str(a):>12}{change:>10}")
+
+
+if __name__ == "__main__":
+    main()
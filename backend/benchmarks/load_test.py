@@ -0,0 +1,446 @@
+"""
+Concurrent load test for every route in main.py.
+
+Seeds a benchmark database at the requested scale, then drives a weighted mix
+of requests either through an in-process ASGI client or against a local
+uvicorn server, and writes throughput, latency percentiles and database lock
+retries to a JSON file that benchmarks/compare.py can diff.
+
+    python -m benchmarks.load_test --scale 100k --profile mixed --concurrency 32 --duration 60
+    python -m benchmarks.load_test --scale 1k --spawn-uvicorn --workers 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stats import metric_sum, summarize_latencies  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(BACKEND_DIR, "benchmarks", "data")
+DEFAULT_RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Relative weights of each operation per workload profile
+PROFILES = {
+    "read-heavy": {
+        "login": 1, "me": 10, "verify_email": 1, "resend_verification": 1,
+        "team": 8, "managers": 3, "users": 3, "feedback": 25, "tags": 10,
+        "feedback_requests": 8, "dashboard": 20, "bootstrap": 4, "search_users": 6,
+        "create_feedback": 2, "update_feedback": 1, "acknowledge": 2, "delete_feedback": 1,
+        "create_request": 2, "create_user": 0.5, "delete_user": 0.5, "create_tag": 0.2,
+        "request_counts": 4, "pending_requests": 3, "complete_request": 0.5, "decline_request": 0.3,
+    },
+    "mixed": {
+        "login": 2, "me": 8, "verify_email": 1, "resend_verification": 1,
+        "team": 6, "managers": 2, "users": 2, "feedback": 18, "tags": 8,
+        "feedback_requests": 6, "dashboard": 14, "bootstrap": 3, "search_users": 5,
+        "create_feedback": 10, "update_feedback": 6, "acknowledge": 8, "delete_feedback": 3,
+        "create_request": 6, "create_user": 1, "delete_user": 1, "create_tag": 0.5,
+        "request_counts": 3, "pending_requests": 3, "complete_request": 2, "decline_request": 1,
+    },
+    "write-heavy": {
+        "login": 2, "me": 4, "verify_email": 1, "resend_verification": 1,
+        "team": 3, "managers": 1, "users": 1, "feedback": 8, "tags": 4,
+        "feedback_requests": 3, "dashboard": 6, "bootstrap": 1, "search_users": 2,
+        "create_feedback": 25, "update_feedback": 15, "acknowledge": 15, "delete_feedback": 8,
+        "create_request": 15, "create_user": 3, "delete_user": 3, "create_tag": 1,
+        "request_counts": 1, "pending_requests": 1, "complete_request": 5, "decline_request": 2,
+    },
+}
+
+
+class Workload:
+    """Users, tokens and row ids the operations draw from."""
+
+    def __init__(self, create_access_token, rng, password):
+        self.create_access_token = create_access_token
+        self.rng = rng
+        self.password = password
+        self.run_id = secrets.token_hex(3)
+        self.teams = {}
+        self.employee_manager = {}
+        self.emails = {}
+        self.feedback = []
+        self.feedback_by_manager = {}
+        self.feedback_by_employee = {}
+        self.created_feedback = []
+        self.created_users = []
+        self.created_requests = []
+        self.counter = 0
+        self._tokens = {}
+
+    def load(self, engine, feedback_sample=10_000):
+        from sqlalchemy import text
+
+        with engine.connect() as connection:
+            for user_id, email, role, manager_id in connection.execute(
+                    text("SELECT id, email, role, manager_id FROM users")):
+                self.emails[user_id] = email
+                if role == "manager":
+                    self.teams.setdefault(user_id, [])
+                elif manager_id is not None:
+                    self.employee_manager[user_id] = manager_id
+                    self.teams.setdefault(manager_id, []).append(user_id)
+            self.feedback = [tuple(row) for row in connection.execute(
+                text("SELECT id, manager_id, employee_id FROM feedback ORDER BY random() LIMIT :n"),
+                {"n": feedback_sample})]
+        self.teams = {manager_id: team for manager_id, team in self.teams.items() if team}
+        self.managers = list(self.teams)
+        self.employees = list(self.employee_manager)
+        for row in self.feedback:
+            self.feedback_by_manager.setdefault(row[1], []).append(row)
+            self.feedback_by_employee.setdefault(row[2], []).append(row)
+
+    def headers(self, user_id):
+        token = self._tokens.get(user_id)
+        if token is None:
+            token = self._tokens[user_id] = self.create_access_token(data={"sub": user_id})
+        return {"Authorization": f"Bearer {token}"}
+
+    def next_name(self, prefix):
+        self.counter += 1
+        return f"{prefix}-{self.run_id}-{self.counter}"
+
+    def manager(self):
+        return self.rng.choice(self.managers)
+
+    def employee(self):
+        return self.rng.choice(self.employees)
+
+
+def build_request(name, wl, actor=None):
+    """Return (method, url, kwargs, expected statuses, on_response) or None when not applicable.
+
+    actor sends the request as that user (benchmarks/replay.py); it must have the role the
+    operation needs. By default a random user is picked."""
+    rng = wl.rng
+    ok = (200,)
+
+    if name == "login":
+        payload = {"email": wl.emails[actor or wl.manager()], "password": wl.password}
+        return "POST", "/auth/login", {"json": payload}, ok, None
+    if name == "me":
+        user_id = actor or rng.choice((wl.manager(), wl.employee()))
+        return "GET", "/auth/me", {"headers": wl.headers(user_id)}, ok, None
+    if name == "verify_email":
+        return "POST", "/auth/verify-email", {"params": {"token": secrets.token_urlsafe(16)}}, (400,), None
+    if name == "resend_verification":
+        return "POST", "/auth/resend-verification", {"params": {"email": wl.emails[actor or wl.employee()]}}, (400,), None
+    if name == "team":
+        return "GET", "/users/team", {"headers": wl.headers(actor or wl.manager())}, ok, None
+    if name == "managers":
+        return "GET", "/users/managers", {"headers": wl.headers(actor or wl.manager())}, ok, None
+    if name == "users":
+        return "GET", "/users", {"headers": wl.headers(actor or wl.manager())}, ok, None
+    if name == "search_users":
+        # A typeahead keystroke: the first letters of someone's name, in the whole company or the team
+        manager_id = actor or wl.manager()
+        scope = rng.choice(("all", "team"))
+        user_id = rng.choice(wl.teams[manager_id] if scope == "team" else wl.employees)
+        prefix = wl.emails[user_id].split("@")[0][:rng.randint(1, 4)]
+        params = {"q": prefix, "scope": scope}
+        return "GET", "/users/search", {"params": params, "headers": wl.headers(manager_id)}, ok, None
+    if name == "create_user":
+        manager_id = actor or wl.manager()
+        payload = {"email": f"{wl.next_name('user')}@bench.example.com", "password": wl.password,
+                   "full_name": "Benchmark User", "role": "employee"}
+
+        def on_response(response):
+            if response.status_code == 200:
+                wl.created_users.append((manager_id, response.json()["id"]))
+        return "POST", "/users", {"json": payload, "headers": wl.headers(manager_id)}, ok, on_response
+    if name == "delete_user":
+        if not wl.created_users:
+            return None
+        manager_id, user_id = wl.created_users.pop(rng.randrange(len(wl.created_users)))
+        return "DELETE", f"/users/{user_id}", {"headers": wl.headers(manager_id)}, ok, None
+    if name == "feedback":
+        user_id = actor or rng.choice((wl.manager(), wl.employee()))
+        return "GET", "/feedback", {"headers": wl.headers(user_id)}, ok, None
+    if name == "create_feedback":
+        manager_id = actor or wl.manager()
+        payload = {"employee_id": rng.choice(wl.teams[manager_id]), "strengths": "Clear communication.",
+                   "areas_to_improve": "Delegate more.", "sentiment": rng.choice(("positive", "neutral", "negative")),
+                   "tag_ids": rng.sample(range(1, 7), 2)}
+
+        def on_response(response):
+            if response.status_code == 200:
+                body = response.json()
+                wl.created_feedback.append((body["id"], body["manager_id"], body["employee_id"]))
+        return "POST", "/feedback", {"json": payload, "headers": wl.headers(manager_id)}, ok, on_response
+    if name == "update_feedback":
+        if not wl.feedback:
+            return None
+        feedback_id, manager_id, _ = rng.choice(wl.feedback_by_manager.get(actor) or wl.feedback)
+        payload = {"sentiment": rng.choice(("positive", "neutral", "negative")), "tag_ids": rng.sample(range(1, 7), 1)}
+        return "PUT", f"/feedback/{feedback_id}", {"json": payload, "headers": wl.headers(manager_id)}, ok, None
+    if name == "acknowledge":
+        if not wl.feedback:
+            return None
+        feedback_id, _, employee_id = rng.choice(wl.feedback_by_employee.get(actor) or wl.feedback)
+        return "POST", f"/feedback/{feedback_id}/acknowledge", {"headers": wl.headers(employee_id)}, ok, None
+    if name == "delete_feedback":
+        if not wl.created_feedback:
+            return None
+        feedback_id, manager_id, _ = wl.created_feedback.pop(rng.randrange(len(wl.created_feedback)))
+        return "DELETE", f"/feedback/{feedback_id}", {"headers": wl.headers(manager_id)}, ok, None
+    if name == "tags":
+        return "GET", "/tags", {}, ok, None
+    if name == "create_tag":
+        payload = {"name": wl.next_name("tag"), "color": "#3B82F6"}
+        return "POST", "/tags", {"json": payload, "headers": wl.headers(actor or wl.manager())}, ok, None
+    if name == "create_request":
+        employee_id = actor or wl.employee()
+        payload = {"message": "Any feedback on the release?"}
+
+        def on_response(response):
+            if response.status_code == 200:
+                wl.created_requests.append((response.json()["id"], wl.employee_manager[employee_id]))
+        return "POST", "/feedback-requests", {"json": payload, "headers": wl.headers(employee_id)}, ok, on_response
+    if name == "request_counts":
+        user_id = actor or rng.choice((wl.manager(), wl.employee()))
+        return "GET", "/feedback-requests/counts", {"headers": wl.headers(user_id)}, ok, None
+    if name == "pending_requests":
+        params = {"status": "pending"}
+        return "GET", "/feedback-requests", {"params": params, "headers": wl.headers(actor or wl.manager())}, ok, None
+    if name in ("complete_request", "decline_request"):
+        if not wl.created_requests:
+            return None
+        request_id, manager_id = wl.created_requests.pop(rng.randrange(len(wl.created_requests)))
+        action = "complete" if name == "complete_request" else "decline"
+        # 409 when feedback for the employee already completed it
+        return "POST", f"/feedback-requests/{request_id}/{action}", {"headers": wl.headers(manager_id)}, (200, 409), None
+    if name == "feedback_requests":
+        user_id = actor or rng.choice((wl.manager(), wl.employee()))
+        return "GET", "/feedback-requests", {"headers": wl.headers(user_id)}, ok, None
+    if name == "dashboard":
+        return "GET", "/dashboard/stats", {"headers": wl.headers(actor or wl.manager())}, ok, None
+    if name == "bootstrap":
+        user_id = actor or rng.choice((wl.manager(), wl.employee()))
+        return "GET", "/bootstrap", {"headers": wl.headers(user_id)}, ok, None
+    raise ValueError(f"Unknown operation: {name}")
+
+
+async def run_load(client, wl, weights, concurrency, duration, max_requests, warmup):
+    names = list(weights)
+    weight_values = list(weights.values())
+    results = {name: {"latencies": [], "errors": 0, "statuses": {}} for name in names}
+    deadline = time.perf_counter() + warmup + duration
+    measure_after = time.perf_counter() + warmup
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            name = wl.rng.choices(names, weight_values)[0]
+            spec = build_request(name, wl)
+            if spec is None:
+                continue
+            method, url, kwargs, expected, on_response = spec
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = response.status_code
+            except Exception as e:
+                response, status = None, f"exception:{type(e).__name__}"
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if response is not None and on_response:
+                on_response(response)
+            if start < measure_after:
+                continue
+            result = results[name]
+            result["latencies"].append(elapsed_ms)
+            result["statuses"][str(status)] = result["statuses"].get(str(status), 0) + 1
+            if status not in expected:
+                result["errors"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - started - warmup
+
+
+def build_report(args, seeded, results, elapsed, retries_before, retries_after, lock_wait):
+    all_latencies = [latency for result in results.values() for latency in result["latencies"]]
+    statuses = {}
+    for result in results.values():
+        for status, count in result["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+    return {
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "scale": args.scale, "profile": args.profile, "concurrency": args.concurrency,
+            "duration": args.duration, "requests": args.requests, "mode": "http" if args.url else "asgi",
+            "workers": args.workers if args.spawn_uvicorn else None, "seed": args.seed, "skip": args.skip,
+        },
+        "seeded": seeded,
+        "elapsed_seconds": round(elapsed, 3),
+        "total_requests": len(all_latencies),
+        "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": summarize_latencies(all_latencies),
+        "errors": sum(result["errors"] for result in results.values()),
+        "statuses": statuses,
+        "db_locked_retries": int(retries_after - retries_before),
+        "db_lock_wait_seconds": round(lock_wait, 3),
+        "operations": {
+            name: {
+                "latency_ms": summarize_latencies(result["latencies"]),
+                "errors": result["errors"],
+                "statuses": result["statuses"],
+            }
+            for name, result in results.items() if result["latencies"]
+        },
+    }
+
+
+def print_report(report):
+    print(f"\n📊 {report['config']['profile']} @ {report['config']['scale']} "
+          f"({report['config']['mode']}, concurrency {report['config']['concurrency']})")
+    latency = report["latency_ms"]
+    print(f"   Requests: {report['total_requests']} in {report['elapsed_seconds']}s "
+          f"→ {report['throughput_rps']} req/s")
+    print(f"   Latency: p50 {latency['p50']}ms  p95 {latency['p95']}ms  p99 {latency['p99']}ms")
+    print(f"   Errors: {report['errors']}  'database is locked' retries: {report['db_locked_retries']}")
+    print(f"\n   {'operation':<22}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+    for name, op in sorted(report["operations"].items()):
+        stats = op["latency_ms"]
+        print(f"   {name:<22}{stats['count']:>8}{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}{op['errors']:>8}")
+
+
+async def scrape_metrics(client):
+    text = (await client.get("/metrics")).text
+    return metric_sum(text, "db_retries_total"), metric_sum(text, "db_lock_wait_seconds_sum")
+
+
+async def drive(args, wl, weights):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+        lifespan = None
+    else:
+        import main
+
+        # Unhandled errors become 500 responses, as they would behind uvicorn
+        transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout)
+        lifespan = main.app.router.lifespan_context(main.app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            retries_before, lock_wait_before = await scrape_metrics(client)
+            results, elapsed = await run_load(client, wl, weights, args.concurrency, args.duration,
+                                              args.requests, args.warmup)
+            retries_after, lock_wait_after = await scrape_metrics(client)
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+    return results, elapsed, retries_before, retries_after, lock_wait_after - lock_wait_before
+
+
+def spawn_uvicorn(args, env, backend_dir=BACKEND_DIR):
+    """Start main:app of backend_dir (another checkout to compare builds) on args.port."""
+    port = args.port
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=backend_dir, env=env,
+    )
+    import httpx
+
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/tags", timeout=1)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Feedback System API.")
+    parser.add_argument("--scale", default="1k", help="Feedback rows to seed: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--span", type=int, default=8, help="Average team size (small values make deep org trees)")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--skip", default="", help="Comma-separated operations to leave out of the profile")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2, help="Unmeasured seconds before measuring")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--db", default=None, help="Benchmark database path (default: benchmarks/data/bench_<scale>.db)")
+    parser.add_argument("--url", default=None, help="Drive an already running server instead of in-process ASGI")
+    parser.add_argument("--spawn-uvicorn", action="store_true", help="Start a local uvicorn for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn-uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    feedback_count = SCALES.get(args.scale.lower()) or int(args.scale)
+    db_path = os.path.abspath(args.db or os.path.join(DEFAULT_DATA_DIR, f"bench_{args.scale.lower()}.db"))
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    # Must be set before database/main are imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    # Point SMTP at a closed local port so user creation never reaches a real mail server
+    os.environ.setdefault("SMTP_SERVER", "127.0.0.1")
+    os.environ.setdefault("SMTP_PORT", "1")
+
+    import database
+    import generate_data
+
+    print(f"🌱 Seeding {db_path} with {feedback_count} feedback rows...")
+    try:
+        seeded = generate_data.generate(database.engine, feedback_count, span=args.span, seed=args.seed)
+    except generate_data.DatabaseNotEmpty:
+        print("   Reusing existing data")
+        seeded = None
+
+    from main import create_access_token
+
+    wl = Workload(create_access_token, random.Random(args.seed), generate_data.DEFAULT_PASSWORD)
+    wl.load(database.engine)
+
+    process = None
+    if args.spawn_uvicorn:
+        database.engine.dispose()
+        process, args.url = spawn_uvicorn(args, dict(os.environ))
+    try:
+        skipped = {name.strip() for name in args.skip.split(",") if name.strip()}
+        weights = {name: weight for name, weight in PROFILES[args.profile].items() if name not in skipped}
+        results, elapsed, retries_before, retries_after, lock_wait = asyncio.run(drive(args, wl, weights))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = build_report(args, seeded, results, elapsed, retries_before, retries_after, lock_wait)
+    print_report(report)
+
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"{datetime.utcnow():%Y%m%dT%H%M%S}_{args.profile}_{args.scale.lower()}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Replay a recorded request trace (tracing.py) against a local instance.
+
+Seeds a benchmark database like load_test.py, maps every traced user
+pseudonym to a local user with the same role, and re-issues the requests
+at their recorded pacing (open loop: a slow build doesn't slow down the
+arrivals). Writes a result file benchmarks/compare.py can diff, so the
+same production traffic can be compared between two builds:
+
+    python -m benchmarks.replay traces/requests.jsonl --scale 100k --output before.json
+    python -m benchmarks.replay traces/requests.jsonl --scale 100k --spawn-uvicorn \\
+        --backend ../other-checkout/backend --output after.json
+    python -m benchmarks.compare before.json after.json
+
+Path parameters aren't traced, so requests for a feedback item or user go to
+one of the mapped user's own rows, as in the load test. Logout, token
+revocation, operator and unmatched requests are skipped and counted.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.load_test import (  # noqa: E402
+    DEFAULT_DATA_DIR, DEFAULT_RESULTS_DIR, SCALES, Workload, build_request, scrape_metrics, spawn_uvicorn,
+)
+from benchmarks.stats import summarize_latencies  # noqa: E402
+
+# (method, route template) -> load_test operation that issues it
+ROUTE_OPERATIONS = {
+    ("POST", "/auth/login"): "login",
+    ("GET", "/auth/me"): "me",
+    ("POST", "/auth/verify-email"): "verify_email",
+    ("POST", "/auth/resend-verification"): "resend_verification",
+    ("GET", "/users/team"): "team",
+    ("GET", "/users/search"): "search_users",
+    ("POST", "/users"): "create_user",
+    ("GET", "/users/managers"): "managers",
+    ("GET", "/users"): "users",
+    ("DELETE", "/users/{user_id}"): "delete_user",
+    ("POST", "/feedback"): "create_feedback",
+    ("GET", "/feedback"): "feedback",
+    ("PUT", "/feedback/{feedback_id}"): "update_feedback",
+    ("POST", "/feedback/{feedback_id}/acknowledge"): "acknowledge",
+    ("DELETE", "/feedback/{feedback_id}"): "delete_feedback",
+    ("GET", "/tags"): "tags",
+    ("POST", "/tags"): "create_tag",
+    ("POST", "/feedback-requests"): "create_request",
+    ("GET", "/feedback-requests"): "feedback_requests",
+    ("GET", "/feedback-requests/counts"): "request_counts",
+    ("POST", "/feedback-requests/{request_id}/complete"): "complete_request",
+    ("POST", "/feedback-requests/{request_id}/decline"): "decline_request",
+    ("GET", "/dashboard/stats"): "dashboard",
+    ("GET", "/bootstrap"): "bootstrap",
+}
+
+
+def read_trace(paths, limit=None):
+    records = []
+    for path in paths:
+        with open(path) as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    records.sort(key=lambda record: record["t"])
+    return records[:limit] if limit else records
+
+
+def local_actor(wl, record):
+    """The local user standing in for the record's pseudonym: same role, same user every time."""
+    if record.get("u") is None:
+        return None
+    pool = wl.employees if record.get("role") == "employee" else wl.managers
+    return pool[int(record["u"], 16) % len(pool)]
+
+
+def plan_request(wl, record, actor):
+    """build_request for the record's route, with its kept query parameters; None if it can't be replayed."""
+    name = ROUTE_OPERATIONS.get((record["m"], record.get("r")))
+    if name is None:
+        return None, None
+    try:
+        spec = build_request(name, wl, actor)
+    except (KeyError, IndexError):
+        # e.g. a traced employee calling a manager route: no local team to draw from
+        return name, None
+    if spec is None:
+        return name, None
+    method, url, kwargs, expected, on_response = spec
+    params = dict(kwargs.get("params", {}))
+    traced = record.get("q", {})
+    params.update({key: value for key, value in traced.items() if not value.startswith("~")})
+    for key, value in traced.items():
+        if key == "q" and value.startswith("~"):
+            # Search text isn't traced, only its length: search for a local name prefix as long
+            team = wl.teams.get(actor) if params.get("scope") == "team" else None
+            user_id = wl.rng.choice(team or wl.employees)
+            params[key] = wl.emails[user_id].split("@")[0][:int(value[1:]) or 1]
+    if params:
+        kwargs = {**kwargs, "params": params}
+    return name, (method, url, kwargs, on_response)
+
+
+async def replay(client, wl, records, speed, max_in_flight):
+    results = {}
+    skipped = {}
+    semaphore = asyncio.Semaphore(max_in_flight)
+    late = 0
+    t0 = records[0]["t"] if records else 0
+    started = time.perf_counter()
+
+    async def issue(name, method, url, kwargs, on_response, record):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = response.status_code
+            except Exception as e:
+                response, status = None, f"exception:{type(e).__name__}"
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        if response is not None and on_response:
+            on_response(response)
+        result = results.setdefault(name, {"latencies": [], "recorded": [], "errors": 0, "mismatches": 0, "statuses": {}})
+        result["latencies"].append(elapsed_ms)
+        result["recorded"].append(record["d"])
+        result["statuses"][str(status)] = result["statuses"].get(str(status), 0) + 1
+        if not isinstance(status, int) or status >= 500:
+            result["errors"] += 1
+        if status != record["s"]:
+            result["mismatches"] += 1
+
+    tasks = []
+    for record in records:
+        if speed:
+            delay = started + (record["t"] - t0) / 1000 / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -0.1:
+                late += 1
+        name, planned = plan_request(wl, record, local_actor(wl, record))
+        if planned is None:
+            key = name or f"{record['m']} {record.get('r') or 'unmatched'}"
+            skipped[key] = skipped.get(key, 0) + 1
+            continue
+        tasks.append(asyncio.create_task(issue(name, *planned, record)))
+        # Yield so requests start on time even when nothing needs to wait
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return results, skipped, late, time.perf_counter() - started
+
+
+def build_report(args, records, results, skipped, late, elapsed, retries):
+    latencies = [latency for result in results.values() for latency in result["latencies"]]
+    recorded = [duration for result in results.values() for duration in result["recorded"]]
+    return {
+        "started_at": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "trace": args.trace, "scale": args.scale, "speed": args.speed, "max_in_flight": args.max_in_flight,
+            "mode": "http" if args.url else "asgi", "backend": os.path.abspath(args.backend) if args.spawn_uvicorn else None,
+            "seed": args.seed,
+        },
+        "trace_requests": len(records),
+        "trace_span_seconds": round((records[-1]["t"] - records[0]["t"]) / 1000, 3) if records else 0,
+        "elapsed_seconds": round(elapsed, 3),
+        "total_requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": summarize_latencies(latencies),
+        # Server-side durations of the same requests in the trace
+        "recorded_latency_ms": summarize_latencies(recorded),
+        "errors": sum(result["errors"] for result in results.values()),
+        "status_mismatches": sum(result["mismatches"] for result in results.values()),
+        "late_requests": late,
+        "skipped": skipped,
+        "db_locked_retries": retries,
+        "operations": {
+            name: {
+                "latency_ms": summarize_latencies(result["latencies"]),
+                "recorded_latency_ms": summarize_latencies(result["recorded"]),
+                "errors": result["errors"],
+                "status_mismatches": result["mismatches"],
+                "statuses": result["statuses"],
+            }
+            for name, result in results.items()
+        },
+    }
+
+
+def print_report(report):
+    print(f"\n📊 Replayed {report['total_requests']} of {report['trace_requests']} traced requests "
+          f"({report['config']['mode']}, speed {report['config']['speed']})")
+    latency, recorded = report["latency_ms"], report["recorded_latency_ms"]
+    print(f"   Trace span {report['trace_span_seconds']}s, replayed in {report['elapsed_seconds']}s "
+          f"→ {report['throughput_rps']} req/s")
+    print(f"   Latency: p50 {latency['p50']}ms  p95 {latency['p95']}ms  p99 {latency['p99']}ms  "
+          f"(recorded p50 {recorded['p50']}ms  p95 {recorded['p95']}ms  p99 {recorded['p99']}ms)")
+    print(f"   Errors: {report['errors']}  status mismatches: {report['status_mismatches']}  "
+          f"late starts: {report['late_requests']}  'database is locked' retries: {report['db_locked_retries']}")
+    if report["skipped"]:
+        print("   Skipped: " + ", ".join(f"{name} ×{count}" for name, count in sorted(report["skipped"].items())))
+    print(f"\n   {'operation':<22}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'rec p95':>10}{'errors':>8}")
+    for name, op in sorted(report["operations"].items()):
+        stats = op["latency_ms"]
+        print(f"   {name:<22}{stats['count']:>8}{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}"
+              f"{op['recorded_latency_ms']['p95']:>10}{op['errors']:>8}")
+
+
+async def drive(args, wl, records):
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+        lifespan = None
+    else:
+        import main
+
+        transport = httpx.ASGITransport(app=main.app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout)
+        lifespan = main.app.router.lifespan_context(main.app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            retries_before, _ = await scrape_metrics(client)
+            results, skipped, late, elapsed = await replay(client, wl, records, args.speed, args.max_in_flight)
+            retries_after, _ = await scrape_metrics(client)
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+    return results, skipped, late, elapsed, int(retries_after - retries_before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded request trace against a local instance.")
+    parser.add_argument("trace", nargs="+", help="Trace files (TRACE_FILE and its rotated .1)")
+    parser.add_argument("--scale", default="1k", help="Feedback rows to seed: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--span", type=int, default=8, help="Average team size of the seeded data")
+    parser.add_argument("--speed", type=float, default=1, help="Pacing multiplier; 0 sends as fast as possible")
+    parser.add_argument("--max-in-flight", type=int, default=32,
+                        help="Concurrent requests at most (keep below the 40 threadpool threads of one worker)")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--db", default=None, help="Benchmark database path (default: benchmarks/data/bench_<scale>.db)")
+    parser.add_argument("--url", default=None, help="Replay against an already running server")
+    parser.add_argument("--spawn-uvicorn", action="store_true", help="Start a local uvicorn for the run")
+    parser.add_argument("--backend", default=BACKEND_DIR, help="Backend directory served by --spawn-uvicorn")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --spawn-uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Result JSON path (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    records = read_trace(args.trace, args.limit)
+    print(f"📼 {len(records)} traced requests")
+    if not records:
+        return
+
+    feedback_count = SCALES.get(args.scale.lower()) or int(args.scale)
+    db_path = os.path.abspath(args.db or os.path.join(DEFAULT_DATA_DIR, f"bench_{args.scale.lower()}.db"))
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    # Must be set before database/main are imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SMTP_SERVER", "127.0.0.1")
+    os.environ.setdefault("SMTP_PORT", "1")
+    # Don't trace the replay itself
+    os.environ["TRACE_FILE"] = ""
+
+    import database
+    import generate_data
+
+    print(f"🌱 Seeding {db_path} with {feedback_count} feedback rows...")
+    try:
+        generate_data.generate(database.engine, feedback_count, span=args.span, seed=args.seed)
+    except generate_data.DatabaseNotEmpty:
+        print("   Reusing existing data")
+
+    from main import create_access_token
+
+    wl = Workload(create_access_token, random.Random(args.seed), generate_data.DEFAULT_PASSWORD)
+    wl.load(database.engine)
+
+    process = None
+    if args.spawn_uvicorn:
+        database.engine.dispose()
+        process, args.url = spawn_uvicorn(args, dict(os.environ), os.path.abspath(args.backend))
+    try:
+        results, skipped, late, elapsed, retries = asyncio.run(drive(args, wl, records))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = build_report(args, records, results, skipped, late, elapsed, retries)
+    print_report(report)
+
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{datetime.utcnow():%Y%m%dT%H%M%S}_replay.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Serialization benchmark for the feedback list.
+
+Seeds a temporary database, then builds the JSON body for the same N feedback
+rows three ways and reports the time spent querying/building and encoding:
+
+- orm: ORM objects with eager-loaded users and tags, validated and serialized
+  by FastAPI's own serialize_response and rendered by JSONResponse (the
+  previous GET /feedback path)
+- rows: row tuples to dicts, encoded by serialization.dumps (orjson when installed)
+- normalized: the rows path with each user sent once
+
+Every body is checked to decode to the same data as the ORM path and to
+validate against the prebuilt TypeAdapters.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stats import summarize_latencies  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ORM/pydantic and row-tuple serialization of feedback lists.")
+    parser.add_argument("--rows", type=int, default=10_000, help="Feedback rows per response")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per path")
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="serialization-bench-")
+    # Must be set before database is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    try:
+        results = run(args)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n   {'path':<12}{'build p50':>12}{'encode p50':>12}{'total p50':>12}{'bytes':>12}")
+    for name, result in results.items():
+        print(f"   {name:<12}{result['build_ms']['p50']:>12.1f}{result['encode_ms']['p50']:>12.1f}"
+              f"{result['total_ms']['p50']:>12.1f}{result['bytes']:>12,}")
+    baseline = results["orm"]["total_ms"]["p50"]
+    for name in ("rows", "normalized"):
+        print(f"   {name}: {baseline / results[name]['total_ms']['p50']:.1f}x faster than orm")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+def run(args):
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    import database
+    import generate_data
+    import models
+    import schemas
+    import serialization
+    from main import feedback_query
+
+    print("⏱️  Serialization Benchmark")
+    print("=" * 30)
+    print(f"🌱 Seeding {args.rows} feedback rows...")
+    generate_data.generate(database.engine, args.rows, seed=42, verbose=False)
+    field = create_response_field(name="Response_get_feedback", type_=list[schemas.Feedback])
+    order = models.Feedback.id
+
+    def orm_path(db):
+        feedback = feedback_query(db).order_by(order).limit(args.rows).all()
+        built = time.perf_counter()
+        content = asyncio.run(serialize_response(field=field, response_content=feedback))
+        return built, JSONResponse(content).body
+
+    def rows_path(db, normalized=False):
+        data = serialization.feedback_list(db, order_by=order, limit=args.rows, normalized=normalized)
+        built = time.perf_counter()
+        return built, serialization.dumps(data)
+
+    paths = {
+        "orm": orm_path,
+        "rows": rows_path,
+        "normalized": lambda db: rows_path(db, normalized=True),
+    }
+    results, bodies = {}, {}
+    for name, path in paths.items():
+        samples = []
+        for attempt in range(args.repeat + 1):
+            with database.SessionLocal() as db:
+                start = time.perf_counter()
+                built, body = path(db)
+                done = time.perf_counter()
+            if attempt:  # The first run warms the page cache
+                samples.append(((built - start) * 1000, (done - built) * 1000, (done - start) * 1000))
+        bodies[name] = body
+        results[name] = {
+            "rows": args.rows,
+            "bytes": len(body),
+            "build_ms": summarize_latencies([sample[0] for sample in samples]),
+            "encode_ms": summarize_latencies([sample[1] for sample in samples]),
+            "total_ms": summarize_latencies([sample[2] for sample in samples]),
+        }
+        print(f"   {name}: {results[name]['total_ms']['p50']:.1f} ms")
+
+    expected = json.loads(bodies["orm"])
+    assert json.loads(bodies["rows"]) == expected, "rows path differs from the ORM path"
+    serialization.ADAPTERS["feedback"].validate_json(bodies["rows"])
+    normalized = serialization.ADAPTERS["normalized_feedback"].validate_json(bodies["normalized"])
+    users = {user.id: user.model_dump(mode="json") for user in normalized.users}
+    assert all(users[item["manager_id"]] == item["manager"] and users[item["employee_id"]] == item["employee"]
+               for item in expected), "normalized users differ from the ORM path"
+    print("✅ All paths produce the same data")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Startup-time benchmark for main.py.
+
+Starts fresh interpreters and measures how long `import main` and the app
+lifespan startup take in each startup mode, plus whether the SMTP and MIME
+modules were loaded before the first request.
+
+    python -m benchmarks.startup --runs 20
+    python -m benchmarks.startup --scenarios production,development --output startup.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.stats import summarize_latencies  # noqa: E402
+
+# Runs in a fresh interpreter for every measurement
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def start():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "deferred_loaded": sorted(m for m in ("aiosmtplib", "email.mime.multipart", "init_db") if m in sys.modules),
+}))
+"""
+
+# (startup mode, whether each run starts from an empty database)
+SCENARIOS = {
+    "production": ("production", False),
+    "development": ("development", False),
+    "development-empty-db": ("development", True),
+}
+
+
+def initialize(env):
+    """Create an initialized database with demo data, as a deployment would before starting workers."""
+    subprocess.run([sys.executable, "init_db.py"], cwd=BACKEND_DIR, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def run_probe(env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                            check=True, capture_output=True, text=True)
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample["process_ms"] = (time.perf_counter() - started) * 1000
+    return sample
+
+
+def run_scenario(name, runs, work_dir):
+    mode, empty_db = SCENARIOS[name]
+    db_path = os.path.join(work_dir, f"{name}.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", STARTUP_MODE=mode)
+    if not empty_db:
+        initialize(env)
+
+    samples = []
+    for _ in range(runs):
+        if empty_db:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+        samples.append(run_probe(env))
+
+    return {
+        "mode": mode,
+        "empty_db": empty_db,
+        "runs": runs,
+        "import_ms": summarize_latencies([s["import_ms"] for s in samples]),
+        "lifespan_ms": summarize_latencies([s["lifespan_ms"] for s in samples]),
+        "process_ms": summarize_latencies([s["process_ms"] for s in samples]),
+        "deferred_loaded": samples[-1]["deferred_loaded"],
+    }
+
+
+def print_report(results):
+    print(f"\n   {'scenario':<24}{'import p50':>12}{'lifespan p50':>14}{'process p50':>13}{'process p95':>13}")
+    for name, result in results.items():
+        print(f"   {name:<24}{result['import_ms']['p50']:>12.1f}{result['lifespan_ms']['p50']:>14.1f}"
+              f"{result['process_ms']['p50']:>13.1f}{result['process_ms']['p95']:>13.1f}")
+    for name, result in results.items():
+        loaded = ", ".join(result["deferred_loaded"]) or "none"
+        print(f"   {name}: deferred modules loaded at startup: {loaded}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Feedback System worker startup time.")
+    parser.add_argument("--runs", type=int, default=10, help="Interpreter starts per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    print("⏱️  Startup Benchmark")
+    print("=" * 30)
+    work_dir = tempfile.mkdtemp(prefix="startup-bench-")
+    try:
+        results = {}
+        for name in names:
+            print(f"🚀 {name}: {args.runs} runs...")
+            results[name] = run_scenario(name, args.runs, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
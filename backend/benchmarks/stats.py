@@ -0,0 +1,40 @@
+"""
+Latency statistics shared by the benchmark tools.
+"""
+
+import math
+import re
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize_latencies(latencies_ms):
+    """Return count, mean and p50/p95/p99/max in milliseconds."""
+    values = sorted(latencies_ms)
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 0.50), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def metric_sum(metrics_text, name):
+    """Sum every sample of a metric in Prometheus text output."""
+    pattern = re.compile(rf"^{re.escape(name)}(?:\{{[^}}]*\}})? (\S+)$")
+    total = 0.0
+    for line in metrics_text.splitlines():
+        match = pattern.match(line)
+        if match:
+            total += float(match.group(1))
+    return total
@@ -0,0 +1,138 @@
+"""
+Write throughput as the number of uvicorn workers and tenants grows.
+
+Seeds one database per tenant once, then for each tenant count, worker count
+and write-lock mode starts a local uvicorn and drives only write routes, with
+the clients spread evenly over the tenants, reporting throughput, latency and
+errors per configuration. WRITE_LOCK=file coordinates writers across workers;
+WRITE_LOCK=thread is the old per-process lock that leaves cross-process
+writers to SQLite's busy timeout.
+
+    python -m benchmarks.write_scaling --workers 1,2,4,8 --locks file,thread --duration 20
+    python -m benchmarks.write_scaling --tenants 1,2,4,8 --workers 4 --locks file
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+from types import SimpleNamespace
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.load_test import SCALES, Workload, run_load, spawn_uvicorn  # noqa: E402
+from benchmarks.stats import summarize_latencies  # noqa: E402
+
+WRITE_WEIGHTS = {
+    "create_feedback": 25, "update_feedback": 15, "acknowledge": 15,
+    "delete_feedback": 8, "create_request": 15, "create_tag": 1,
+}
+
+
+async def measure(url, workloads, concurrency, duration, warmup, timeout):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    per_tenant = max(1, concurrency // len(workloads))
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        runs = await asyncio.gather(*(run_load(client, wl, WRITE_WEIGHTS, per_tenant, duration, None, warmup)
+                                      for wl in workloads))
+    return [results for results, _ in runs], max(elapsed for _, elapsed in runs)
+
+
+def run_configuration(args, workloads, workers, lock):
+    env = dict(os.environ, WRITE_LOCK=lock)
+    process, url = spawn_uvicorn(SimpleNamespace(port=args.port, workers=workers), env)
+    try:
+        runs, elapsed = asyncio.run(measure(url, workloads, args.concurrency, args.duration, args.warmup, args.timeout))
+    finally:
+        process.terminate()
+        process.wait()
+
+    results = [result for run in runs for result in run.values()]
+    latencies = [latency for result in results for latency in result["latencies"]]
+    return {
+        "tenants": len(workloads),
+        "workers": workers,
+        "lock": lock,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_ms": summarize_latencies(latencies),
+        "errors": sum(result["errors"] for result in results),
+    }
+
+
+def tenant_workload(create_access_token, tenant, seed, password):
+    """Workload whose tokens carry the tenant claim, so requests are routed to that tenant's database."""
+    def tenant_token(data):
+        return create_access_token(data={**data, "tenant": tenant.name})
+
+    wl = Workload(tenant_token, random.Random(seed), password)
+    wl.load(tenant.engine)
+    return wl
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure write throughput against the number of workers and tenants.")
+    parser.add_argument("--scale", default="10k", help="Feedback rows to seed: 1k, 10k, 100k, 1m or a number")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--tenants", default="1", help="Comma-separated tenant counts (one database each)")
+    parser.add_argument("--locks", default="file,thread", help="Comma-separated WRITE_LOCK modes to compare")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15, help="Measured seconds per configuration")
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    feedback_count = SCALES.get(args.scale.lower()) or int(args.scale)
+    tenant_counts = [int(count) for count in args.tenants.split(",") if count.strip()]
+    data_dir = tempfile.mkdtemp(prefix="write-scaling-")
+    # Must be set before database/main are imported; spawned workers inherit them
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(data_dir, 'default.db')}"
+    os.environ["TENANT_DB_DIR"] = os.path.join(data_dir, "tenants")
+    os.environ["STARTUP_MODE"] = "production"
+
+    import database
+    import generate_data
+    import init_db
+    from main import create_access_token
+
+    init_db.init_database()
+    workloads = []
+    for number in range(max(tenant_counts)):
+        print(f"🌱 Seeding tenant t{number} with {feedback_count} feedback rows...")
+        tenant = database.tenants.provision(f"t{number}")
+        generate_data.generate(tenant.engine, feedback_count, seed=args.seed + number, verbose=False)
+        workloads.append(tenant_workload(create_access_token, tenant, args.seed + number,
+                                         generate_data.DEFAULT_PASSWORD))
+        tenant.engine.dispose()
+    database.engine.dispose()
+
+    results = []
+    for lock in [lock.strip() for lock in args.locks.split(",") if lock.strip()]:
+        for tenants in tenant_counts:
+            for workers in [int(count) for count in args.workers.split(",") if count.strip()]:
+                print(f"✍️  WRITE_LOCK={lock}, {tenants} tenant(s), {workers} worker(s)...")
+                results.append(run_configuration(args, workloads[:tenants], workers, lock))
+
+    print(f"\n   {'lock':<8}{'tenants':>8}{'workers':>8}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'errors':>8}")
+    for result in results:
+        latency = result["latency_ms"]
+        print(f"   {result['lock']:<8}{result['tenants']:>8}{result['workers']:>8}{result['throughput_rps']:>10}"
+              f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}{result['errors']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Calibrate the password hash cost for this host.
+
+Times the configured scheme at increasing cost and records the highest cost
+whose median hash time stays within the latency budget. Run it on the
+production host (or one like it) before starting the server, and again after
+moving to different hardware; passwords.py reads the result:
+
+    python calibrate_password_hash.py --budget-ms 250
+    python calibrate_password_hash.py --scheme argon2 --budget-ms 250 --memory-kib 65536
+
+Stored hashes made with a lower cost are rehashed as users log in.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from passlib.hash import argon2, bcrypt
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import passwords
+
+SAMPLE_PASSWORD = "calibration-password-123"
+BCRYPT_ROUNDS = range(10, 17)  # passlib rejects fewer than 4; below 10 is too weak for production
+ARGON2_TIME_COSTS = range(1, 11)
+
+
+def median_ms(handler, samples):
+    handler.hash(SAMPLE_PASSWORD)  # Warm up
+    times = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash(SAMPLE_PASSWORD)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def calibrate(scheme, budget_ms, samples, memory_kib, parallelism):
+    """Returns (options, median ms at the chosen cost, all measurements)."""
+    if scheme == "bcrypt":
+        name, costs = "bcrypt__rounds", BCRYPT_ROUNDS
+        configure = lambda cost: bcrypt.using(rounds=cost)  # noqa: E731
+    else:
+        name, costs = "argon2__time_cost", ARGON2_TIME_COSTS
+        configure = lambda cost: argon2.using(  # noqa: E731
+            time_cost=cost, memory_cost=memory_kib, parallelism=parallelism
+        )
+
+    measurements = {}
+    chosen = None
+    for cost in costs:
+        elapsed = median_ms(configure(cost), samples)
+        measurements[cost] = round(elapsed, 1)
+        within = elapsed <= budget_ms
+        print(f"   {'✅' if within else '⛔'} {name.split('__')[1]}={cost}: {elapsed:.1f} ms")
+        if not within:
+            break
+        chosen = cost
+    if chosen is None:
+        # Even the cheapest cost is over budget; use it rather than something weaker
+        chosen = costs[0]
+        print(f"⚠️  The lowest cost takes {measurements[chosen]} ms, over the {budget_ms} ms budget")
+
+    options = {name: chosen}
+    if scheme == "argon2":
+        options.update({"argon2__memory_cost": memory_kib, "argon2__parallelism": parallelism})
+    return options, measurements[chosen], measurements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the password hash cost that fits a latency budget on this host.")
+    parser.add_argument("--scheme", choices=passwords.SCHEMES, default=passwords.scheme)
+    parser.add_argument("--budget-ms", type=float, default=250, help="Target time for one hash")
+    parser.add_argument("--samples", type=int, default=5, help="Hashes timed per cost")
+    parser.add_argument("--memory-kib", type=int, default=65536, help="argon2 memory cost")
+    parser.add_argument("--parallelism", type=int, default=2, help="argon2 lanes")
+    parser.add_argument("--output", default=passwords.PASSWORD_HASH_CONFIG)
+    args = parser.parse_args()
+
+    print("🔐 Password Hash Calibration")
+    print("=" * 30)
+    if args.scheme == "argon2" and not argon2.has_backend():
+        print("❌ argon2 needs the argon2-cffi package: pip install argon2-cffi")
+        sys.exit(1)
+    print(f"⏱️  Timing {args.scheme} on {platform.node()} ({os.cpu_count()} CPUs), budget {args.budget_ms} ms...")
+
+    options, elapsed, measurements = calibrate(args.scheme, args.budget_ms, args.samples, args.memory_kib, args.parallelism)
+    result = {
+        "scheme": args.scheme,
+        **options,
+        "budget_ms": args.budget_ms,
+        "measured_ms": elapsed,
+        "measurements_ms": measurements,
+        "host": platform.node(),
+        "cpus": os.cpu_count(),
+        "calibrated_at": datetime.utcnow().isoformat(timespec="seconds"),
+    }
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"✅ {', '.join(f'{name}={value}' for name, value in options.items())} ({elapsed} ms per hash)")
+    print(f"💾 Written to {args.output}")
+    print("   Restart the server to use it; existing hashes are upgraded as users log in.")
+
+
+if __name__ == "__main__":
+    main()
@@ -123,8 +123,32 @@ def show_sample_data():
     finally:
         db.close()
 
+def check_snapshot(snapshot_path):
+    """Validate a compressed snapshot written by backup.py."""
+    from backup import verify_snapshot
+
+    print("🏥 Snapshot Check")
+    print("=" * 30)
+    print(f"📦 {snapshot_path}")
+    ok, messages = verify_snapshot(snapshot_path)
+    for message in messages:
+        print(f"   {message}")
+    if ok:
+        print("\n🎉 Snapshot is valid!")
+    return ok
+
 if __name__ == "__main__":
-    if check_database_health():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check the database, or a backup snapshot, for problems.")
+    parser.add_argument("--snapshot", default=None, help="Validate a .db.gz snapshot from backup.py instead")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        if not check_snapshot(args.snapshot):
+            print("\n❌ Snapshot check failed!")
+            sys.exit(1)
+    elif check_database_health():
         show_sample_data()
     else:
         print("\n❌ Database health check failed!")
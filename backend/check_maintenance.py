@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Maintenance concurrency check for the Feedback System.
+Seeds a throwaway database, runs every maintenance task in a loop while
+concurrent POST /feedback writers go through the API, and fails if a write
+stalls or a maintenance run errors (for example by waiting for the pooled
+connection while holding the write lock).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.load_test import Workload, build_request
+
+# A write queued behind one maintenance step finishes well within this
+WRITE_DEADLINE_SECONDS = 5
+
+async def write_concurrently(app, wl, writers, seconds):
+    """Send create_feedback requests from `writers` clients for `seconds`; returns the slowest latency."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    slowest = 0.0
+    failures = 0
+    deadline = time.monotonic() + seconds
+
+    async def writer(client):
+        nonlocal slowest, failures
+        while time.monotonic() < deadline:
+            method, url, kwargs, expected, _ = build_request("create_feedback", wl)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            slowest = max(slowest, time.perf_counter() - start)
+            if response.status_code not in expected:
+                failures += 1
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://maintenance-check", timeout=120) as client:
+        await asyncio.gather(*(writer(client) for _ in range(writers)))
+    return slowest, failures
+
+def run_maintenance(stop):
+    """Run every maintenance task back to back until stop is set; returns (runs, failed runs)."""
+    import maintenance
+
+    runs = failed = 0
+    while not stop.is_set():
+        for name, func, _ in maintenance.TASKS:
+            before = maintenance.maintenance_duration.count(task=name, outcome="error")
+            maintenance.run_task(name, func)
+            runs += 1
+            failed += maintenance.maintenance_duration.count(task=name, outcome="error") - before
+    return runs, failed
+
+def check_maintenance(writers, seconds):
+    print("🧹 Maintenance Concurrency Check")
+    print("=" * 32)
+
+    db_dir = tempfile.mkdtemp(prefix="maintenance-check-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'maintenance.db')}"
+    # The tasks are driven by this script, not the app's scheduler
+    os.environ["MAINTENANCE_ENABLED"] = "false"
+
+    import database
+    import generate_data
+    import main
+
+    generate_data.generate(database.engine, 500, seed=1, verbose=False)
+    wl = Workload(main.create_access_token, random.Random(1), generate_data.DEFAULT_PASSWORD)
+    wl.load(database.engine)
+
+    stop = threading.Event()
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(zip(("runs", "failed"), run_maintenance(stop))))
+    thread.start()
+    try:
+        slowest, failures = asyncio.run(write_concurrently(main.app, wl, writers, seconds))
+    finally:
+        stop.set()
+        thread.join()
+
+    print(f"\n📊 {result['runs']} maintenance runs alongside {writers} writers for {seconds:g}s")
+    print(f"   Slowest write: {slowest * 1000:.0f} ms")
+    ok = True
+    if slowest > WRITE_DEADLINE_SECONDS:
+        print(f"❌ A write took longer than {WRITE_DEADLINE_SECONDS}s")
+        ok = False
+    if failures:
+        print(f"❌ {failures} writes failed")
+        ok = False
+    if result["failed"]:
+        print(f"❌ {result['failed']} maintenance runs failed")
+        ok = False
+    if ok:
+        print("✅ Maintenance and writers never blocked each other")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if maintenance tasks and API writers deadlock.")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent POST /feedback clients")
+    parser.add_argument("--seconds", type=float, default=5, help="How long to keep writing")
+    args = parser.parse_args()
+
+    if not check_maintenance(args.writers, args.seconds):
+        print("\n❌ Maintenance check failed!")
+        sys.exit(1)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Single-flight replay check for the Feedback System.
+Seeds a throwaway database, then serves GET /dashboard/stats repeatedly from
+one reused response and to concurrent followers of one leader, with an Origin
+header so the CORS middleware edits every response on its way out. Fails if a
+replayed response differs from the first one (stored messages must not be
+changed by outer middleware).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.load_test import Workload
+
+ORIGIN = "http://localhost:3000"
+# Set per response by the metrics middleware, outside the coalesced part
+PER_RESPONSE_HEADERS = {"x-request-id"}
+
+def comparable(response):
+    headers = [(name, value) for name, value in response.headers.multi_items() if name not in PER_RESPONSE_HEADERS]
+    return response.status_code, headers, response.content
+
+async def replay_responses(app, headers, reuses, followers):
+    """The first response, then `reuses` reused ones and `followers` coalesced ones."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://single-flight-check") as client:
+        first = await client.get("/dashboard/stats", headers=headers)
+        reused = [await client.get("/dashboard/stats", headers=headers) for _ in range(reuses)]
+        # A different query string starts a new flight; its followers share the leader's response
+        burst = await asyncio.gather(*(
+            client.get("/dashboard/stats", params={"burst": 1}, headers=headers) for _ in range(followers + 1)
+        ))
+    return first, reused, burst
+
+def check_single_flight(reuses, followers):
+    print("🛫 Single-Flight Replay Check")
+    print("=" * 29)
+
+    db_dir = tempfile.mkdtemp(prefix="single-flight-check-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'single_flight.db')}"
+    os.environ["SINGLE_FLIGHT_ENABLED"] = "true"
+    os.environ["SINGLE_FLIGHT_REUSE_MS"] = "60000"
+
+    import coalescing
+    import database
+    import generate_data
+    import main
+
+    generate_data.generate(database.engine, 500, seed=1, verbose=False)
+    wl = Workload(main.create_access_token, random.Random(1), generate_data.DEFAULT_PASSWORD)
+    wl.load(database.engine)
+    headers = {**wl.headers(wl.manager()), "Origin": ORIGIN}
+
+    first, reused, burst = asyncio.run(replay_responses(main.app, headers, reuses, followers))
+
+    outcomes = {
+        outcome: coalescing.single_flight_requests.value(route="get_dashboard_stats", outcome=outcome)
+        for outcome in ("leader", "coalesced", "reused")
+    }
+    print(f"\n📊 Outcomes: {outcomes}")
+    print(f"   Vary: {first.headers.get('vary')}")
+
+    ok = True
+    if outcomes["reused"] < reuses:
+        print(f"❌ Expected {reuses} reused responses")
+        ok = False
+    expected = comparable(first)
+    for index, response in enumerate(reused, 1):
+        if comparable(response) != expected:
+            print(f"❌ Reused response {index} differs from the first: Vary: {response.headers.get('vary')}")
+            ok = False
+    expected = comparable(burst[0])
+    for index, response in enumerate(burst[1:], 1):
+        if comparable(response) != expected:
+            print(f"❌ Coalesced response {index} differs from its leader's: Vary: {response.headers.get('vary')}")
+            ok = False
+    if ok:
+        print("✅ Every replayed response matched the original")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if replayed single-flight responses differ from the original.")
+    parser.add_argument("--reuses", type=int, default=3, help="Sequential requests served from the reused response")
+    parser.add_argument("--followers", type=int, default=4, help="Concurrent requests coalesced onto one leader")
+    args = parser.parse_args()
+
+    if not check_single_flight(args.reuses, args.followers):
+        print("\n❌ Single-flight check failed!")
+        sys.exit(1)
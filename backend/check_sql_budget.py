@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+SQL statement budget check for the Feedback System.
+Seeds a throwaway database, calls every API route and fails if any request
+issues more SQL statements than its route's @sql_budget allows.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.load_test import PROFILES, Workload, build_request
+
+async def exercise_routes(app, wl, rounds):
+    """Call every operation of the load test `rounds` times, one request at a time."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://budget-check") as client:
+            await client.get("/metrics")
+            for _ in range(rounds):
+                for name in PROFILES["mixed"]:
+                    spec = build_request(name, wl)
+                    if spec is None:
+                        continue
+                    method, url, kwargs, expected, on_response = spec
+                    response = await client.request(method, url, **kwargs)
+                    if response.status_code not in expected:
+                        print(f"   ⚠️  {name}: unexpected status {response.status_code}")
+                    if on_response:
+                        on_response(response)
+
+def check_sql_budgets(feedback_count, rounds):
+    print("🧮 SQL Statement Budget Check")
+    print("=" * 30)
+
+    db_dir = tempfile.mkdtemp(prefix="sql-budget-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'budget.db')}"
+    # Point SMTP at a closed local port so user creation never reaches a real mail server
+    os.environ["SMTP_SERVER"] = "127.0.0.1"
+    os.environ["SMTP_PORT"] = "1"
+
+    import database
+    import generate_data
+    import main
+    import sql_budget
+
+    generate_data.generate(database.engine, feedback_count, seed=1, verbose=False)
+    checker = sql_budget.install(main.app, database.engine)
+
+    missing = sql_budget.routes_without_budget(main.app)
+    for route in missing:
+        print(f"   ❌ {route} declares no @sql_budget")
+
+    wl = Workload(main.create_access_token, random.Random(1), generate_data.DEFAULT_PASSWORD)
+    wl.load(database.engine)
+    asyncio.run(exercise_routes(main.app, wl, rounds))
+
+    print(f"\n📊 {checker.requests} requests checked")
+    for violation in checker.violations:
+        print(f"\n❌ {violation.report()}")
+
+    if missing or checker.violations:
+        return False
+    print("✅ Every request stayed within its SQL budget")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if any route exceeds its SQL statement budget.")
+    parser.add_argument("--feedback", type=int, default=2000, help="Feedback rows to seed")
+    parser.add_argument("--rounds", type=int, default=3, help="Times to call each route")
+    args = parser.parse_args()
+
+    if not check_sql_budgets(args.feedback, args.rounds):
+        print("\n❌ SQL budget check failed!")
+        sys.exit(1)
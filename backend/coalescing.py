@@ -0,0 +1,165 @@
+"""
+Single-flight coalescing for expensive read routes.
+
+When many requests for the same data arrive at once (managers opening the
+dashboard at the start of a review cycle, several browser tabs), only the first
+runs the route; the others wait on the event loop, without a database
+connection or a threadpool thread, and receive a copy of its response.
+Requests are identical when they share the route and query string, the tenant,
+the principal (the exact Authorization credential, so a response is only ever
+shared with a caller presenting the same token) and the data versions of the
+tables the route reads, so a committed write always starts a fresh computation.
+
+Routes opt in with @single_flight(tables), applied below the route decorator
+like @sql_budget. With SINGLE_FLIGHT_REUSE_MS > 0 a finished 200 response is
+also served to requests arriving within that window while the data versions
+are unchanged. Writes made by other worker processes do not bump this
+process's versions; the invalidation bus reports them within
+INVALIDATION_POLL_MS, and flights and reusable responses built from the
+written tables are dropped then.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers
+
+import data_version
+import database
+import invalidation
+import metrics
+import models
+import route_match
+
+# Load environment variables
+load_dotenv()
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+SINGLE_FLIGHT_REUSE_MS = float(os.getenv("SINGLE_FLIGHT_REUSE_MS", "0"))
+SINGLE_FLIGHT_MAX_ENTRIES = int(os.getenv("SINGLE_FLIGHT_MAX_ENTRIES", "1024"))
+
+single_flight_requests = metrics.Counter(
+    "single_flight_requests_total", "Coalescable reads by outcome (leader, coalesced, reused)", ["route", "outcome"]
+)
+
+
+def _copy(message):
+    """A message whose headers can be edited without changing the stored one."""
+    if "headers" in message:
+        return {**message, "headers": list(message["headers"])}
+    return dict(message)
+
+
+def single_flight(tables):
+    """Coalesce identical concurrent GET requests to a route built from tables; apply below the route decorator."""
+    def decorator(func):
+        func.single_flight = tuple(tables)
+        return func
+    return decorator
+
+
+class SingleFlightMiddleware:
+    """ASGI middleware that lets identical concurrent reads share one response."""
+
+    def __init__(self, app, router, tenant_name, reuse_ms=SINGLE_FLIGHT_REUSE_MS, max_entries=SINGLE_FLIGHT_MAX_ENTRIES):
+        self.app = app
+        self.router = router
+        # Maps request headers to the tenant name, as the app's own tenant resolution does
+        self.tenant_name = tenant_name
+        self.reuse_seconds = reuse_ms / 1000
+        self.max_entries = max_entries
+        self.flights = {}
+        self.recent = OrderedDict()
+        invalidation.bus.subscribe(models.VERSIONED_TABLES, self.invalidate)
+
+    def _key(self, scope, route):
+        headers = Headers(scope=scope)
+        credential = headers.get("authorization")
+        if not credential:
+            return None
+        try:
+            tenant = database.tenants.get(self.tenant_name(headers))
+        except (database.UnknownTenant, database.TenantUnavailable):
+            # Not coalesced; the route answers with 401 or 503
+            return None
+        versions = data_version.current(tenant.engine, route.endpoint.single_flight)
+        # A 304 answers only the If-None-Match it was computed for
+        return (route.path, scope["query_string"], tenant.name, credential, headers.get("if-none-match"),
+                route.endpoint.single_flight, versions)
+
+    def invalidate(self, tenant_name, tables):
+        """Forget the flights and reusable responses of a tenant built from tables (written by another process)."""
+        for entries in (self.flights, self.recent):
+            for key in [key for key in entries if key[2] == tenant_name and not tables.isdisjoint(key[5])]:
+                del entries[key]
+
+    async def __call__(self, scope, receive, send):
+        route = None
+        if scope["type"] == "http" and scope["method"] == "GET":
+            route = route_match.route_for(self.router, scope)
+        if route is None or getattr(route.endpoint, "single_flight", None) is None:
+            await self.app(scope, receive, send)
+            return
+        key = self._key(scope, route)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        label = route.endpoint.__name__
+
+        recent = self.recent.get(key)
+        if recent is not None and recent[0] > time.monotonic():
+            single_flight_requests.inc(route=label, outcome="reused")
+            await self._replay(send, recent[1])
+            return
+
+        flight = self.flights.get(key)
+        if flight is not None:
+            try:
+                messages = await asyncio.shield(flight)
+            except Exception:
+                # The leader failed or disconnected; compute this response ourselves
+                await self.app(scope, receive, send)
+                return
+            single_flight_requests.inc(route=label, outcome="coalesced")
+            await self._replay(send, messages)
+            return
+
+        flight = self.flights[key] = asyncio.get_running_loop().create_future()
+        messages = []
+
+        async def send_wrapper(message):
+            # Outer middleware (CORS, metrics) edits the headers in place as the message goes out
+            messages.append(_copy(message))
+            await send(message)
+
+        single_flight_requests.inc(route=label, outcome="leader")
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            flight.set_exception(e if isinstance(e, Exception) else RuntimeError("Leader request was cancelled"))
+            # Followers handle the error themselves; don't warn that it was never retrieved
+            flight.exception()
+            raise
+        else:
+            flight.set_result(messages)
+            # Not if invalidate() dropped the flight: the response may predate the write
+            current = self.flights.get(key) is flight
+            if current and self.reuse_seconds > 0 and messages and messages[0]["status"] == 200:
+                self._remember(key, messages)
+        finally:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+
+    def _remember(self, key, messages):
+        now = time.monotonic()
+        self.recent[key] = (now + self.reuse_seconds, messages)
+        self.recent.move_to_end(key)
+        while self.recent and (len(self.recent) > self.max_entries or next(iter(self.recent.values()))[0] <= now):
+            self.recent.popitem(last=False)
+
+    async def _replay(self, send, messages):
+        for message in messages:
+            await send(_copy(message))
@@ -0,0 +1,76 @@
+"""
+Per-table data versions.
+
+install() hooks an engine so every committed transaction that wrote to a table
+bumps that table's counter. A response built only from some tables is unchanged
+for as long as their versions are, which makes the versions usable as cache and
+coalescing keys. Statements are inspected at the cursor level, so ORM flushes,
+bulk query.delete() calls and Core statements (maintenance) are all seen.
+
+Versions are kept per database (each tenant has its own) and per process.
+stored() reads the data_versions table instead, which triggers bump inside the
+writing transaction, so it is consistent across worker processes and with the
+snapshot a request reads.
+"""
+
+import re
+import threading
+
+from sqlalchemy import event, text
+
+_WRITE = re.compile(
+    r"^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+_lock = threading.Lock()
+# database URL -> {table: version}; kept across engine eviction so versions never go back
+_versions = {}
+
+
+def _key(engine):
+    return str(engine.url)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    match = _WRITE.match(statement)
+    if match:
+        conn.info.setdefault("written_tables", set()).add(match.group(1).lower())
+
+
+def _commit(conn):
+    tables = conn.info.pop("written_tables", None)
+    if tables:
+        bump(conn.engine, tables)
+
+
+def _rollback(conn):
+    conn.info.pop("written_tables", None)
+
+
+def install(engine):
+    """Track committed writes on this engine."""
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "commit", _commit)
+    event.listen(engine, "rollback", _rollback)
+
+
+def bump(engine, tables):
+    with _lock:
+        versions = _versions.setdefault(_key(engine), {})
+        for table in tables:
+            versions[table] = versions.get(table, 0) + 1
+
+
+def current(engine, tables):
+    """Tuple of the versions of tables, in the given order."""
+    versions = _versions.get(_key(engine), {})
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def stored(connection, tables):
+    """Versions of tables from the data_versions table, or None if they are not tracked there."""
+    versions = dict(connection.execute(text("SELECT table_name, version FROM data_versions")).all())
+    if any(table not in versions for table in tables):
+        return None
+    return tuple(versions[table] for table in tables)
@@ -1,44 +1,252 @@
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from collections import OrderedDict
+import contextvars
 import os
+import re
+import threading
+import time
+import data_version
+import metrics
+import slow_query
+import write_lock
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./feedback_system.db")
 
-# SQLite specific configuration to handle concurrent connections
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={
-            "check_same_thread": False,
-            "timeout": 60,  # Increased timeout to 60 seconds
-        },
-        pool_timeout=30,
-        pool_recycle=-1,
-        pool_pre_ping=True,
-        pool_size=1,  # Single connection pool for SQLite
-        max_overflow=0  # No overflow connections
-    )
-    
-    # Enable WAL mode for better concurrent access
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):
-        cursor = dbapi_connection.cursor()
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_pool_checkout_wait.observe(time.perf_counter() - start)
+
+# Page cache and memory-mapped I/O per deployment profile, as (cache_size KiB, mmap_size MiB);
+# DB_CACHE_SIZE_KB and DB_MMAP_SIZE_MB override the profile
+DB_PROFILES = {
+    "small": (8 * 1024, 0),        # Memory-constrained containers
+    "standard": (64 * 1024, 256),
+    "large": (256 * 1024, 2048),   # Dedicated hosts with large databases
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "standard")
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", DB_PROFILES[DB_PROFILE][0]))
+DB_MMAP_SIZE_MB = int(os.getenv("DB_MMAP_SIZE_MB", DB_PROFILES[DB_PROFILE][1]))
+
+def create_database_engine(url):
+    """Create an instrumented engine with the connection settings used by the app."""
+    # SQLite specific configuration to handle concurrent connections
+    if url.startswith("sqlite"):
+        engine = create_engine(
+            url, 
+            connect_args={
+                "check_same_thread": False,
+                "timeout": 60,  # Increased timeout to 60 seconds
+            },
+            poolclass=TimedQueuePool,
+            pool_timeout=30,
+            pool_recycle=-1,
+            pool_pre_ping=True,
+            pool_size=1,  # Single connection pool for SQLite
+            max_overflow=0  # No overflow connections
+        )
+        
         # Enable WAL mode for better concurrent access
-        cursor.execute("PRAGMA journal_mode=WAL")
-        # Set busy timeout
-        cursor.execute("PRAGMA busy_timeout=60000")  # 60 seconds
-        # Enable foreign keys
-        cursor.execute("PRAGMA foreign_keys=ON")
-        # Optimize for concurrent access
-        cursor.execute("PRAGMA synchronous=NORMAL")
-        cursor.execute("PRAGMA cache_size=1000")
-        cursor.execute("PRAGMA temp_store=memory")
-        cursor.close()
-else:
-    # PostgreSQL or other database configuration
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragma(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            # Enable WAL mode for better concurrent access
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Set busy timeout
+            cursor.execute("PRAGMA busy_timeout=60000")  # 60 seconds
+            # Enable foreign keys
+            cursor.execute("PRAGMA foreign_keys=ON")
+            # Optimize for concurrent access
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")  # Negative: size in KiB
+            cursor.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE_MB * 1024 * 1024}")
+            cursor.execute("PRAGMA temp_store=memory")
+            cursor.close()
+    else:
+        # PostgreSQL or other database configuration
+        engine = create_engine(url, poolclass=TimedQueuePool)
+
+    # Per-statement timing and per-request statement/row counts for /metrics
+    metrics.instrument_engine(engine)
+
+    # Log statements slower than SLOW_QUERY_MS with their query plans
+    slow_query.install(engine)
+
+    # Bump per-table versions on commit, used to key coalesced and cached reads
+    data_version.install(engine)
+    return engine
+
+engine = create_database_engine(SQLALCHEMY_DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# Count ORM rows loaded per request (SQLite reports no rowcount for SELECT)
+event.listen(Base, "load", metrics.count_loaded_row, propagate=True)
+
+# Version of the schema described by models.py; init_db.py and migrate_db.py record it
+# in the database so production startup can check it with a single query. Every version
+# has a migration in migrations.py, which also keeps the schema_migrations history
+# 1: email verification columns; 2: data_versions change counters and their triggers;
+# 3: revoked_tokens; 4: users_fts search index and its triggers;
+# 5: feedback_requests manager_id, responded_at and feedback_id columns and the inbox index
+SCHEMA_VERSION = 5
+
+def get_schema_version(connection):
+    """Return the schema version recorded in the database (0 if it was never initialized)."""
+    if connection.dialect.name == "sqlite":
+        return connection.exec_driver_sql("PRAGMA user_version").scalar()
+    return SCHEMA_VERSION if inspect(connection).has_table("users") else 0
+
+def set_schema_version(connection, version=SCHEMA_VERSION):
+    """Record the schema version; SQLite keeps it in the database header."""
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"PRAGMA user_version={int(version)}")
+
+
+# Per-tenant databases: with TENANT_DB_DIR set, each tenant named in the JWT gets its own
+# SQLite file (<TENANT_DB_DIR>/<tenant>.db) with its own engine, pool and write lock, so
+# tenants no longer contend for one database's write lock
+TENANT_DB_DIR = os.getenv("TENANT_DB_DIR")
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+TENANT_MAX_ENGINES = int(os.getenv("TENANT_MAX_ENGINES", "32"))
+
+_TENANT_NAME = re.compile(r"[a-z0-9][a-z0-9_-]{0,62}")
+
+class UnknownTenant(LookupError):
+    pass
+
+class TenantUnavailable(RuntimeError):
+    """The tenant database exists but its schema is older than this release (not migrated yet)."""
+
+class Tenant:
+    """Engine, session factory and write lock of one tenant database."""
+
+    def __init__(self, name, engine, write_lock):
+        self.name = name
+        self.engine = engine
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.write_lock = write_lock
+
+    def idle(self):
+        return self.engine.pool.checkedout() == 0 and not self.write_lock.locked()
+
+    def close(self):
+        self.engine.dispose()
+        self.write_lock.close()
+
+def tenant_url(name):
+    return f"sqlite:///{os.path.join(os.path.abspath(TENANT_DB_DIR), name + '.db')}"
+
+def open_tenant(name):
+    """Open an existing tenant database without checking its schema version (migrate_db.py
+    uses it directly); close() it when done."""
+    if not _TENANT_NAME.fullmatch(name):
+        raise UnknownTenant(f"Invalid tenant name: {name!r}")
+    url = tenant_url(name)
+    if not os.path.exists(url.split(":///", 1)[1]):
+        raise UnknownTenant(f"No database for tenant {name!r}; run `python init_db.py --tenant {name}`")
+    return Tenant(name, create_database_engine(url), write_lock.for_database(url, tenant=name))
+
+def tenant_names():
+    """Names of the tenant databases in TENANT_DB_DIR."""
+    if not TENANT_DB_DIR or not os.path.isdir(TENANT_DB_DIR):
+        return []
+    names = (filename[:-3] for filename in os.listdir(TENANT_DB_DIR) if filename.endswith(".db"))
+    return sorted(name for name in names if _TENANT_NAME.fullmatch(name))
+
+class TenantRegistry:
+    """Opens tenant databases on first use and keeps the most recently used ones.
+
+    The default tenant is the DATABASE_URL database and is never evicted. Beyond
+    TENANT_MAX_ENGINES open tenants, the least recently used idle ones are disposed.
+    """
+
+    def __init__(self, default, max_engines=TENANT_MAX_ENGINES):
+        self.default = default
+        self.max_engines = max_engines
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def all(self):
+        """The default tenant followed by every open tenant."""
+        with self._lock:
+            return [self.default, *self._open.values()]
+
+    def get(self, name):
+        if name == self.default.name or not TENANT_DB_DIR:
+            return self.default
+        with self._lock:
+            tenant = self._open.get(name)
+            if tenant is not None:
+                self._open.move_to_end(name)
+                return tenant
+        # Opening checks the file and schema version; done outside the registry lock
+        tenant = self._connect(name)
+        with self._lock:
+            existing = self._open.get(name)
+            if existing is not None:
+                tenant.close()
+                self._open.move_to_end(name)
+                return existing
+            self._open[name] = tenant
+            metrics.db_tenant_engines.set(len(self._open))
+            self._evict()
+        return tenant
+
+    def _connect(self, name):
+        tenant = open_tenant(name)
+        with tenant.engine.connect() as connection:
+            version = get_schema_version(connection)
+        if version < SCHEMA_VERSION:
+            tenant.close()
+            raise TenantUnavailable(f"Tenant {name!r} schema version {version} is older than {SCHEMA_VERSION}")
+        return tenant
+
+    def _evict(self):
+        # Oldest first; tenants with connections in use or a held write lock are skipped
+        for name in list(self._open):
+            if len(self._open) <= self.max_engines:
+                break
+            tenant = self._open[name]
+            if tenant.idle():
+                del self._open[name]
+                tenant.close()
+                metrics.db_tenant_evictions.inc()
+        metrics.db_tenant_engines.set(len(self._open))
+
+    def provision(self, name):
+        """Create a tenant database with the current schema (used by init_db.py --tenant)."""
+        if not TENANT_DB_DIR:
+            raise RuntimeError("Set TENANT_DB_DIR to create tenant databases")
+        if not _TENANT_NAME.fullmatch(name):
+            raise UnknownTenant(f"Invalid tenant name: {name!r}")
+        os.makedirs(TENANT_DB_DIR, exist_ok=True)
+        if name in tenant_names():
+            raise RuntimeError(f"Tenant {name!r} already exists; run `python migrate_db.py --tenant {name}` to update its schema")
+        engine = create_database_engine(tenant_url(name))
+        try:
+            Base.metadata.create_all(bind=engine)
+            with engine.begin() as connection:
+                set_schema_version(connection)
+        finally:
+            engine.dispose()
+        return self.get(name)
+
+tenants = TenantRegistry(Tenant(DEFAULT_TENANT, engine, write_lock.for_database(SQLALCHEMY_DATABASE_URL)))
+
+# Tenant of the request being served, set by main.resolve_tenant
+current_tenant = contextvars.ContextVar("current_tenant", default=DEFAULT_TENANT)
+
+def get_tenant():
+    """Tenant database for the current request."""
+    return tenants.get(current_tenant.get())
@@ -1,14 +1,17 @@
 import os
 import secrets
-import aiosmtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import time
 from datetime import datetime, timedelta
+from urllib.parse import urlencode
 from dotenv import load_dotenv
+import app_log
+import metrics
 
 # Load environment variables
 load_dotenv()
 
+logger = app_log.get_logger(__name__)
+
 class EmailService:
     def __init__(self):
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
@@ -27,9 +30,38 @@ class EmailService:
         """Get token expiry time (24 hours from now)"""
         return datetime.utcnow() + timedelta(hours=24)
 
-    async def send_verification_email(self, to_email: str, full_name: str, verification_token: str):
+    async def _send(self, message, kind: str):
+        """Send a message over SMTP, recording the send duration"""
+        # Imported on first send so worker startup doesn't pay for the SMTP client
+        import aiosmtplib
+
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            await aiosmtplib.send(
+                message,
+                hostname=self.smtp_server,
+                port=self.smtp_port,
+                start_tls=True,
+                username=self.smtp_username,
+                password=self.smtp_password,
+            )
+            outcome = "sent"
+        finally:
+            metrics.smtp_send_duration.observe(time.perf_counter() - start, email=kind, outcome=outcome)
+
+    def frontend_link(self, path: str, tenant: str = None, **params):
+        """Frontend URL; links for a tenant user carry the tenant, which the pages send as X-Tenant."""
+        if tenant:
+            params["tenant"] = tenant
+        return f"{self.frontend_url}{path}" + (f"?{urlencode(params)}" if params else "")
+
+    async def send_verification_email(self, to_email: str, full_name: str, verification_token: str, tenant: str = None):
         """Send email verification email"""
-        verification_url = f"{self.frontend_url}/verify-email?token={verification_token}"
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
+        verification_url = self.frontend_link("/verify-email", tenant, token=verification_token)
         
         # Create message
         message = MIMEMultipart("alternative")
@@ -120,21 +152,19 @@ class EmailService:
 
         # Send email
         try:
-            await aiosmtplib.send(
-                message,
-                hostname=self.smtp_server,
-                port=self.smtp_port,
-                start_tls=True,
-                username=self.smtp_username,
-                password=self.smtp_password,
-            )
+            await self._send(message, "verification")
             return True
         except Exception as e:
-            print(f"Failed to send email: {e}")
+            # Rate limited per email type: an SMTP outage would otherwise log every send
+            logger.warning("Email send failed", extra={"email": "verification", "error": str(e), "rate_key": "verification"})
             return False
 
-    async def send_welcome_email(self, to_email: str, full_name: str, role: str, temp_password: str):
+    async def send_welcome_email(self, to_email: str, full_name: str, role: str, temp_password: str, tenant: str = None):
         """Send welcome email with login credentials"""
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
+        login_url = self.frontend_link("/login", tenant)
         
         # Create message
         message = MIMEMultipart("alternative")
@@ -171,7 +201,7 @@ class EmailService:
                 </div>
                 
                 <div style="text-align: center; margin: 30px 0;">
-                    <a href="{self.frontend_url}/login" 
+                    <a href="{login_url}" 
                        style="background: #4f46e5; color: white; padding: 15px 30px; text-decoration: none; 
                               border-radius: 5px; font-weight: bold; font-size: 16px; display: inline-block;
                               box-shadow: 0 4px 6px rgba(79, 70, 229, 0.3);">
@@ -215,7 +245,7 @@ class EmailService:
         Temporary Password: {temp_password}
         Role: {role.title()}
         
-        Login URL: {self.frontend_url}/login
+        Login URL: {login_url}
         
         Security Reminder: Please change your password after your first login for security purposes.
         
@@ -232,17 +262,10 @@ class EmailService:
 
         # Send email
         try:
-            await aiosmtplib.send(
-                message,
-                hostname=self.smtp_server,
-                port=self.smtp_port,
-                start_tls=True,
-                username=self.smtp_username,
-                password=self.smtp_password,
-            )
+            await self._send(message, "welcome")
             return True
         except Exception as e:
-            print(f"Failed to send welcome email: {e}")
+            logger.warning("Email send failed", extra={"email": "welcome", "error": str(e), "rate_key": "welcome"})
             return False
 
 # Create global instance
@@ -0,0 +1,50 @@
+"""
+Weak ETags for conditional GETs.
+
+An ETag is derived from the tenant, the query string, the caller's scope
+(usually the user id) and the stored data versions of the tables the response
+is built from, so it can be checked with one small query before the route runs
+its own queries or serializes anything. A matching If-None-Match is answered with 304. The tags
+are weak because compression changes the bytes but not the representation.
+"""
+
+import hashlib
+
+from fastapi import HTTPException
+
+import data_version
+import database
+
+# Revalidate on every use, and never store the (per-user) body in shared caches
+CACHE_CONTROL = "private, no-cache"
+
+# Bump when the JSON shape of a response changes, so clients drop their cached bodies
+REPRESENTATION_VERSION = 1
+
+
+def make_etag(*parts):
+    digest = hashlib.blake2b(repr((REPRESENTATION_VERSION,) + parts).encode(), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def check(request, response, db, tables, *scope):
+    """Raise 304 if the client's copy is current; otherwise set ETag on the response."""
+    versions = data_version.stored(db, tables)
+    if versions is None:
+        return
+    # The query string is included because it can change the shape (e.g. ?shape=normalized)
+    etag = make_etag(database.current_tenant.get(), request.url.query, scope, tuple(tables), versions)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
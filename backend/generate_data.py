@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+High-volume synthetic data generator for the Feedback System.
+Builds realistic organization trees, feedback, tags and feedback requests at
+millions of rows for benchmarks and load tests.
+
+Rows are written with Core executemany in large batches, every user shares a
+single pre-computed password hash, and secondary indexes are dropped during
+the load and rebuilt afterwards. The same --seed always produces the same data.
+"""
+
+import argparse
+import random
+from collections import deque
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, text
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import database
+import models
+
+DEFAULT_PASSWORD = "password123"
+EMAIL_DOMAIN = "company.example.com"
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jamal", "Kira", "Liam",
+    "Maya", "Nikhil", "Olga", "Pedro", "Quinn", "Rosa", "Sven", "Tara", "Umar", "Vera", "Wei", "Ximena",
+    "Yusuf", "Zoe", "Amara", "Bruno", "Chen", "Dana", "Emeka", "Fatima", "Gustavo", "Hana", "Ivan", "Julia",
+]
+LAST_NAMES = [
+    "Anderson", "Bauer", "Costa", "Dubois", "Eriksen", "Fernandez", "Garcia", "Hansen", "Ito", "Jensen",
+    "Kowalski", "Lopez", "Murphy", "Nakamura", "Okafor", "Patel", "Quinn", "Rossi", "Schmidt", "Tanaka",
+    "Usman", "Vargas", "Wang", "Xu", "Yilmaz", "Zhang", "Ahmed", "Brown", "Chopra", "Diaz", "Evans", "Fischer",
+]
+TAGS = [
+    ("Communication", "#3B82F6"), ("Leadership", "#10B981"), ("Technical Skills", "#8B5CF6"),
+    ("Teamwork", "#F59E0B"), ("Problem Solving", "#EF4444"), ("Time Management", "#6B7280"),
+    ("Ownership", "#0EA5E9"), ("Mentoring", "#14B8A6"), ("Customer Focus", "#F97316"),
+    ("Code Quality", "#A855F7"), ("Planning", "#84CC16"), ("Initiative", "#EC4899"),
+]
+STRENGTHS = [
+    "Consistently delivers well-tested work ahead of deadlines.",
+    "Explains complex ideas clearly in design reviews.",
+    "Takes ownership of production incidents and follows through.",
+    "Mentors newer teammates patiently and generously.",
+    "Keeps stakeholders informed with concise status updates.",
+    "Finds pragmatic solutions when requirements are ambiguous.",
+]
+IMPROVEMENTS = [
+    "Share progress earlier so blockers surface sooner.",
+    "Delegate more of the routine work to grow the team.",
+    "Write down decisions so others can follow the reasoning.",
+    "Push back on scope creep before committing to dates.",
+    "Spend more time reviewing teammates' pull requests.",
+    "Break large changes into smaller, reviewable pieces.",
+]
+REQUEST_MESSAGES = [
+    "Could you share feedback on my last project?",
+    "I'd appreciate feedback on how I ran the planning meeting.",
+    "Any thoughts on my presentation to the leadership team?",
+    "How did my on-call rotation go from your perspective?",
+]
+SENTIMENT_WEIGHTS = (("positive", 0.6), ("neutral", 0.3), ("negative", 0.1))
+
+
+class DatabaseNotEmpty(RuntimeError):
+    """generate() was pointed at a database that already has users."""
+
+
+def secondary_indexes():
+    """Every non-primary-key index declared on the models."""
+    return [index for table in database.Base.metadata.sorted_tables for index in table.indexes]
+
+
+def build_org_tree(rng, employee_count, span):
+    """Return (managers, employees) as lists of (id, manager_id) pairs.
+
+    Employees are split into teams of roughly `span` people, each led by a
+    manager; managers are grouped the same way level by level until a single
+    executive remains, so a small span produces a deep tree.
+    """
+    def chunk(ids):
+        groups, start = [], 0
+        while start < len(ids):
+            size = max(1, rng.randint(max(1, span // 2), span + span // 2))
+            groups.append(ids[start:start + size])
+            start += size
+        return groups
+
+    next_id = 1
+    managers, employees = [], []
+    employee_teams = chunk(list(range(employee_count)))
+
+    # Leaf managers lead the employee teams
+    leaf_ids = list(range(next_id, next_id + len(employee_teams)))
+    next_id += len(leaf_ids)
+    employee_ids = iter(range(next_id, next_id + employee_count))
+    next_id += employee_count
+    for manager_id, team in zip(leaf_ids, employee_teams):
+        for _ in team:
+            employees.append((next(employee_ids), manager_id))
+
+    level = leaf_ids
+    while len(level) > 1:
+        groups = chunk(level)
+        parents = list(range(next_id, next_id + len(groups)))
+        next_id += len(parents)
+        for parent_id, group in zip(parents, groups):
+            for manager_id in group:
+                managers.append((manager_id, parent_id))
+        level = parents
+    managers.append((level[0], None))
+
+    # Renumber breadth-first from the executive so every manager_id refers to an earlier row
+    children = {}
+    for user_id, manager_id in managers + employees:
+        children.setdefault(manager_id, []).append(user_id)
+    order, queue = {}, deque([level[0]])
+    while queue:
+        user_id = queue.popleft()
+        order[user_id] = len(order) + 1
+        queue.extend(children.get(user_id, ()))
+    managers = [(order[user_id], order.get(manager_id)) for user_id, manager_id in managers]
+    employees = [(order[user_id], order[manager_id]) for user_id, manager_id in employees]
+    return managers, employees
+
+
+def generate(engine, feedback_count, span=8, feedback_per_employee=20, request_ratio=0.1,
+             batch_size=10_000, seed=42, password_hash=None, verbose=True):
+    """Populate an empty database; returns row counts per table."""
+    rng = random.Random(seed)
+    log = print if verbose else (lambda *args, **kwargs: None)
+    database.Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as connection:
+        if connection.execute(select(func.count()).select_from(models.User.__table__)).scalar():
+            raise DatabaseNotEmpty("Database already contains users; generate into an empty database")
+
+    if password_hash is None:
+        import passwords
+
+        password_hash = passwords.hash_password(DEFAULT_PASSWORD)
+
+    employee_count = max(span, feedback_count // max(1, feedback_per_employee))
+    managers, employees = build_org_tree(rng, employee_count, span)
+    now = datetime.utcnow()
+    counts = {}
+
+    with engine.connect() as connection:
+        # Bulk-load settings for this connection only
+        connection.execute(text("PRAGMA synchronous=OFF"))
+        connection.execute(text("PRAGMA cache_size=-262144"))
+
+        indexes = secondary_indexes()
+        for index in indexes:
+            index.drop(bind=connection, checkfirst=True)
+        connection.commit()
+
+        def write(table, rows, label, after_batch=None):
+            started, total, batch = time.perf_counter(), 0, []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    connection.execute(insert(table), batch)
+                    total += len(batch)
+                    batch = []
+                    if after_batch:
+                        after_batch()
+            if batch:
+                connection.execute(insert(table), batch)
+                total += len(batch)
+                if after_batch:
+                    after_batch()
+            connection.commit()
+            counts[label] = total
+            log(f"   ✅ {label}: {total:,} rows ({time.perf_counter() - started:.1f}s)")
+
+        def user_rows():
+            for user_id, manager_id in sorted(managers + employees):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                yield {
+                    "id": user_id,
+                    "email": f"{first}.{last}.{user_id}@{EMAIL_DOMAIN}".lower(),
+                    "hashed_password": password_hash,
+                    "full_name": f"{first} {last}",
+                    "role": "employee" if user_id in employee_managers else "manager",
+                    "manager_id": manager_id,
+                    "is_verified": True,
+                    "created_at": now - timedelta(days=rng.randint(30, 3650)),
+                }
+
+        employee_managers = dict(employees)
+        employee_ids = list(employee_managers)
+        sentiments = [name for name, _ in SENTIMENT_WEIGHTS]
+        sentiment_weights = [weight for _, weight in SENTIMENT_WEIGHTS]
+        feedback_tag_rows = []
+
+        def feedback_rows():
+            for feedback_id in range(1, feedback_count + 1):
+                employee_id = rng.choice(employee_ids)
+                created_at = now - timedelta(minutes=rng.randint(0, 2 * 525_600))
+                acknowledged = rng.random() < (0.9 if (now - created_at).days > 14 else 0.3)
+                for tag_id in rng.sample(range(1, len(TAGS) + 1), rng.choices((0, 1, 2, 3), (2, 4, 3, 1))[0]):
+                    feedback_tag_rows.append({"feedback_id": feedback_id, "tag_id": tag_id})
+                yield {
+                    "id": feedback_id,
+                    "manager_id": employee_managers[employee_id],
+                    "employee_id": employee_id,
+                    "strengths": rng.choice(STRENGTHS),
+                    "areas_to_improve": rng.choice(IMPROVEMENTS),
+                    "sentiment": rng.choices(sentiments, sentiment_weights)[0],
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                    "acknowledged": acknowledged,
+                    "acknowledged_at": created_at + timedelta(days=rng.randint(0, 14)) if acknowledged else None,
+                }
+
+        def flush_feedback_tags():
+            # Tag links are collected while a feedback batch is generated and written right after it
+            if feedback_tag_rows:
+                connection.execute(insert(models.feedback_tags), feedback_tag_rows)
+                counts["feedback_tags"] = counts.get("feedback_tags", 0) + len(feedback_tag_rows)
+                feedback_tag_rows.clear()
+
+        def request_rows():
+            for _ in range(int(feedback_count * request_ratio)):
+                employee_id = rng.choice(employee_ids)
+                message = rng.choice(REQUEST_MESSAGES)
+                status = rng.choices(("pending", "completed", "declined"), (3, 6, 1))[0]
+                created_at = now - timedelta(minutes=rng.randint(0, 525_600))
+                yield {
+                    "employee_id": employee_id,
+                    "manager_id": employee_managers[employee_id],
+                    "message": message,
+                    "status": status,
+                    "created_at": created_at,
+                    "responded_at": None if status == "pending" else created_at + timedelta(hours=rng.randint(1, 240)),
+                }
+
+        log(f"🌱 Generating {len(managers):,} managers, {len(employees):,} employees, {feedback_count:,} feedback...")
+        write(models.User.__table__, user_rows(), "users")
+        write(models.Tag.__table__, ({"id": i + 1, "name": name, "color": color}
+                                     for i, (name, color) in enumerate(TAGS)), "tags")
+        write(models.Feedback.__table__, feedback_rows(), "feedback", after_batch=flush_feedback_tags)
+        log(f"   ✅ feedback_tags: {counts.get('feedback_tags', 0):,} rows")
+        write(models.FeedbackRequest.__table__, request_rows(), "feedback_requests")
+
+        log("🔧 Building indexes...")
+        started = time.perf_counter()
+        for index in indexes:
+            index.create(bind=connection)
+        connection.execute(text("ANALYZE"))
+        database.set_schema_version(connection)
+        connection.commit()
+        log(f"   ✅ {len(indexes)} indexes built ({time.perf_counter() - started:.1f}s)")
+
+        connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+
+    counts["managers"] = len(managers)
+    counts["employees"] = len(employees)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a large synthetic Feedback System database.")
+    parser.add_argument("--feedback", type=int, default=100_000, help="Feedback rows to generate")
+    parser.add_argument("--span", type=int, default=8, help="Average team size; small values make deep org trees")
+    parser.add_argument("--feedback-per-employee", type=int, default=20)
+    parser.add_argument("--request-ratio", type=float, default=0.1, help="Feedback requests per feedback row")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; the same seed reproduces the same data")
+    args = parser.parse_args()
+
+    from init_db import show_database_info, test_database_connection
+
+    print("🚀 Feedback System Data Generator")
+    print("=" * 40)
+
+    if not test_database_connection():
+        print("❌ Cannot proceed without database connection.")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    try:
+        generate(database.engine, args.feedback, span=args.span, feedback_per_employee=args.feedback_per_employee,
+                 request_ratio=args.request_ratio, batch_size=args.batch_size, seed=args.seed)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    show_database_info()
+    print(f"\n🎉 Data generated in {time.perf_counter() - started:.1f}s")
+    print(f"   All users can log in with password: {DEFAULT_PASSWORD}")
@@ -0,0 +1,286 @@
+"""
+Idempotency keys for create routes.
+
+A client that times out while its write waits for the database write lock
+retries, and without a key the retry creates a second row. Requests that carry
+an Idempotency-Key header are recorded in a small SQLite store next to the
+database, as (principal, key, request hash, response) with a TTL:
+
+- the first request runs and its response is stored (5xx responses are not,
+  so a shed or failed request can be retried)
+- a replay (same principal, key and request) is answered from the store with
+  Idempotent-Replayed: true, without reaching the route or the write lock
+- a duplicate arriving while the first still runs waits for its result, on the
+  event loop within a process and by polling the store across workers
+- reusing a key for a different request is rejected with 422
+
+The principal is the tenant and user id from the bearer token, so keys of
+different users never collide. Routes opt in with @idempotent, applied below
+the route decorator like @sql_budget.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+import metrics
+import route_match
+
+# Load environment variables
+load_dotenv()
+
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_STORE = os.getenv("IDEMPOTENCY_STORE")
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a duplicate waits for the first request before getting 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+# A key whose first request never finished (worker killed) can be reused after this long
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "120"))
+
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.05
+PURGE_INTERVAL_SECONDS = 60
+
+idempotency_requests = metrics.Counter(
+    "idempotency_requests_total",
+    "Requests with an Idempotency-Key by outcome (executed, replayed, mismatch, conflict)",
+    ["route", "outcome"],
+)
+
+
+def idempotent(func):
+    """Honour Idempotency-Key headers on this POST route; apply below the route decorator."""
+    func.idempotent = True
+    return func
+
+
+def store_path_for(database_url):
+    """Default store location: next to the SQLite database, or the working directory."""
+    if IDEMPOTENCY_STORE:
+        return IDEMPOTENCY_STORE
+    path = database_url.split(":///", 1)[-1] if database_url.startswith("sqlite") else ""
+    if not path or path == ":memory:":
+        return "idempotency.db"
+    return f"{os.path.abspath(path)}.idempotency"
+
+
+class Store:
+    """Stored responses by (principal, key); one connection per process, shared by threads."""
+
+    def __init__(self, path, ttl=IDEMPOTENCY_TTL_SECONDS, lock_seconds=IDEMPOTENCY_LOCK_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._purged = 0.0
+
+    def _connect(self):
+        # sqlite3 connections must not cross a fork, so each worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS idempotency_keys (
+                    principal TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    request_hash TEXT NOT NULL,
+                    status INTEGER,
+                    headers TEXT,
+                    body BLOB,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (principal, key)
+                ) WITHOUT ROWID
+            """)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def reserve(self, principal, key, request_hash):
+        """Claim a key for a new request.
+
+        Returns ("reserved", None), ("replay", (status, headers, body)), ("pending", None)
+        while another request holds the key, or ("mismatch", None)."""
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if now - self._purged > PURGE_INTERVAL_SECONDS:
+                    connection.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+                    self._purged = now
+                row = connection.execute(
+                    "SELECT request_hash, status, headers, body FROM idempotency_keys "
+                    "WHERE principal = ? AND key = ? AND expires_at > ?",
+                    (principal, key, now),
+                ).fetchone()
+                if row is None:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO idempotency_keys (principal, key, request_hash, expires_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        (principal, key, request_hash, now + self.lock_seconds),
+                    )
+                    result = ("reserved", None)
+                elif row[0] != request_hash:
+                    result = ("mismatch", None)
+                elif row[1] is None:
+                    result = ("pending", None)
+                else:
+                    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(row[2])]
+                    result = ("replay", (row[1], headers, row[3]))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return result
+
+    def complete(self, principal, key, status, headers, body):
+        encoded = json.dumps([(name.decode("latin-1"), value.decode("latin-1")) for name, value in headers])
+        with self._lock:
+            self._connect().execute(
+                "UPDATE idempotency_keys SET status = ?, headers = ?, body = ?, expires_at = ? "
+                "WHERE principal = ? AND key = ?",
+                (status, encoded, body, time.time() + self.ttl, principal, key),
+            )
+
+    def release(self, principal, key):
+        """Forget a key whose request failed, so a retry runs again."""
+        with self._lock:
+            self._connect().execute(
+                "DELETE FROM idempotency_keys WHERE principal = ? AND key = ? AND status IS NULL", (principal, key)
+            )
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware that runs each (principal, Idempotency-Key) of a POST route once."""
+
+    def __init__(self, app, router, principal, store, wait_seconds=IDEMPOTENCY_WAIT_SECONDS):
+        self.app = app
+        self.router = router
+        # Maps request headers to "tenant:user id", or None when the request is not authenticated
+        self.principal = principal
+        self.store = store
+        self.wait_seconds = wait_seconds
+        self.flights = {}
+
+    async def __call__(self, scope, receive, send):
+        route = None
+        if scope["type"] == "http" and scope["method"] == "POST":
+            route = route_match.route_for(self.router, scope)
+        if route is None or not getattr(route.endpoint, "idempotent", False):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        principal = self.principal(headers) if key is not None else None
+        if principal is None:
+            # No key, or unauthenticated (the route rejects it)
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await self._error(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        body = await self._read_body(receive)
+        request_hash = hashlib.blake2b(
+            b"\0".join((scope["method"].encode(), scope["path"].encode(), scope["query_string"], body)), digest_size=16
+        ).hexdigest()
+        label = route.endpoint.__name__
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            # Duplicates in this process wait for the first one instead of polling the store
+            flight = self.flights.get((principal, key))
+            if flight is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(flight), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    break
+                continue
+
+            flight = self.flights[(principal, key)] = asyncio.get_running_loop().create_future()
+            try:
+                outcome, record = await run_in_threadpool(self.store.reserve, principal, key, request_hash)
+                if outcome == "reserved":
+                    idempotency_requests.inc(route=label, outcome="executed")
+                    await self._execute(scope, body, receive, send, principal, key)
+                    return
+            finally:
+                del self.flights[(principal, key)]
+                flight.set_result(None)
+            if outcome == "replay":
+                idempotency_requests.inc(route=label, outcome="replayed")
+                await self._replay(send, *record)
+                return
+            if outcome == "mismatch":
+                idempotency_requests.inc(route=label, outcome="mismatch")
+                await self._error(send, 422, "Idempotency-Key was already used for a different request")
+                return
+            # Pending in another worker process
+            if time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(POLL_SECONDS)
+
+        idempotency_requests.inc(route=label, outcome="conflict")
+        await self._error(send, 409, "A request with this Idempotency-Key is still being processed", retry_after=1)
+
+    async def _read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _execute(self, scope, body, receive, send, principal, key):
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def replay_receive():
+            # The body was read to hash it; hand it to the app, then pass through (disconnects)
+            return pending.pop() if pending else await receive()
+
+        response = {"status": None, "headers": [], "body": []}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        except BaseException:
+            await run_in_threadpool(self.store.release, principal, key)
+            raise
+        if response["status"] is not None and response["status"] < 500:
+            await run_in_threadpool(
+                self.store.complete, principal, key, response["status"], response["headers"], b"".join(response["body"])
+            )
+        else:
+            await run_in_threadpool(self.store.release, principal, key)
+
+    async def _replay(self, send, status, headers, body):
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [*headers, (b"idempotent-replayed", b"true")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _error(self, send, status, detail, retry_after=None):
+        body = json.dumps({"detail": detail}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -8,34 +8,91 @@ import sys
 import os
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from passlib.context import CryptContext
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import database
+import migrations
 import models
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+import passwords
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return passwords.hash_password(password)
+
+DEMO_PASSWORD = "password123"
+
+DEFAULT_TAGS = [
+    ("Communication", "#3B82F6"),
+    ("Leadership", "#10B981"),
+    ("Technical Skills", "#8B5CF6"),
+    ("Teamwork", "#F59E0B"),
+    ("Problem Solving", "#EF4444"),
+    ("Time Management", "#6B7280"),
+]
+
+def seed_sample_data(db):
+    """Add the demo accounts and default tags to an empty database."""
+    # The demo accounts share a password, so hash it once
+    hashed_password = get_password_hash(DEMO_PASSWORD)
+
+    # Create sample manager
+    manager = models.User(
+        email="manager@company.com",
+        hashed_password=hashed_password,
+        full_name="John Manager",
+        role="manager",
+        is_verified=True  # Demo users are pre-verified
+    )
+    db.add(manager)
+    db.flush()  # Flush to get the ID
 
-def init_database():
-    """Initialize the database with tables and sample data."""
-    print("🔧 Initializing database...")
+    # Create sample employees
+    for email, full_name in (("employee1@company.com", "Alice Employee"), ("employee2@company.com", "Bob Employee")):
+        db.add(models.User(
+            email=email,
+            hashed_password=hashed_password,
+            full_name=full_name,
+            role="employee",
+            manager_id=manager.id,
+            is_verified=True
+        ))
+
+    # Create default tags
+    for name, color in DEFAULT_TAGS:
+        db.add(models.Tag(name=name, color=color))
+
+    db.commit()
+
+def init_database(tenant_name=None):
+    """Initialize the database (or a tenant's database) with tables and sample data."""
+    print(f"🔧 Initializing database{f' for tenant {tenant_name}' if tenant_name else ''}...")
     
-    # Create all tables
+    # Create the tables of a new database, or migrate an existing one, to the schema version checked at startup
     try:
-        models.Base.metadata.create_all(bind=database.engine)
-        print("✅ Database tables created successfully!")
+        if tenant_name and tenant_name in database.tenant_names():
+            # Opened directly: the registry refuses a tenant database with an old schema
+            existing = database.open_tenant(tenant_name)
+            try:
+                applied = migrations.prepare(existing)
+            finally:
+                existing.close()
+            tenant = database.tenants.get(tenant_name)
+        elif tenant_name:
+            tenant = database.tenants.provision(tenant_name)
+            applied = []
+        else:
+            tenant = database.tenants.default
+            applied = migrations.prepare(tenant)
+        if applied:
+            print(f"✅ Applied migrations {', '.join(map(str, applied))} to the existing database")
+        print(f"✅ Database tables ready! (schema version {database.SCHEMA_VERSION})")
     except Exception as e:
         print(f"❌ Error creating tables: {e}")
         return False
     
     # Create a session
-    db = database.SessionLocal()
+    db = tenant.SessionLocal()
     
     try:
         # Check if data already exists
@@ -44,58 +101,14 @@ def init_database():
             print(f"📊 Database already has {existing_users} users. Skipping sample data creation.")
             return True
         
-        print("👤 Creating sample users...")
-        
-        # Create sample manager
-        manager = models.User(
-            email="manager@company.com",
-            hashed_password=get_password_hash("password123"),
-            full_name="John Manager",
-            role="manager"
-        )
-        db.add(manager)
-        db.flush()  # Flush to get the ID
-        
-        # Create sample employees
-        employee1 = models.User(
-            email="employee1@company.com",
-            hashed_password=get_password_hash("password123"),
-            full_name="Alice Employee",
-            role="employee",
-            manager_id=manager.id
-        )
-        employee2 = models.User(
-            email="employee2@company.com",
-            hashed_password=get_password_hash("password123"),
-            full_name="Bob Employee",
-            role="employee",
-            manager_id=manager.id
-        )
-        db.add(employee1)
-        db.add(employee2)
-        
-        print("🏷️  Creating default tags...")
-        
-        # Create default tags
-        default_tags = [
-            models.Tag(name="Communication", color="#3B82F6"),
-            models.Tag(name="Leadership", color="#10B981"),
-            models.Tag(name="Technical Skills", color="#8B5CF6"),
-            models.Tag(name="Teamwork", color="#F59E0B"),
-            models.Tag(name="Problem Solving", color="#EF4444"),
-            models.Tag(name="Time Management", color="#6B7280")
-        ]
-        for tag in default_tags:
-            db.add(tag)
-        
-        # Commit all changes
-        db.commit()
+        print("👤 Creating sample users and default tags...")
+        seed_sample_data(db)
         
         print("✅ Sample data created successfully!")
         print("\n📋 Demo Accounts:")
-        print("   Manager: manager@company.com / password123")
-        print("   Employee 1: employee1@company.com / password123")
-        print("   Employee 2: employee2@company.com / password123")
+        print(f"   Manager: manager@company.com / {DEMO_PASSWORD}")
+        print(f"   Employee 1: employee1@company.com / {DEMO_PASSWORD}")
+        print(f"   Employee 2: employee2@company.com / {DEMO_PASSWORD}")
         
         return True
         
@@ -147,6 +160,12 @@ def show_database_info():
         db.close()
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create the Feedback System database and demo data.")
+    parser.add_argument("--tenant", default=None, help="Create the database of this tenant in TENANT_DB_DIR")
+    args = parser.parse_args()
+
     print("🚀 Feedback System Database Setup")
     print("=" * 40)
     
@@ -156,8 +175,9 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # Initialize database
-    if init_database():
-        show_database_info()
+    if init_database(args.tenant):
+        if not args.tenant:
+            show_database_info()
         print("\n🎉 Database setup completed successfully!")
         print("You can now start the FastAPI server with: uvicorn main:app --reload")
     else:
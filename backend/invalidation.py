@@ -0,0 +1,196 @@
+"""
+Cross-process cache invalidation.
+
+In-process caches (the revocation Bloom filters, reused single-flight
+responses) only see the writes of their own worker. No extra service is
+needed to hear about the others: every write already bumps its table's row
+of data_versions in the same transaction (models.install_version_triggers),
+so the database is the channel. Each worker keeps one plain sqlite3
+connection per open tenant database and polls it with PRAGMA data_version,
+which changes only when another connection (any worker, this one included)
+committed. Only then is data_versions read, and the subscribers of the tables
+whose version moved are notified:
+
+    invalidation.bus.subscribe(["tags"], drop_tags)   # drop_tags(tenant_name, tables)
+
+Callbacks run on the event loop; a callback may be a coroutine function, for
+work that belongs in the threadpool. Commits are delivered within
+INVALIDATION_POLL_MS. An idle poll is one PRAGMA per open tenant and uses
+none of the engines' pooled connections.
+"""
+
+import asyncio
+import inspect
+import os
+import sqlite3
+import threading
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+import app_log
+import database
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+logger = app_log.get_logger(__name__)
+
+INVALIDATION_ENABLED = os.getenv("INVALIDATION_ENABLED", "true").lower() == "true"
+INVALIDATION_POLL_MS = float(os.getenv("INVALIDATION_POLL_MS", "200"))
+
+invalidations = metrics.Counter(
+    "cache_invalidations_total", "Committed table changes delivered to cache subscribers", ["table"]
+)
+
+
+class Watcher:
+    """A connection to one tenant database that reports which tables changed since it last looked."""
+
+    def __init__(self, path, versions=None):
+        self.connection = sqlite3.connect(path, timeout=1, check_same_thread=False)
+        if versions is None:
+            self.data_version = self._data_version()
+            self.versions = self._versions()
+        else:
+            # Versions seen before the tenant was evicted and reopened: the first poll compares
+            # against them, so changes made in between are still reported
+            self.data_version = None
+            self.versions = versions
+
+    def _data_version(self):
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def _versions(self):
+        return dict(self.connection.execute("SELECT table_name, version FROM data_versions"))
+
+    def poll(self):
+        """Tables whose version changed since the last poll."""
+        data_version = self._data_version()
+        if data_version == self.data_version:
+            return set()
+        # A commit between the two reads is reported now, and the next poll finds nothing new
+        self.data_version = data_version
+        versions = self._versions()
+        changed = {table for table, version in versions.items() if self.versions.get(table) != version}
+        self.versions = versions
+        return changed
+
+    def close(self):
+        self.connection.close()
+
+
+def database_path(tenant):
+    """File of a tenant's SQLite database, or None when it has none to watch."""
+    url = tenant.engine.url
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    return os.path.abspath(url.database)
+
+
+class InvalidationBus:
+    """Polls every open tenant database on a background asyncio task and notifies subscribers."""
+
+    def __init__(self, interval=INVALIDATION_POLL_MS / 1000):
+        self.interval = interval
+        self._subscribers = []
+        # tenant name -> (engine, Watcher) of the open tenants
+        self._watchers = {}
+        # tenant name -> versions last seen, kept after the tenant's engine is evicted
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._task = None
+
+    def subscribe(self, tables, callback):
+        """Call callback(tenant_name, changed_tables) after a commit that wrote one of tables."""
+        self._subscribers.append((frozenset(tables), callback))
+
+    def poll(self):
+        """{tenant name: changed tables} across the open tenants; blocking, so run in the threadpool."""
+        with self._lock:
+            open_tenants = {tenant.name: tenant for tenant in database.tenants.all()}
+            for name in set(self._watchers) - set(open_tenants):
+                self._close(name)
+            changes = {}
+            seen = {}
+            for name, tenant in open_tenants.items():
+                try:
+                    changed, versions = self._poll(name, tenant)
+                except Exception as e:
+                    # Reopened on the next poll and compared with the versions seen before,
+                    # so this tenant's changes are reported then; the others go ahead now
+                    self._close(name)
+                    logger.warning("Invalidation poll failed", extra={"tenant": name, "error": str(e), "rate_key": name})
+                    continue
+                if versions is not None:
+                    seen[name] = versions
+                if changed:
+                    changes[name] = changed
+            self._seen.update(seen)
+            return changes
+
+    def _poll(self, name, tenant):
+        """(changed tables, versions now seen) of one tenant; versions are None when it isn't watched."""
+        entry = self._watchers.get(name)
+        if entry is not None and entry[0] is not tenant.engine:
+            # Evicted and reopened since the last poll
+            self._close(name)
+            entry = None
+        if entry is None:
+            path = database_path(tenant)
+            if path is None:
+                return set(), None
+            entry = self._watchers[name] = (tenant.engine, Watcher(path, self._seen.get(name)))
+        changed = entry[1].poll()
+        return changed, entry[1].versions
+
+    def _close(self, name):
+        # A watcher that failed to open was never registered
+        entry = self._watchers.pop(name, None)
+        if entry is not None:
+            entry[1].close()
+
+    async def publish(self, changes):
+        for name, tables in changes.items():
+            for table in tables:
+                invalidations.inc(table=table)
+            for scopes, callback in list(self._subscribers):
+                hit = scopes & tables
+                if not hit:
+                    continue
+                try:
+                    result = callback(name, hit)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    logger.exception("Cache invalidation callback failed", extra={"tenant": name, "tables": sorted(hit)})
+
+    async def _run(self):
+        while True:
+            try:
+                changes = await run_in_threadpool(self.poll)
+                if changes:
+                    await self.publish(changes)
+            except Exception:
+                logger.exception("Invalidation poll failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._lock:
+            for name in list(self._watchers):
+                self._close(name)
+
+
+bus = InvalidationBus()
@@ -1,40 +1,67 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import OperationalError
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
+from typing import Literal, Optional, Union
+import hmac
 import jwt
 import os
 import secrets
 import time
-import threading
-from passlib.context import CryptContext
 from dotenv import load_dotenv
+import admission
+import app_log
+import backup
+import coalescing
+import compression
 import database
+import etags
+import idempotency
+import invalidation
+import maintenance
+import metrics
+import migrations
 import models
+import passwords
+import profiling
+import revocation
 import schemas
+import serialization
+import tracing
+import user_search
+import write_lock
+from coalescing import single_flight
 from email_service import email_service
+from idempotency import idempotent
+from sql_budget import sql_budget
 
 # Load environment variables
 load_dotenv()
 
-# Global lock for database operations
-db_lock = threading.Lock()
+logger = app_log.get_logger(__name__)
 
-# Simple retry decorator with global lock
+# Simple retry decorator holding the database write lock, which every worker process shares
+# through a lock file (see write_lock.py); each tenant database has its own
 def retry_db_operation(max_retries=3, delay=0.1):
     def decorator(func):
         def wrapper(*args, **kwargs):
             last_exception = None
             for attempt in range(max_retries):
                 try:
-                    with db_lock:  # Use global lock to serialize database operations
+                    wait_start = time.perf_counter()
+                    with database.get_tenant().write_lock:  # Serialize writes to this tenant's database
+                        metrics.db_lock_wait.observe(time.perf_counter() - wait_start, operation=func.__name__)
                         return func(*args, **kwargs)
                 except (OperationalError, Exception) as e:
                     last_exception = e
                     if ("database is locked" in str(e) or "timeout" in str(e).lower()) and attempt < max_retries - 1:
+                        metrics.db_retries.inc(operation=func.__name__)
                         time.sleep(delay * (2 ** attempt))  # Exponential backoff
                         continue
                     raise e
@@ -42,65 +69,78 @@ def retry_db_operation(max_retries=3, delay=0.1):
         return wrapper
     return decorator
 
+# "production" only checks the schema version at startup; "development" also creates or migrates the database and adds demo data
+STARTUP_MODE = os.getenv("STARTUP_MODE", "production" if os.getenv("ENVIRONMENT") == "production" else "development")
+
+def check_schema_version():
+    """Fail fast if the database was not initialized or migrated for this release (one cheap query)."""
+    with database.engine.connect() as connection:
+        version = database.get_schema_version(connection)
+    if version < database.SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is older than {database.SCHEMA_VERSION}; "
+            "run `python init_db.py` (new database) or `python migrate_db.py` before starting the server"
+        )
+
+def prepare_development_database():
+    """Create or migrate the database and add demo data so a fresh checkout runs without setup."""
+    # Workers starting together must not both migrate or seed the database
+    with write_lock.WriteLock(write_lock.lock_file_for(database.SQLALCHEMY_DATABASE_URL, "startup")):
+        applied = migrations.prepare(database.tenants.default)
+        if applied:
+            logger.info("Applied schema migrations", extra={"versions": applied})
+        with database.tenants.default.write_lock:
+            db = database.SessionLocal()
+            try:
+                if not db.query(models.User).first():
+                    from init_db import seed_sample_data
+
+                    seed_sample_data(db)
+            finally:
+                db.close()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    database.Base.metadata.create_all(bind=database.engine)
-    # Create sample users if they don't exist
-    db = database.SessionLocal()
-    try:
-        if not db.query(models.User).first():
-            # Create sample manager
-            manager = models.User(
-                email="manager@company.com",
-                hashed_password=get_password_hash("password123"),
-                full_name="John Manager",
-                role="manager",
-                is_verified=True  # Demo users are pre-verified
-            )
-            db.add(manager)
-            
-            # Create sample employees
-            employee1 = models.User(
-                email="employee1@company.com",
-                hashed_password=get_password_hash("password123"),
-                full_name="Alice Employee",
-                role="employee",
-                manager_id=1,
-                is_verified=True  # Demo users are pre-verified
-            )
-            employee2 = models.User(
-                email="employee2@company.com",
-                hashed_password=get_password_hash("password123"),
-                full_name="Bob Employee",
-                role="employee",
-                manager_id=1,
-                is_verified=True  # Demo users are pre-verified
-            )
-            db.add(employee1)
-            db.add(employee2)
-            
-            # Create default tags
-            default_tags = [
-                models.Tag(name="Communication", color="#3B82F6"),
-                models.Tag(name="Leadership", color="#10B981"),
-                models.Tag(name="Technical Skills", color="#8B5CF6"),
-                models.Tag(name="Teamwork", color="#F59E0B"),
-                models.Tag(name="Problem Solving", color="#EF4444"),
-                models.Tag(name="Time Management", color="#6B7280")
-            ]
-            for tag in default_tags:
-                db.add(tag)
-            
-            db.commit()
-    finally:
-        db.close()
+    if STARTUP_MODE == "production":
+        check_schema_version()
+    else:
+        prepare_development_database()
+    # WAL checkpoints, ANALYZE/optimize and expired token purging in the background
+    scheduler = maintenance.MaintenanceScheduler()
+    scheduler.start()
+    # Bloom filters of revoked tokens, so requests only query revoked_tokens on a filter hit
+    refresher = revocation.RevocationRefresher()
+    refresher.start()
+    # Tells this worker's caches about writes committed by the others
+    if invalidation.INVALIDATION_ENABLED:
+        invalidation.bus.start()
     
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    await invalidation.bus.stop()
+    await refresher.stop()
+    await scheduler.stop()
 
 app = FastAPI(title="Feedback System API", version="1.0.0", lifespan=lifespan)
 
+# Queue or shed mutating requests before a busy database ties up the threadpool
+if admission.ADMISSION_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware, router=app.router)
+
+# Retried creates with the same Idempotency-Key run once (request_principal is defined below)
+if idempotency.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        idempotency.IdempotencyMiddleware,
+        router=app.router,
+        principal=lambda headers: request_principal(headers),
+        store=idempotency.Store(idempotency.store_path_for(database.SQLALCHEMY_DATABASE_URL)),
+    )
+
+# Identical concurrent reads of expensive routes share one response (tenant_name is defined below)
+if coalescing.SINGLE_FLIGHT_ENABLED:
+    app.add_middleware(coalescing.SingleFlightMiddleware, router=app.router, tenant_name=lambda headers: tenant_name(headers))
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -108,37 +148,107 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed", "X-Request-ID"],
 )
 
+# Compress large JSON bodies (brotli when installed, else gzip)
+if compression.COMPRESSION_ENABLED:
+    app.add_middleware(compression.CompressionMiddleware)
+
+# Request latency and per-request SQL metrics, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Opt-in per-request profiling (X-Profile-Token header or PROFILE_SAMPLE_RATE); not installed otherwise
+if profiling.enabled():
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+# Opt-in anonymized request trace for benchmarks/replay.py (TRACE_FILE); outermost, so durations include queueing
+if tracing.enabled():
+    app.add_middleware(tracing.TraceMiddleware, principal=lambda headers: request_principal(headers))
+
 # Security
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
+# Operator endpoints under /admin require X-Admin-Token; they are disabled when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Feedback with its users and tags eager-loaded, so serializing a list costs a fixed number of queries
+def feedback_query(db: Session):
+    return db.query(models.Feedback).options(
+        joinedload(models.Feedback.manager),
+        joinedload(models.Feedback.employee),
+        selectinload(models.Feedback.tags),
+    )
+
+# Tables a feedback response is built from, for single-flight keys
+FEEDBACK_TABLES = ("feedback", "feedback_tags", "tags", "users")
+
+# Tenant of the request: the signed tenant claim of the bearer token, or the X-Tenant
+# header on routes used before login. A token without the claim (issued before tenants)
+# belongs to the default tenant; the header never moves it to another one.
+def tenant_name(headers):
+    if not database.TENANT_DB_DIR:
+        return database.DEFAULT_TENANT
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("tenant", database.DEFAULT_TENANT)
+        except jwt.PyJWTError:
+            pass  # Not authenticated; get_current_user rejects the token on protected routes
+    return headers.get("x-tenant", database.DEFAULT_TENANT)
+
+def request_principal(headers):
+    """Tenant and user id of the bearer token, checked without a database lookup; None if missing or invalid."""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        user_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except jwt.PyJWTError:
+        return None
+    return None if user_id is None else f"{tenant_name(headers)}:{user_id}"
+
+def link_tenant():
+    """Tenant to put in emailed links, so their pages reach this tenant's database; None for the default."""
+    name = database.current_tenant.get()
+    return None if name == database.DEFAULT_TENANT else name
+
+# Async so the tenant is visible to the sync handler and retry_db_operation that run after it
+async def resolve_tenant(request: Request):
+    try:
+        tenant = database.tenants.get(tenant_name(request.headers))
+    except database.UnknownTenant:
+        raise HTTPException(status_code=401, detail="Unknown tenant")
+    except database.TenantUnavailable:
+        name = tenant_name(request.headers)
+        logger.warning("Tenant database needs migration", extra={"tenant": name, "rate_key": name})
+        raise HTTPException(status_code=503, detail="Tenant database is being upgraded; try again later",
+                            headers={"Retry-After": "60"})
+    database.current_tenant.set(tenant.name)
+    return tenant
 
 # Database dependency
-def get_db():
-    db = database.SessionLocal()
+def get_db(tenant: database.Tenant = Depends(resolve_tenant)):
+    db = tenant.SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 # Authentication helpers
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return passwords.hash_password(password)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(hours=24)
-    to_encode.update({"exp": expire})
+    # jti identifies the token for logout/revocation
+    to_encode.update({"exp": expire, "jti": secrets.token_hex(16)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("sub")
@@ -147,26 +257,90 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
     
+    # Tokens issued before jti was added can't be revoked and simply expire
+    jti = payload.get("jti")
+    if jti and revocation.is_revoked(db, jti):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
+    tracing.record_role(request, user.role)
     return user
 
+# Conditional GETs: answer 304 before the route's queries when the client's ETag is current
+def conditional_get(*tables):
+    """ETag dependency for per-user responses built from tables."""
+    def check_etag(request: Request, response: Response, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+        etags.check(request, response, db, tables, current_user.id)
+    return check_etag
+
+def public_conditional_get(*tables):
+    """ETag dependency for responses that are the same for every caller."""
+    def check_etag(request: Request, response: Response, db: Session = Depends(get_db)):
+        etags.check(request, response, db, tables)
+    return check_etag
+
 # Routes
 @app.post("/auth/login", response_model=schemas.Token)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+@sql_budget(3)
+def login(user_credentials: schemas.UserLogin, tenant: database.Tenant = Depends(resolve_tenant), db: Session = Depends(get_db)):
     user = db.query(models.User).filter(models.User.email == user_credentials.email).first()
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    valid, new_hash = passwords.verify_and_update(user_credentials.password, user.hashed_password) if user else (False, None)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    access_token = create_access_token(data={"sub": user.id})
+    if new_hash:
+        # Hashed with an older scheme or a lower cost than this host is calibrated for
+        @retry_db_operation(max_retries=3, delay=0.1)
+        def rehash_with_retry():
+            user.hashed_password = new_hash
+            db.commit()
+        
+        rehash_with_retry()
+    
+    access_token = create_access_token(data={"sub": user.id, "tenant": tenant.name})
     return {"access_token": access_token, "token_type": "bearer", "user": user}
 
+def revoke_token(db: Session, payload: dict):
+    """Revoke a decoded token until it expires."""
+    @retry_db_operation(max_retries=3, delay=0.1)
+    def revoke_with_retry():
+        revocation.revoke(db, payload["jti"], payload["sub"], datetime.utcfromtimestamp(payload["exp"]))
+        db.commit()
+    
+    revoke_with_retry()
+    revocation.remember(payload["jti"])
+
+@app.post("/auth/logout")
+@sql_budget(4)
+def logout(credentials: HTTPAuthorizationCredentials = Depends(security), current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+    if payload.get("jti"):
+        revoke_token(db, payload)
+    return {"message": "Logged out"}
+
+@app.post("/auth/revoke")
+@sql_budget(4)
+def revoke(revocation_request: schemas.TokenRevoke, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Like RFC 7009: tokens that are invalid, expired or not revocable need no action
+    try:
+        payload = jwt.decode(revocation_request.token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return {"message": "Token revoked"}
+    if payload.get("sub") != current_user.id or payload.get("tenant", database.DEFAULT_TENANT) != database.current_tenant.get():
+        raise HTTPException(status_code=403, detail="Only your own tokens can be revoked")
+    if payload.get("jti"):
+        revoke_token(db, payload)
+    return {"message": "Token revoked"}
+
 @app.get("/auth/me", response_model=schemas.User)
+@sql_budget(1)
 def get_current_user_info(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 @app.post("/auth/verify-email")
+@sql_budget(2)
 def verify_email(token: str, db: Session = Depends(get_db)):
     # Find user with this verification token
     user = db.query(models.User).filter(
@@ -177,44 +351,61 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=400, detail="Invalid or expired verification token")
     
-    # Mark user as verified
-    user.is_verified = True
-    user.verification_token = None
-    user.verification_token_expires = None
-    db.commit()
+    @retry_db_operation(max_retries=3, delay=0.1)
+    def verify_with_retry():
+        # Mark user as verified
+        user.is_verified = True
+        user.verification_token = None
+        user.verification_token_expires = None
+        db.commit()
     
+    verify_with_retry()
     return {"message": "Email verified successfully"}
 
 @app.post("/auth/resend-verification")
+@sql_budget(2)
 async def resend_verification_email(email: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    if user.is_verified:
-        raise HTTPException(status_code=400, detail="Email already verified")
-    
     # Generate new verification token
     verification_token = email_service.generate_verification_token()
     token_expiry = email_service.get_token_expiry()
     
-    user.verification_token = verification_token
-    user.verification_token_expires = token_expiry
-    db.commit()
+    def store_token():
+        user = db.query(models.User).filter(models.User.email == email).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        if user.is_verified:
+            raise HTTPException(status_code=400, detail="Email already verified")
+        
+        @retry_db_operation(max_retries=3, delay=0.1)
+        def store_token_with_retry():
+            user.verification_token = verification_token
+            user.verification_token_expires = token_expiry
+            db.commit()
+        
+        # Read before the commit expires them, so the event loop never lazy-loads
+        recipient = (user.email, user.full_name)
+        store_token_with_retry()
+        return recipient
+    
+    # Database work runs in the threadpool so a busy database never blocks the event loop
+    to_email, full_name = await run_in_threadpool(store_token)
     
     # Send verification email
     try:
         await email_service.send_verification_email(
-            to_email=user.email,
-            full_name=user.full_name,
-            verification_token=verification_token
+            to_email=to_email,
+            full_name=full_name,
+            verification_token=verification_token,
+            tenant=link_tenant()
         )
         return {"message": "Verification email sent successfully"}
-    except Exception as e:
-        print(f"Failed to send verification email: {e}")
+    except Exception:
+        logger.exception("Verification email failed")
         raise HTTPException(status_code=500, detail="Failed to send verification email")
 
 @app.get("/users/team", response_model=list[schemas.User])
+@sql_budget(2)
 def get_team_members(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can view team members")
@@ -222,57 +413,79 @@ def get_team_members(current_user: models.User = Depends(get_current_user), db:
     team_members = db.query(models.User).filter(models.User.manager_id == current_user.id).all()
     return team_members
 
+@app.get("/users/search", response_model=list[schemas.User])
+@sql_budget(2)
+def search_users(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=50), scope: Literal["all", "team"] = "all", role: Optional[Literal["manager", "employee"]] = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Same visibility as /users and /users/team: managers see everyone, or only their team
+    if current_user.role != "manager":
+        raise HTTPException(status_code=403, detail="Only managers can search users")
+    
+    criteria = [models.User.manager_id == current_user.id] if scope == "team" else []
+    if role is not None:
+        criteria.append(models.User.role == role)
+    return serialization.json_response(user_search.search(db, q, limit, *criteria))
+
 @app.post("/users", response_model=schemas.User)
+@sql_budget(5)
+@idempotent
 async def create_user(user_data: schemas.UserCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can create users")
     
-    # Check if email already exists
-    existing_user = db.query(models.User).filter(models.User.email == user_data.email).first()
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    
-    # Validate manager_id if provided
-    if user_data.manager_id:
-        manager = db.query(models.User).filter(models.User.id == user_data.manager_id, models.User.role == "manager").first()
-        if not manager:
-            raise HTTPException(status_code=404, detail="Manager not found")
-    
-    # If creating an employee, set current user as manager if no manager specified
-    if user_data.role == "employee" and not user_data.manager_id:
-        user_data.manager_id = current_user.id
-    
     # Generate verification token
     verification_token = email_service.generate_verification_token()
     token_expiry = email_service.get_token_expiry()
     
-    @retry_db_operation(max_retries=3, delay=0.1)
-    def create_user_with_retry():
-        # Create new user
-        db_user = models.User(
-            email=user_data.email,
-            hashed_password=get_password_hash(user_data.password),
-            full_name=user_data.full_name,
-            role=user_data.role,
-            manager_id=user_data.manager_id,
-            is_verified=False,
-            verification_token=verification_token,
-            verification_token_expires=token_expiry
-        )
+    def insert_user():
+        # Check if email already exists
+        existing_user = db.query(models.User).filter(models.User.email == user_data.email).first()
+        if existing_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
         
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        return db_user
+        # Validate manager_id if provided
+        if user_data.manager_id:
+            manager = db.query(models.User).filter(models.User.id == user_data.manager_id, models.User.role == "manager").first()
+            if not manager:
+                raise HTTPException(status_code=404, detail="Manager not found")
+        
+        # If creating an employee, set current user as manager if no manager specified
+        if user_data.role == "employee" and not user_data.manager_id:
+            user_data.manager_id = current_user.id
+        
+        # Hash before taking the write lock; bcrypt is far slower than the insert
+        hashed_password = get_password_hash(user_data.password)
+        
+        @retry_db_operation(max_retries=3, delay=0.1)
+        def create_user_with_retry():
+            # Create new user
+            db_user = models.User(
+                email=user_data.email,
+                hashed_password=hashed_password,
+                full_name=user_data.full_name,
+                role=user_data.role,
+                manager_id=user_data.manager_id,
+                is_verified=False,
+                verification_token=verification_token,
+                verification_token_expires=token_expiry
+            )
+            
+            db.add(db_user)
+            db.commit()
+            db.refresh(db_user)
+            return db_user
+        
+        return create_user_with_retry()
     
-    db_user = create_user_with_retry()
+    # Database work runs in the threadpool so a busy database never blocks the event loop
+    db_user = await run_in_threadpool(insert_user)
     
     # Send verification email
     try:
         await email_service.send_verification_email(
             to_email=user_data.email,
             full_name=user_data.full_name,
-            verification_token=verification_token
+            verification_token=verification_token,
+            tenant=link_tenant()
         )
         
         # Also send welcome email with credentials
@@ -280,15 +493,17 @@ async def create_user(user_data: schemas.UserCreate, current_user: models.User =
             to_email=user_data.email,
             full_name=user_data.full_name,
             role=user_data.role,
-            temp_password=user_data.password
+            temp_password=user_data.password,
+            tenant=link_tenant()
         )
-    except Exception as e:
-        print(f"Failed to send emails: {e}")
+    except Exception:
+        logger.exception("New user emails failed")
         # Don't fail user creation if email fails
     
     return db_user
 
 @app.get("/users/managers", response_model=list[schemas.User])
+@sql_budget(2)
 def get_all_managers(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can view other managers")
@@ -296,15 +511,17 @@ def get_all_managers(current_user: models.User = Depends(get_current_user), db:
     managers = db.query(models.User).filter(models.User.role == "manager").all()
     return managers
 
-@app.get("/users", response_model=list[schemas.User])
-def get_all_users(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+@app.get("/users", response_model=list[schemas.User], dependencies=[Depends(conditional_get("users"))])
+@sql_budget(3)
+@single_flight(tables=("users",))
+def get_all_users(response: Response, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can view all users")
     
-    users = db.query(models.User).all()
-    return users
+    return serialization.json_response(serialization.user_rows(db), response)
 
 @app.delete("/users/{user_id}")
+@sql_budget(9)
 def delete_user(user_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can delete users")
@@ -329,8 +546,10 @@ def delete_user(user_id: int, current_user: models.User = Depends(get_current_us
             (models.Feedback.manager_id == user_id) | (models.Feedback.employee_id == user_id)
         ).delete()
         
-        # Delete related feedback requests
-        db.query(models.FeedbackRequest).filter(models.FeedbackRequest.employee_id == user_id).delete()
+        # Delete related feedback requests (made by the user or waiting in their inbox)
+        db.query(models.FeedbackRequest).filter(
+            (models.FeedbackRequest.employee_id == user_id) | (models.FeedbackRequest.manager_id == user_id)
+        ).delete()
         
         # Delete the user
         db.delete(user_to_delete)
@@ -341,6 +560,8 @@ def delete_user(user_id: int, current_user: models.User = Depends(get_current_us
 
 # Feedback routes
 @app.post("/feedback", response_model=schemas.Feedback)
+@sql_budget(8)
+@idempotent
 def create_feedback(feedback: schemas.FeedbackCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can create feedback")
@@ -359,32 +580,47 @@ def create_feedback(feedback: schemas.FeedbackCreate, current_user: models.User
             areas_to_improve=feedback.areas_to_improve,
             sentiment=feedback.sentiment
         )
-        db.add(db_feedback)
-        db.commit()
-        db.refresh(db_feedback)
         
         # Add tags if provided
         if feedback.tag_ids:
-            tags = db.query(models.Tag).filter(models.Tag.id.in_(feedback.tag_ids)).all()
-            db_feedback.tags = tags
-            db.commit()
+            db_feedback.tags = db.query(models.Tag).filter(models.Tag.id.in_(feedback.tag_ids)).all()
         
-        return db_feedback
+        db.add(db_feedback)
+        db.flush()
+        feedback_id = db_feedback.id
+        
+        # The feedback answers the employee's pending requests to this manager
+        db.execute(
+            update(models.FeedbackRequest)
+            .where(
+                models.FeedbackRequest.manager_id == current_user.id,
+                models.FeedbackRequest.status == "pending",
+                models.FeedbackRequest.employee_id == feedback.employee_id,
+            )
+            .values(status="completed", responded_at=datetime.utcnow(), feedback_id=feedback_id)
+        )
+        db.commit()
+        
+        return feedback_query(db).filter(models.Feedback.id == feedback_id).one()
     
     return create_feedback_with_retry()
 
-@app.get("/feedback", response_model=list[schemas.Feedback])
-def get_feedback(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+@app.get("/feedback", response_model=Union[list[schemas.Feedback], schemas.NormalizedFeedback], dependencies=[Depends(conditional_get(*FEEDBACK_TABLES))])
+@sql_budget(4)
+@single_flight(tables=FEEDBACK_TABLES)
+def get_feedback(response: Response, shape: Literal["nested", "normalized"] = "nested", current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role == "manager":
         # Manager sees all feedback they've given
-        feedback = db.query(models.Feedback).filter(models.Feedback.manager_id == current_user.id).all()
+        criterion = models.Feedback.manager_id == current_user.id
     else:
         # Employee sees only their feedback
-        feedback = db.query(models.Feedback).filter(models.Feedback.employee_id == current_user.id).all()
+        criterion = models.Feedback.employee_id == current_user.id
     
-    return feedback
+    # Built from row tuples; shape=normalized sends each user once instead of on every row
+    return serialization.json_response(serialization.feedback_list(db, criterion, normalized=shape == "normalized"), response)
 
 @app.put("/feedback/{feedback_id}", response_model=schemas.Feedback)
+@sql_budget(9)
 def update_feedback(feedback_id: int, feedback_update: schemas.FeedbackUpdate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can update feedback")
@@ -406,12 +642,12 @@ def update_feedback(feedback_id: int, feedback_update: schemas.FeedbackUpdate, c
             db_feedback.tags = tags
         
         db.commit()
-        db.refresh(db_feedback)
-        return db_feedback
+        return feedback_query(db).filter(models.Feedback.id == feedback_id).one()
     
     return update_feedback_with_retry()
 
 @app.post("/feedback/{feedback_id}/acknowledge")
+@sql_budget(3)
 def acknowledge_feedback(feedback_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "employee":
         raise HTTPException(status_code=403, detail="Only employees can acknowledge feedback")
@@ -431,6 +667,7 @@ def acknowledge_feedback(feedback_id: int, current_user: models.User = Depends(g
     return acknowledge_with_retry()
 
 @app.delete("/feedback/{feedback_id}")
+@sql_budget(5)
 def delete_feedback(feedback_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can delete feedback")
@@ -449,23 +686,31 @@ def delete_feedback(feedback_id: int, current_user: models.User = Depends(get_cu
     return delete_feedback_with_retry()
 
 # Tags routes
-@app.get("/tags", response_model=list[schemas.Tag])
+@app.get("/tags", response_model=list[schemas.Tag], dependencies=[Depends(public_conditional_get("tags"))])
+@sql_budget(2)
 def get_tags(db: Session = Depends(get_db)):
     return db.query(models.Tag).all()
 
 @app.post("/tags", response_model=schemas.Tag)
+@sql_budget(3)
 def create_tag(tag: schemas.TagBase, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can create tags")
     
-    db_tag = models.Tag(name=tag.name, color=tag.color)
-    db.add(db_tag)
-    db.commit()
-    db.refresh(db_tag)
-    return db_tag
+    @retry_db_operation(max_retries=3, delay=0.1)
+    def create_tag_with_retry():
+        db_tag = models.Tag(name=tag.name, color=tag.color)
+        db.add(db_tag)
+        db.commit()
+        db.refresh(db_tag)
+        return db_tag
+    
+    return create_tag_with_retry()
 
 # Feedback requests routes
 @app.post("/feedback-requests", response_model=schemas.FeedbackRequest)
+@sql_budget(4)
+@idempotent
 def create_feedback_request(request: schemas.FeedbackRequestCreate, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "employee":
         raise HTTPException(status_code=403, detail="Only employees can request feedback")
@@ -474,6 +719,7 @@ def create_feedback_request(request: schemas.FeedbackRequestCreate, current_user
     def create_request_with_retry():
         db_request = models.FeedbackRequest(
             employee_id=current_user.id,
+            manager_id=current_user.manager_id,
             message=request.message
         )
         db.add(db_request)
@@ -483,44 +729,193 @@ def create_feedback_request(request: schemas.FeedbackRequestCreate, current_user
     
     return create_request_with_retry()
 
-@app.get("/feedback-requests", response_model=list[schemas.FeedbackRequest])
-def get_feedback_requests(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+@app.get("/feedback-requests", response_model=list[schemas.FeedbackRequest], dependencies=[Depends(conditional_get("feedback_requests", "users"))])
+@sql_budget(3)
+def get_feedback_requests(
+    response: Response,
+    request_status: Optional[Literal["pending", "completed", "declined"]] = Query(None, alias="status"),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     if current_user.role == "manager":
-        # Manager sees requests from their team
-        requests = db.query(models.FeedbackRequest).join(models.User).filter(models.User.manager_id == current_user.id).all()
+        # Manager sees the requests sent to them (their inbox)
+        criteria = [models.FeedbackRequest.manager_id == current_user.id]
     else:
         # Employee sees their own requests
-        requests = db.query(models.FeedbackRequest).filter(models.FeedbackRequest.employee_id == current_user.id).all()
+        criteria = [models.FeedbackRequest.employee_id == current_user.id]
+    order_by = models.FeedbackRequest.id
+    if request_status is not None:
+        # Served in order by ix_feedback_requests_inbox for managers
+        criteria.append(models.FeedbackRequest.status == request_status)
+        order_by = models.FeedbackRequest.created_at
+    
+    return serialization.json_response(serialization.feedback_request_rows(db, *criteria, order_by=order_by), response)
+
+@app.get("/feedback-requests/counts", response_model=schemas.FeedbackRequestCounts, dependencies=[Depends(conditional_get("feedback_requests"))])
+@sql_budget(3)
+def get_feedback_request_counts(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.role == "manager":
+        # Counted from ix_feedback_requests_inbox alone, without reading the requests
+        criterion = models.FeedbackRequest.manager_id == current_user.id
+    else:
+        criterion = models.FeedbackRequest.employee_id == current_user.id
+    counts = dict(
+        db.query(models.FeedbackRequest.status, func.count())
+        .filter(criterion)
+        .group_by(models.FeedbackRequest.status)
+        .all()
+    )
+    return {name: counts.get(name, 0) for name in models.REQUEST_STATUSES}
+
+def respond_to_feedback_request(db: Session, current_user: models.User, request_id: int, new_status: str):
+    """Move a pending request in the manager's inbox to new_status; 404 if not theirs, 409 if already answered."""
+    if current_user.role != "manager":
+        raise HTTPException(status_code=403, detail="Only managers can respond to feedback requests")
     
-    return requests
+    @retry_db_operation(max_retries=3, delay=0.1)
+    def respond_with_retry():
+        # Conditional on the status, so two concurrent responses can't both succeed
+        result = db.execute(
+            update(models.FeedbackRequest)
+            .where(
+                models.FeedbackRequest.id == request_id,
+                models.FeedbackRequest.manager_id == current_user.id,
+                models.FeedbackRequest.status == "pending",
+            )
+            .values(status=new_status, responded_at=datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount
+    
+    if not respond_with_retry():
+        current_status = db.query(models.FeedbackRequest.status).filter(
+            models.FeedbackRequest.id == request_id, models.FeedbackRequest.manager_id == current_user.id
+        ).scalar()
+        if current_status is None:
+            raise HTTPException(status_code=404, detail="Feedback request not found")
+        raise HTTPException(status_code=409, detail=f"Feedback request is already {current_status}")
+    
+    rows = serialization.feedback_request_rows(db, models.FeedbackRequest.id == request_id)
+    return serialization.json_response(rows[0])
+
+@app.post("/feedback-requests/{request_id}/complete", response_model=schemas.FeedbackRequest)
+@sql_budget(4)
+def complete_feedback_request(request_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return respond_to_feedback_request(db, current_user, request_id, "completed")
+
+@app.post("/feedback-requests/{request_id}/decline", response_model=schemas.FeedbackRequest)
+@sql_budget(4)
+def decline_feedback_request(request_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    return respond_to_feedback_request(db, current_user, request_id, "declined")
 
 # Dashboard routes
+def dashboard_stats(db: Session, manager_id: int, team_members_count: int, recent_feedback: list):
+    """DashboardStats for a manager, counting sentiments in SQL."""
+    counts = dict(
+        db.query(models.Feedback.sentiment, func.count())
+        .filter(models.Feedback.manager_id == manager_id)
+        .group_by(models.Feedback.sentiment)
+        .all()
+    )
+    return {
+        "total_feedback": sum(counts.values()),
+        "positive_feedback": counts.get("positive", 0),
+        "neutral_feedback": counts.get("neutral", 0),
+        "negative_feedback": counts.get("negative", 0),
+        "team_members_count": team_members_count,
+        "recent_feedback": recent_feedback,
+    }
+
 @app.get("/dashboard/stats", response_model=schemas.DashboardStats)
+@sql_budget(6)
+@single_flight(tables=FEEDBACK_TABLES)
 def get_dashboard_stats(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Only managers can view dashboard stats")
     
-    # Get team feedback stats
-    team_feedback = db.query(models.Feedback).filter(models.Feedback.manager_id == current_user.id).all()
-    
-    total_feedback = len(team_feedback)
-    positive_feedback = len([f for f in team_feedback if f.sentiment == "positive"])
-    neutral_feedback = len([f for f in team_feedback if f.sentiment == "neutral"])
-    negative_feedback = len([f for f in team_feedback if f.sentiment == "negative"])
-    
     team_members_count = db.query(models.User).filter(models.User.manager_id == current_user.id).count()
     
     # Get recent feedback (last 5)
-    recent_feedback = db.query(models.Feedback).filter(models.Feedback.manager_id == current_user.id).order_by(models.Feedback.created_at.desc()).limit(5).all()
-    
-    return schemas.DashboardStats(
-        total_feedback=total_feedback,
-        positive_feedback=positive_feedback,
-        neutral_feedback=neutral_feedback,
-        negative_feedback=negative_feedback,
-        team_members_count=team_members_count,
-        recent_feedback=recent_feedback
+    recent_feedback = serialization.feedback_list(
+        db, models.Feedback.manager_id == current_user.id, order_by=models.Feedback.created_at.desc(), limit=5
+    )
+    
+    return serialization.json_response(dashboard_stats(db, current_user.id, team_members_count, recent_feedback))
+
+# Bootstrap: what the frontend loads on startup, from one session and one auth check
+BOOTSTRAP_PAGE_SIZE = int(os.getenv("BOOTSTRAP_PAGE_SIZE", "50"))
+BOOTSTRAP_TABLES = FEEDBACK_TABLES + ("feedback_requests",)
+
+@app.get("/bootstrap", response_model=schemas.Bootstrap, dependencies=[Depends(conditional_get(*BOOTSTRAP_TABLES))])
+@sql_budget(11)
+@single_flight(tables=BOOTSTRAP_TABLES)
+def bootstrap(response: Response, limit: int = Query(BOOTSTRAP_PAGE_SIZE, ge=5, le=500), current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    is_manager = current_user.role == "manager"
+    if is_manager:
+        feedback_criterion = models.Feedback.manager_id == current_user.id
+        requests_criterion = models.FeedbackRequest.manager_id == current_user.id
+    else:
+        feedback_criterion = models.Feedback.employee_id == current_user.id
+        requests_criterion = models.FeedbackRequest.employee_id == current_user.id
+    
+    # Newest first, one extra row to tell whether the page is complete
+    feedback = serialization.feedback_list(db, feedback_criterion, order_by=models.Feedback.id.desc(), limit=limit + 1)
+    requests = serialization.feedback_request_rows(
+        db, requests_criterion, order_by=models.FeedbackRequest.id.desc(), limit=limit + 1
     )
+    team, recent_feedback = [], []
+    if is_manager:
+        team = serialization.user_rows(db, models.User.manager_id == current_user.id)
+        recent_feedback = serialization.feedback_list(
+            db, feedback_criterion, order_by=models.Feedback.created_at.desc(), limit=5
+        )
+    
+    return serialization.json_response({
+        "user": serialization.user_dict(current_user),
+        "tags": serialization.tag_rows(db),
+        "team": team,
+        "stats": dashboard_stats(db, current_user.id, len(team), recent_feedback) if is_manager else None,
+        # Oldest first within the page, like GET /feedback and GET /feedback-requests
+        "feedback": feedback[:limit][::-1],
+        "feedback_complete": len(feedback) <= limit,
+        "feedback_requests": requests[:limit][::-1],
+        "feedback_requests_complete": len(requests) <= limit,
+    }, response)
+
+# Monitoring routes
+@app.get("/metrics", include_in_schema=False)
+@sql_budget(0)
+def get_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+# Admin routes
+def require_admin(x_admin_token: str = Header(default="")):
+    if not ADMIN_TOKEN or not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.post("/admin/backup", status_code=status.HTTP_202_ACCEPTED, include_in_schema=False, dependencies=[Depends(require_admin)])
+@sql_budget(0)
+def start_backup(tenant: str = database.DEFAULT_TENANT):
+    try:
+        target = database.tenants.get(tenant)
+    except database.UnknownTenant:
+        raise HTTPException(status_code=404, detail="Unknown tenant")
+    except database.TenantUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if target.engine.dialect.name != "sqlite":
+        raise HTTPException(status_code=400, detail="Online backups are only supported for SQLite")
+    
+    progress = backup.runner.start(target.name, target.engine.url.database)
+    if progress is None:
+        raise HTTPException(status_code=409, detail="A backup is already running")
+    return progress.as_dict()
+
+@app.get("/admin/backup", include_in_schema=False, dependencies=[Depends(require_admin)])
+@sql_budget(0)
+def get_backup_progress():
+    if backup.runner.current is None:
+        raise HTTPException(status_code=404, detail="No backup has been started")
+    return backup.runner.current.as_dict()
 
 if __name__ == "__main__":
     import uvicorn
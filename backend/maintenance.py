@@ -0,0 +1,242 @@
+"""
+In-process SQLite maintenance, started from main.lifespan.
+
+Runs on every database: the default one, the tenants open in this process and the
+other tenant databases in TENANT_DB_DIR, opened for the run and closed after it, so
+the maintenance leader also covers tenants only other workers are serving:
+
+- checkpoint: PASSIVE checkpoint once the WAL passes WAL_PASSIVE_CHECKPOINT_MB,
+  TRUNCATE under the write lock once it passes WAL_TRUNCATE_CHECKPOINT_MB, so
+  the WAL stops growing and reads stay fast
+- optimize: PRAGMA optimize, which re-analyzes only tables whose stats drifted
+- analyze: full ANALYZE, less often
+- purge_tokens: clears expired verification tokens in small batches, taking the
+  write lock per batch so request writes can interleave
+- purge_revocations: deletes revoked access tokens that have expired, in the
+  same batches
+
+Tasks take a pooled connection before the write lock, in the same order as
+request handlers: the other way round, a task holding the lock would wait for
+the connection held by a request that waits for the lock.
+
+With several workers only the process holding <database>.maintenance-lock runs
+the tasks. Each run's duration is exported as maintenance_task_duration_seconds.
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, select, update
+from starlette.concurrency import run_in_threadpool
+
+import app_log
+import database
+import metrics
+import models
+import write_lock
+
+# Load environment variables
+load_dotenv()
+
+logger = app_log.get_logger(__name__)
+
+MAINTENANCE_ENABLED = os.getenv("MAINTENANCE_ENABLED", "true").lower() == "true"
+CHECKPOINT_SECONDS = float(os.getenv("MAINTENANCE_CHECKPOINT_SECONDS", "30"))
+OPTIMIZE_SECONDS = float(os.getenv("MAINTENANCE_OPTIMIZE_SECONDS", "3600"))
+ANALYZE_SECONDS = float(os.getenv("MAINTENANCE_ANALYZE_SECONDS", "86400"))
+PURGE_SECONDS = float(os.getenv("MAINTENANCE_PURGE_SECONDS", "600"))
+WAL_PASSIVE_BYTES = float(os.getenv("WAL_PASSIVE_CHECKPOINT_MB", "4")) * 1024 * 1024
+WAL_TRUNCATE_BYTES = float(os.getenv("WAL_TRUNCATE_CHECKPOINT_MB", "64")) * 1024 * 1024
+TRUNCATE_BUSY_TIMEOUT_MS = 1000
+TOKEN_PURGE_BATCH = int(os.getenv("TOKEN_PURGE_BATCH", "500"))
+TOKEN_PURGE_PAUSE = 0.05  # Seconds between batches, leaving the write lock to requests
+
+maintenance_duration = metrics.Histogram(
+    "maintenance_task_duration_seconds", "Duration of SQLite maintenance tasks", ["task", "outcome"]
+)
+wal_bytes = metrics.Gauge("sqlite_wal_bytes", "Size of the write-ahead log after the last checkpoint check", ["tenant"])
+checkpoints = metrics.Counter("sqlite_checkpoints_total", "WAL checkpoints run by maintenance", ["mode"])
+tokens_purged = metrics.Counter("verification_tokens_purged_total", "Expired verification tokens cleared")
+revocations_purged = metrics.Counter("revoked_tokens_purged_total", "Revocations of expired access tokens deleted")
+
+
+def wal_path(tenant):
+    return f"{tenant.engine.url.database}-wal"
+
+
+def wal_size(tenant):
+    try:
+        return os.path.getsize(wal_path(tenant))
+    except OSError:
+        return 0
+
+
+def checkpoint(tenant):
+    size = wal_size(tenant)
+    if size >= WAL_TRUNCATE_BYTES:
+        # TRUNCATE waits for writers; holding the write lock keeps requests queued in order instead.
+        # A long reader (such as an online backup) makes it wait too, so give up quickly on one.
+        with tenant.engine.connect() as connection, tenant.write_lock:
+            connection.exec_driver_sql(f"PRAGMA busy_timeout={TRUNCATE_BUSY_TIMEOUT_MS}")
+            try:
+                connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                connection.exec_driver_sql("PRAGMA busy_timeout=60000")
+        checkpoints.inc(mode="truncate")
+    elif size >= WAL_PASSIVE_BYTES:
+        with tenant.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+        checkpoints.inc(mode="passive")
+    wal_bytes.set(wal_size(tenant), tenant=tenant.name)
+
+
+def optimize(tenant):
+    with tenant.engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA optimize")
+
+
+def analyze(tenant):
+    with tenant.engine.connect() as connection, tenant.write_lock:
+        connection.exec_driver_sql("ANALYZE")
+        connection.commit()
+
+
+def purge_tokens(tenant):
+    users = models.User.__table__
+    expired = (
+        select(users.c.id)
+        .where(users.c.verification_token.is_not(None), users.c.verification_token_expires < datetime.utcnow())
+        .limit(TOKEN_PURGE_BATCH)
+        .scalar_subquery()
+    )
+    purge = update(users).where(users.c.id.in_(expired)).values(verification_token=None, verification_token_expires=None)
+    while True:
+        with tenant.engine.connect() as connection, tenant.write_lock, connection.begin():
+            purged = connection.execute(purge).rowcount
+        tokens_purged.inc(purged)
+        if purged < TOKEN_PURGE_BATCH:
+            return
+        time.sleep(TOKEN_PURGE_PAUSE)
+
+
+def purge_revocations(tenant):
+    revoked = models.RevokedToken.__table__
+    expired = (
+        select(revoked.c.jti)
+        .where(revoked.c.expires_at < datetime.utcnow())
+        .limit(TOKEN_PURGE_BATCH)
+        .scalar_subquery()
+    )
+    purge = delete(revoked).where(revoked.c.jti.in_(expired))
+    while True:
+        with tenant.engine.connect() as connection, tenant.write_lock, connection.begin():
+            purged = connection.execute(purge).rowcount
+        revocations_purged.inc(purged)
+        if purged < TOKEN_PURGE_BATCH:
+            return
+        time.sleep(TOKEN_PURGE_PAUSE)
+
+
+# (name, function, interval in seconds)
+TASKS = [
+    ("checkpoint", checkpoint, CHECKPOINT_SECONDS),
+    ("optimize", optimize, OPTIMIZE_SECONDS),
+    ("analyze", analyze, ANALYZE_SECONDS),
+    ("purge_tokens", purge_tokens, PURGE_SECONDS),
+    ("purge_revocations", purge_revocations, PURGE_SECONDS),
+]
+
+
+def each_tenant():
+    """Every tenant database: the open ones, then the rest of TENANT_DB_DIR opened briefly.
+
+    A briefly opened tenant has its own WriteLock on the same lock file, so it still
+    queues with the copy open for requests. Tenants not migrated yet are skipped.
+    """
+    open_tenants = {tenant.name: tenant for tenant in database.tenants.all()}
+    yield from open_tenants.values()
+    for name in database.tenant_names():
+        if name in open_tenants:
+            continue
+        try:
+            tenant = database.open_tenant(name)
+        except database.UnknownTenant:
+            # Removed since it was listed
+            continue
+        try:
+            with tenant.engine.connect() as connection:
+                current = database.get_schema_version(connection) >= database.SCHEMA_VERSION
+            if current:
+                yield tenant
+        finally:
+            tenant.close()
+
+
+def run_task(name, func):
+    """Run one task on every SQLite database; returns its duration in seconds."""
+    start = time.perf_counter()
+    outcome = "ok"
+    for tenant in each_tenant():
+        if tenant.engine.dialect.name != "sqlite":
+            continue
+        try:
+            func(tenant)
+        except Exception:
+            outcome = "error"
+            logger.exception("Maintenance task failed", extra={"task": name, "tenant": tenant.name, "rate_key": name})
+    duration = time.perf_counter() - start
+    maintenance_duration.observe(duration, task=name, outcome=outcome)
+    return duration
+
+
+class MaintenanceScheduler:
+    """Runs TASKS at their intervals on a background asyncio task, each in a worker thread."""
+
+    def __init__(self, tasks=TASKS):
+        self.tasks = tasks
+        self._task = None
+        self._leader = write_lock.WriteLock(write_lock.lock_file_for(database.SQLALCHEMY_DATABASE_URL, "maintenance"))
+        self._is_leader = False
+
+    def _elect(self):
+        # Held for the life of the process; another worker takes over when it exits
+        if not self._is_leader:
+            try:
+                self._leader.acquire(timeout=0)
+                self._is_leader = True
+            except write_lock.WriteLockTimeout:
+                pass
+        return self._is_leader
+
+    async def _run(self):
+        now = time.monotonic()
+        due = {name: now + interval for name, _, interval in self.tasks}
+        while True:
+            await asyncio.sleep(max(0, min(due.values()) - time.monotonic()))
+            if not self._elect():
+                # Check again at the next checkpoint interval
+                due = {name: time.monotonic() + CHECKPOINT_SECONDS for name in due}
+                continue
+            for name, func, interval in self.tasks:
+                if time.monotonic() >= due[name]:
+                    await run_in_threadpool(run_task, name, func)
+                    due[name] = time.monotonic() + interval
+
+    def start(self):
+        if MAINTENANCE_ENABLED and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._is_leader:
+            self._leader.release()
+            self._is_leader = False
@@ -0,0 +1,299 @@
+"""
+In-process metrics for the Feedback System API, exposed in Prometheus text format.
+
+Only the standard library is used so the collectors can be imported from any
+module (database, email service, routes) without pulling in extra packages.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Registry:
+    """Holds every metric so /metrics can render them in registration order."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def total(self):
+        return sum(self._values.values())
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (non-cumulative), plus an overflow slot, sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_number(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+# HTTP
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"]
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+# Database
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time by statement type", ["operation"]
+)
+db_statements = Counter("db_statements_total", "SQL statements executed by statement type", ["operation"])
+db_request_statements = Histogram(
+    "http_request_db_statements", "SQL statements issued per HTTP request", ["route"], buckets=COUNT_BUCKETS
+)
+db_request_rows = Histogram(
+    "http_request_db_rows", "Rows loaded or affected per HTTP request", ["route"], buckets=COUNT_BUCKETS
+)
+db_request_seconds = Histogram("http_request_db_seconds", "Time spent executing SQL per HTTP request", ["route"])
+db_lock_wait = Histogram("db_lock_wait_seconds", "Time spent waiting for the database write lock", ["operation"])
+db_retries = Counter("db_retries_total", "Write retries after 'database is locked' or timeout errors", ["operation"])
+db_pool_checkout_wait = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection")
+db_tenant_engines = Gauge("db_tenant_engines", "Tenant database engines currently open (excluding the default)")
+db_tenant_evictions = Counter("db_tenant_evictions_total", "Idle tenant engines closed to stay within TENANT_MAX_ENGINES")
+
+# Email
+smtp_send_duration = Histogram(
+    "smtp_send_duration_seconds", "SMTP send duration by email type and outcome", ["email", "outcome"]
+)
+
+
+class RequestStats:
+    """Per-request counters filled in by the database hooks, plus the request id and start time for logs."""
+
+    __slots__ = ("scope", "request_id", "start", "statements", "db_seconds", "rows")
+
+    def __init__(self, scope, request_id=None):
+        self.scope = scope
+        self.request_id = request_id
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+
+    @property
+    def route(self):
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+
+current_request = contextvars.ContextVar("current_request", default=None)
+
+
+def _operation(statement):
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_start
+    operation = _operation(statement)
+    db_statement_duration.observe(elapsed, operation=operation)
+    db_statements.inc(operation=operation)
+
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        # SQLite reports -1 for SELECT; loaded rows are counted by the ORM "load" hook
+        if cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+
+def count_loaded_row(target, context):
+    stats = current_request.get()
+    if stats is not None:
+        stats.rows += 1
+
+
+def instrument_engine(engine):
+    """Attach statement timing hooks to a SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Client-supplied ids are kept (to correlate with a proxy's logs) when short and plain
+_REQUEST_ID = re.compile(rb"[A-Za-z0-9._-]{1,64}")
+
+request_logger = logging.getLogger("feedback_system.requests")
+
+
+def _request_id(scope):
+    for name, value in scope["headers"]:
+        if name == REQUEST_ID_HEADER and _REQUEST_ID.fullmatch(value):
+            return value.decode("latin-1")
+    return secrets.token_hex(8)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and per-request SQL usage.
+
+    Each request gets an id (X-Request-ID, echoed in the response) that log records carry;
+    requests slower than LOG_SLOW_REQUEST_MS are logged."""
+
+    def __init__(self, app, slow_request_ms=None):
+        self.app = app
+        if slow_request_ms is None:
+            slow_request_ms = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+        self.slow_request_seconds = slow_request_ms / 1000 if slow_request_ms >= 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope, _request_id(scope))
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", []).append((b"x-request-id", stats.request_id.encode("latin-1")))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - stats.start
+            http_requests_in_flight.dec()
+            route = stats.route
+            http_request_duration.observe(elapsed, method=scope["method"], route=route, status=status_code)
+            db_request_statements.observe(stats.statements, route=route)
+            db_request_rows.observe(stats.rows, route=route)
+            db_request_seconds.observe(stats.db_seconds, route=route)
+            if self.slow_request_seconds is not None and elapsed >= self.slow_request_seconds:
+                # Still inside the request context, so the record carries its id and duration
+                request_logger.warning("Slow request", extra={
+                    "method": scope["method"], "status": status_code, "statements": stats.statements,
+                    "db_ms": round(stats.db_seconds * 1000, 2), "rate_key": route,
+                })
+            current_request.reset(token)
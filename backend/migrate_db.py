@@ -1,97 +1,105 @@
 #!/usr/bin/env python3
 """
-Database migration script to add email verification columns.
+Database migration script: applies the pending migrations of migrations.py.
+
+Safe to run against a live database: it takes the app's write lock for one
+short step at a time, and backfills commit in batches with a checkpoint, so
+an interrupted run continues where it stopped when started again.
+
+    python migrate_db.py                 # The DATABASE_URL database
+    python migrate_db.py --tenant acme   # One tenant database in TENANT_DB_DIR
+    python migrate_db.py --all-tenants   # The default database and every tenant
+    python migrate_db.py --status        # Show applied and pending migrations
 """
 
+import argparse
 import sys
 import os
-from sqlalchemy import text
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import database
+import migrations
+
+STATUS_ICONS = {"applied": "✅", "in progress": "⏸️ ", "pending": "⏳"}
+
+def show_status(tenant):
+    print(f"📋 Migrations of {tenant.name}:")
+    for migration, state, checkpoint in migrations.status(tenant):
+        detail = f" (backfilled through id {checkpoint})" if checkpoint is not None else ""
+        print(f"   {STATUS_ICONS[state]} {migration.version}: {migration.name} - {state}{detail}")
+
+def migrate_database(tenant, batch_size=migrations.DEFAULT_BATCH_SIZE, pause=migrations.DEFAULT_PAUSE_SECONDS):
+    """Bring one database to the current schema version."""
+    print(f"🔄 Migrating {tenant.name}...")
+
+    def progress(migration, last_key):
+        print(f"   ↪ {migration.name}: backfilled through id {last_key}")
 
-def migrate_database():
-    """Add email verification columns to existing users table."""
-    print("🔄 Starting database migration...")
-    
     try:
-        with database.engine.connect() as connection:
-            # Check if columns already exist
-            result = connection.execute(text("PRAGMA table_info(users)"))
-            columns = [row[1] for row in result.fetchall()]
-            
-            print(f"📊 Current columns in users table: {columns}")
-            
-            # Add missing columns
-            migrations = []
-            
-            if 'is_verified' not in columns:
-                migrations.append("ALTER TABLE users ADD COLUMN is_verified BOOLEAN DEFAULT 0")
-                print("➕ Adding is_verified column...")
-            
-            if 'verification_token' not in columns:
-                migrations.append("ALTER TABLE users ADD COLUMN verification_token TEXT")
-                print("➕ Adding verification_token column...")
-            
-            if 'verification_token_expires' not in columns:
-                migrations.append("ALTER TABLE users ADD COLUMN verification_token_expires DATETIME")
-                print("➕ Adding verification_token_expires column...")
-            
-            # Execute migrations
-            for migration in migrations:
-                connection.execute(text(migration))
-                connection.commit()
-            
-            if migrations:
-                print(f"✅ Successfully added {len(migrations)} columns!")
-                
-                # Mark existing demo users as verified
-                print("🔧 Marking demo users as verified...")
-                demo_emails = ['manager@company.com', 'employee1@company.com', 'employee2@company.com']
-                for email in demo_emails:
-                    connection.execute(
-                        text("UPDATE users SET is_verified = 1 WHERE email = :email"),
-                        {"email": email}
-                    )
-                connection.commit()
-                print("✅ Demo users marked as verified!")
-            else:
-                print("✅ All columns already exist, no migration needed!")
-            
-            # Verify the migration
-            print("\n🔍 Verifying migration...")
-            result = connection.execute(text("PRAGMA table_info(users)"))
-            new_columns = [row[1] for row in result.fetchall()]
-            print(f"📊 Updated columns in users table: {new_columns}")
-            
-            # Test data access
-            result = connection.execute(text("SELECT COUNT(*) FROM users"))
-            user_count = result.fetchone()[0]
-            print(f"👥 Total users in database: {user_count}")
-            
-            # Show verification status
-            result = connection.execute(text("SELECT email, is_verified FROM users"))
-            users = result.fetchall()
-            print("\n📋 User verification status:")
-            for email, is_verified in users:
-                status = "✅ Verified" if is_verified else "❌ Unverified"
-                print(f"   • {email}: {status}")
-            
-            return True
-            
+        applied = migrations.migrate(tenant, batch_size=batch_size, pause=pause, progress=progress)
     except Exception as e:
-        print(f"❌ Migration failed: {e}")
+        print(f"❌ Migration of {tenant.name} failed: {e}")
+        print("   Run the script again to resume from the last checkpoint.")
         return False
 
-if __name__ == "__main__":
-    print("🚀 Database Migration for Email Verification")
+    if applied:
+        names = {migration.version: migration.name for migration in migrations.MIGRATIONS}
+        for version in applied:
+            print(f"   ✅ {version}: {names[version]}")
+    else:
+        print("   ✅ Already up to date, no migration needed!")
+    print(f"🔖 Schema version {database.SCHEMA_VERSION}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--tenant", help="Migrate this tenant's database instead of DATABASE_URL")
+    parser.add_argument("--all-tenants", action="store_true", help="Migrate the default database and every tenant")
+    parser.add_argument("--status", action="store_true", help="Only show which migrations are applied")
+    parser.add_argument("--batch-size", type=int, default=migrations.DEFAULT_BATCH_SIZE,
+                        help="Rows per backfill transaction")
+    parser.add_argument("--pause-ms", type=float, default=migrations.DEFAULT_PAUSE_SECONDS * 1000,
+                        help="Pause between backfill batches, leaving the write lock to the API")
+    args = parser.parse_args()
+
+    print("🚀 Database Migration")
     print("=" * 50)
-    
-    if migrate_database():
+
+    if args.tenant:
+        names = [args.tenant]
+    elif args.all_tenants:
+        names = [database.DEFAULT_TENANT, *database.tenant_names()]
+    else:
+        names = [database.DEFAULT_TENANT]
+
+    ok = True
+    for name in names:
+        # Tenant databases are opened directly: the registry refuses ones with an old schema
+        try:
+            tenant = database.tenants.default if name == database.DEFAULT_TENANT else database.open_tenant(name)
+        except database.UnknownTenant as e:
+            print(f"❌ {e}")
+            ok = False
+            continue
+        try:
+            if args.status:
+                show_status(tenant)
+            else:
+                ok = migrate_database(tenant, args.batch_size, args.pause_ms / 1000) and ok
+        finally:
+            if tenant is not database.tenants.default:
+                tenant.close()
+
+    if args.status:
+        return
+    if ok:
         print("\n🎉 Migration completed successfully!")
         print("You can now restart the FastAPI server.")
     else:
         print("\n❌ Migration failed!")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Schema migrations.
+
+Each migration has a version (the SCHEMA_VERSION it brings the database to), an
+idempotent schema step and optionally a backfill. Applied migrations are
+recorded in the schema_migrations table, and PRAGMA user_version is kept equal
+to the newest one so startup checks the version with one cheap query.
+
+A running API shares the database, so the runner takes the same write lock as
+the app's writers (write_lock.py), and only for one short step at a time:
+
+- the schema step (ALTER/CREATE statements) under one lock hold
+- the backfill in batches of batch_size rows, each committed together with its
+  checkpoint in schema_migrations; between batches the lock is released and
+  the runner pauses, so API writes wait behind at most one batch
+- an interrupted run (killed, lock timeout) resumes after the last checkpoint
+
+Databases created with the current schema (init_db.py, provisioned tenants)
+have no schema_migrations rows; their user_version is recorded as the
+baseline the first time the runner sees them.
+"""
+
+import time
+from datetime import datetime
+
+from sqlalchemy import bindparam, inspect, text
+
+import database
+import models
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE_SECONDS = 0.05
+
+DEMO_EMAILS = ["manager@company.com", "employee1@company.com", "employee2@company.com"]
+
+schema_migrations = models.SchemaMigration.__table__
+
+
+class Migration:
+    def __init__(self, version, name, schema, backfill=None):
+        self.version = version
+        self.name = name
+        # schema(connection): idempotent, since a run can stop after it but before it is recorded
+        self.schema = schema
+        # backfill(connection, after, batch_size): handles the next batch of keys after `after`
+        # and returns the last key it covered, or None when nothing is left
+        self.backfill = backfill
+
+
+def _next_batch(connection, table, after, batch_size):
+    """Highest id of the next batch_size rows of table after `after`, or None."""
+    return connection.execute(
+        text(f"SELECT max(id) FROM (SELECT id FROM {table} WHERE id > :after ORDER BY id LIMIT :n)"),
+        {"after": after, "n": batch_size},
+    ).scalar()
+
+
+def _add_verification_columns(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("users")}
+    for name, definition in (
+        ("is_verified", "BOOLEAN DEFAULT 0"),
+        ("verification_token", "TEXT"),
+        ("verification_token_expires", "DATETIME"),
+    ):
+        if name not in columns:
+            connection.execute(text(f"ALTER TABLE users ADD COLUMN {name} {definition}"))
+
+
+def _verify_demo_users(connection, after, batch_size):
+    # Users that existed before verification start unverified; the demo accounts are marked verified
+    last = _next_batch(connection, "users", after, batch_size)
+    if last is not None:
+        connection.execute(
+            text("UPDATE users SET is_verified = 1 WHERE id > :after AND id <= :last AND email IN :emails")
+            .bindparams(bindparam("emails", expanding=True)),
+            {"after": after, "last": last, "emails": DEMO_EMAILS},
+        )
+    return last
+
+
+def _add_data_versions(connection):
+    # Table.create, unlike metadata.create_all, doesn't run the after_create hooks of later versions
+    models.DataVersion.__table__.create(connection, checkfirst=True)
+    models.install_version_triggers(connection, ["users", "feedback", "tags", "feedback_tags", "feedback_requests"])
+
+
+def _add_revoked_tokens(connection):
+    models.RevokedToken.__table__.create(connection, checkfirst=True)
+    models.install_version_triggers(connection, ["revoked_tokens"])
+
+
+def _add_user_search(connection):
+    for index in models.User.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    # The triggers index users written from now on; the backfill indexes the existing ones
+    models.install_user_search(connection, populate=False)
+
+
+def _index_users(connection, after, batch_size):
+    last = _next_batch(connection, "users", after, batch_size)
+    if last is not None:
+        models.index_users(connection, after, last)
+    return last
+
+
+def _add_request_inbox(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("feedback_requests")}
+    for name, definition in (
+        ("manager_id", "INTEGER REFERENCES users (id)"),
+        ("responded_at", "DATETIME"),
+        ("feedback_id", "INTEGER REFERENCES feedback (id) ON DELETE SET NULL"),
+    ):
+        if name not in columns:
+            connection.execute(text(f"ALTER TABLE feedback_requests ADD COLUMN {name} {definition}"))
+    for index in models.FeedbackRequest.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def _assign_request_managers(connection, after, batch_size):
+    # Existing requests go to the employee's current manager
+    last = _next_batch(connection, "feedback_requests", after, batch_size)
+    if last is not None:
+        connection.execute(
+            text("UPDATE feedback_requests SET manager_id = "
+                 "(SELECT manager_id FROM users WHERE users.id = feedback_requests.employee_id) "
+                 "WHERE id > :after AND id <= :last AND manager_id IS NULL"),
+            {"after": after, "last": last},
+        )
+    return last
+
+
+# In order; the last one brings the database to database.SCHEMA_VERSION
+MIGRATIONS = [
+    Migration(1, "email verification columns", _add_verification_columns, _verify_demo_users),
+    Migration(2, "data_versions change counters", _add_data_versions),
+    Migration(3, "revoked_tokens", _add_revoked_tokens),
+    Migration(4, "users_fts search index", _add_user_search, _index_users),
+    Migration(5, "feedback request inbox", _add_request_inbox, _assign_request_managers),
+]
+
+if MIGRATIONS[-1].version != database.SCHEMA_VERSION:
+    raise RuntimeError(f"The newest migration is {MIGRATIONS[-1].version}, but SCHEMA_VERSION is {database.SCHEMA_VERSION}")
+
+
+def _recorded(connection):
+    """{version: row} of the migrations started on this database."""
+    if not inspect(connection).has_table(schema_migrations.name):
+        return {}
+    return {row.version: row for row in connection.execute(schema_migrations.select())}
+
+
+def _baseline(connection):
+    """Versions a database without migration history already has (from its user_version)."""
+    version = database.get_schema_version(connection)
+    return [migration for migration in MIGRATIONS if migration.version <= version]
+
+
+def status(tenant):
+    """[(migration, "applied" | "in progress" | "pending", checkpoint)] for a tenant database."""
+    with tenant.engine.connect() as connection:
+        recorded = _recorded(connection)
+        baseline = set() if recorded else {migration.version for migration in _baseline(connection)}
+    result = []
+    for migration in MIGRATIONS:
+        row = recorded.get(migration.version)
+        if migration.version in baseline or (row is not None and row.applied_at is not None):
+            result.append((migration, "applied", None))
+        elif row is not None:
+            result.append((migration, "in progress", row.checkpoint))
+        else:
+            result.append((migration, "pending", None))
+    return result
+
+
+def migrate(tenant, batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_PAUSE_SECONDS, progress=None):
+    """Apply the pending migrations to a tenant database; returns the versions applied.
+
+    progress(migration, last_key) is called after each committed backfill batch."""
+    applied = []
+    with tenant.engine.connect() as connection:
+        if not inspect(connection).has_table("users"):
+            raise RuntimeError("The database has no tables; run `python init_db.py` to create it")
+        with tenant.write_lock:
+            recorded = _recorded(connection)
+            schema_migrations.create(connection, checkfirst=True)
+            if not recorded:
+                now = datetime.utcnow()
+                for migration in _baseline(connection):
+                    connection.execute(schema_migrations.insert().values(
+                        version=migration.version, name=migration.name, started_at=now, applied_at=now
+                    ))
+            connection.commit()
+        recorded = _recorded(connection)
+
+        for migration in MIGRATIONS:
+            row = recorded.get(migration.version)
+            if row is not None and row.applied_at is not None:
+                continue
+            if row is None:
+                with tenant.write_lock:
+                    migration.schema(connection)
+                    connection.execute(schema_migrations.insert().values(version=migration.version, name=migration.name))
+                    connection.commit()
+            if migration.backfill is not None:
+                _backfill(connection, tenant, migration, row.checkpoint if row is not None else None,
+                          batch_size, pause, progress)
+            with tenant.write_lock:
+                connection.execute(
+                    schema_migrations.update()
+                    .where(schema_migrations.c.version == migration.version)
+                    .values(applied_at=datetime.utcnow())
+                )
+                database.set_schema_version(connection, migration.version)
+                connection.commit()
+            applied.append(migration.version)
+    return applied
+
+
+def prepare(tenant, batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_PAUSE_SECONDS, progress=None):
+    """Create a database that has no tables with the current schema, or migrate an existing one;
+    returns the versions applied. Concurrent callers must be serialized (the runner is not)."""
+    with tenant.engine.connect() as connection:
+        exists = inspect(connection).has_table("users")
+    if not exists:
+        with tenant.write_lock:
+            models.Base.metadata.create_all(bind=tenant.engine)
+            with tenant.engine.begin() as connection:
+                # Only a database created just now has every table of this version
+                database.set_schema_version(connection)
+        return []
+    return migrate(tenant, batch_size=batch_size, pause=pause, progress=progress)
+
+
+def _backfill(connection, tenant, migration, checkpoint, batch_size, pause, progress):
+    after = checkpoint or 0
+    while True:
+        # One batch and its checkpoint per transaction, holding the write lock only for that
+        with tenant.write_lock:
+            last = migration.backfill(connection, after, batch_size)
+            if last is not None:
+                connection.execute(
+                    schema_migrations.update()
+                    .where(schema_migrations.c.version == migration.version)
+                    .values(checkpoint=last)
+                )
+            connection.commit()
+        if last is None:
+            return
+        after = last
+        if progress is not None:
+            progress(migration, last)
+        # Let API writers queued on the lock go first
+        time.sleep(pause)
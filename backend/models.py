@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index, Table, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -19,7 +19,7 @@ class User(Base):
     hashed_password = Column(String)
     full_name = Column(String)
     role = Column(String)  # "manager" or "employee"
-    manager_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    manager_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     is_verified = Column(Boolean, default=False)
     verification_token = Column(String, nullable=True)
     verification_token_expires = Column(DateTime, nullable=True)
@@ -30,7 +30,7 @@ class User(Base):
     team_members = relationship("User", back_populates="manager")
     given_feedback = relationship("Feedback", foreign_keys="Feedback.manager_id", back_populates="manager")
     received_feedback = relationship("Feedback", foreign_keys="Feedback.employee_id", back_populates="employee")
-    feedback_requests = relationship("FeedbackRequest", back_populates="employee")
+    feedback_requests = relationship("FeedbackRequest", foreign_keys="FeedbackRequest.employee_id", back_populates="employee")
 
 class Feedback(Base):
     __tablename__ = "feedback"
@@ -61,14 +61,132 @@ class Tag(Base):
     # Relationships
     feedback = relationship("Feedback", secondary=feedback_tags, back_populates="tags")
 
+REQUEST_STATUSES = ("pending", "completed", "declined")
+
 class FeedbackRequest(Base):
     __tablename__ = "feedback_requests"
+    # A manager's inbox by status, oldest first, without reading the rest of their request history
+    __table_args__ = (Index("ix_feedback_requests_inbox", "manager_id", "status", "created_at"),)
     
     id = Column(Integer, primary_key=True, index=True)
-    employee_id = Column(Integer, ForeignKey("users.id"))
+    employee_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # The employee's manager when the request was made; it stays in that manager's inbox
+    manager_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     message = Column(Text)
     status = Column(String, default="pending")  # "pending", "completed", "declined"
     created_at = Column(DateTime, default=datetime.utcnow)
+    responded_at = Column(DateTime, nullable=True)
+    # The feedback that answered the request, when it was completed by creating feedback
+    feedback_id = Column(Integer, ForeignKey("feedback.id", ondelete="SET NULL"), nullable=True)
     
     # Relationships
-    employee = relationship("User", back_populates="feedback_requests")
\ No newline at end of file
+    employee = relationship("User", foreign_keys=[employee_id], back_populates="feedback_requests")
+
+class RevokedToken(Base):
+    """A revoked access token, kept until the token would have expired anyway."""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String, primary_key=True)
+    # No foreign key: revocations outlive deleted users until they expire
+    user_id = Column(Integer, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
+
+class DataVersion(Base):
+    """Change counter per table, bumped by triggers in the same transaction as the write."""
+    __tablename__ = "data_versions"
+    
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class SchemaMigration(Base):
+    """A migration of migrations.py; applied_at stays empty while its backfill is running."""
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    # Last key the backfill committed, so an interrupted run resumes after it
+    checkpoint = Column(Integer, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    applied_at = Column(DateTime, nullable=True)
+
+# Tables whose writes bump data_versions, which ETags and caches are derived from
+VERSIONED_TABLES = ["users", "feedback", "tags", "feedback_tags", "feedback_requests", "revoked_tokens"]
+
+def install_version_triggers(connection, tables=VERSIONED_TABLES):
+    """Create the data_versions rows and triggers (SQLite only); safe to run repeatedly."""
+    if connection.dialect.name != "sqlite":
+        return
+    for table in tables:
+        connection.exec_driver_sql(
+            "INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (?, 0)", (table,)
+        )
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            connection.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_version AFTER {operation} ON {table} "
+                f"BEGIN UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}'; END"
+            )
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_version_triggers(target, connection, **kw):
+    install_version_triggers(connection)
+
+def _email_name(row):
+    # The part of the address before "@"; the domain is shared by most users, so indexing it
+    # would only make every search for it match the whole table
+    return f"substr({row}.email, 1, instr({row}.email, '@') - 1)"
+
+def install_user_search(connection, populate=True):
+    """Create the users_fts prefix index over full names and email names and the triggers that
+    keep it in sync with users (SQLite only); safe to run repeatedly.
+
+    populate=False leaves existing users to index_users(), which migrations run in batches."""
+    if connection.dialect.name != "sqlite":
+        return
+    created = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'"
+    ).first() is None
+    connection.exec_driver_sql(
+        f"CREATE VIEW IF NOT EXISTS users_search (id, full_name, email_name) AS "
+        f"SELECT id, full_name, {_email_name('users')} FROM users"
+    )
+    # External content: the index stores only tokens and reads the text from the view.
+    # prefix='1 2 3' adds prefix indexes so short typeahead queries avoid a token scan
+    connection.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5("
+        "full_name, email_name, content='users_search', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
+    )
+    # Only rows already in the index are deleted from it (users_fts_docsize is the FTS5 table
+    # with one row per indexed id); deleting a row that was never indexed corrupts the index
+    delete_old = (
+        "INSERT INTO users_fts (users_fts, rowid, full_name, email_name) "
+        f"SELECT 'delete', old.id, old.full_name, {_email_name('old')} "
+        "WHERE EXISTS (SELECT 1 FROM users_fts_docsize WHERE id = old.id);"
+    )
+    insert_new = (
+        f"INSERT INTO users_fts (rowid, full_name, email_name) VALUES (new.id, new.full_name, {_email_name('new')});"
+    )
+    for name, trigger, body in (
+        ("users_insert_search", "AFTER INSERT ON users", insert_new),
+        ("users_delete_search", "AFTER DELETE ON users", delete_old),
+        # Only name and email changes touch the index, not logins that rehash a password
+        ("users_update_search", "AFTER UPDATE OF full_name, email ON users", delete_old + " " + insert_new),
+    ):
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {trigger} BEGIN {body} END")
+    if created and populate:
+        # Index the users that existed before the table did
+        connection.exec_driver_sql("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+
+def index_users(connection, after, last):
+    """Add users with after < id <= last that are not indexed yet to users_fts."""
+    connection.exec_driver_sql(
+        "INSERT INTO users_fts (rowid, full_name, email_name) "
+        "SELECT id, full_name, email_name FROM users_search WHERE id > ? AND id <= ? "
+        "AND id NOT IN (SELECT id FROM users_fts_docsize)",
+        (after, last),
+    )
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_user_search(target, connection, **kw):
+    install_user_search(connection)
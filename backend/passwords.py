@@ -0,0 +1,126 @@
+"""
+Password hashing with a cost tuned for this host.
+
+calibrate_password_hash.py measures the hash on the host and records, in
+PASSWORD_HASH_CONFIG, the highest cost whose hash stays within a latency
+budget. The context below hashes with that cost (environment variables
+override it). Hashes made with an older scheme or a lower cost still verify;
+verify_and_update() then also returns a replacement hash, which login stores,
+so stored hashes move to the current settings as users sign in.
+
+Setting PASSWORD_HASH_SCHEME=argon2 requires the optional argon2-cffi package
+(pip install argon2-cffi); without it bcrypt stays in use.
+
+Hash and verify durations are exported as password_hash_seconds.
+"""
+
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+from passlib.context import CryptContext
+from passlib.hash import argon2
+
+import app_log
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+logger = app_log.get_logger(__name__)
+
+PASSWORD_HASH_CONFIG = os.getenv(
+    "PASSWORD_HASH_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "password_hash.json")
+)
+
+SCHEMES = ("bcrypt", "argon2")
+
+password_hash_duration = metrics.Histogram(
+    "password_hash_seconds",
+    "Password hash and verify durations by scheme",
+    ["scheme", "operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+password_hash_cost = metrics.Gauge(
+    "password_hash_cost", "Configured cost per scheme (bcrypt rounds, argon2 time cost)", ["scheme"]
+)
+password_rehashes = metrics.Counter(
+    "password_rehashes_total", "Stored hashes replaced at login, by the scheme they were upgraded from", ["scheme"]
+)
+
+
+def load_calibration(path=PASSWORD_HASH_CONFIG):
+    """Settings recorded by calibrate_password_hash.py, or {} when it was never run."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def settings(calibration=None):
+    """Scheme and cost parameters: the environment, then the calibration file, then library defaults."""
+    calibration = load_calibration() if calibration is None else calibration
+    scheme = os.getenv("PASSWORD_HASH_SCHEME", calibration.get("scheme", "bcrypt"))
+    if scheme not in SCHEMES:
+        raise ValueError(f"PASSWORD_HASH_SCHEME must be one of {', '.join(SCHEMES)}")
+    if scheme == "argon2" and not argon2.has_backend():
+        logger.warning("PASSWORD_HASH_SCHEME=argon2 needs the argon2-cffi package; using bcrypt")
+        scheme = "bcrypt"
+    options = {}
+    for name, variable, default in (
+        ("bcrypt__rounds", "BCRYPT_ROUNDS", None),
+        ("argon2__time_cost", "ARGON2_TIME_COST", None),
+        ("argon2__memory_cost", "ARGON2_MEMORY_KIB", None),
+        ("argon2__parallelism", "ARGON2_PARALLELISM", None),
+    ):
+        value = os.getenv(variable, calibration.get(name, default))
+        if value is not None:
+            options[name] = int(value)
+    return scheme, options
+
+
+def build_context(scheme, options):
+    # The configured scheme first; the others still verify and are marked deprecated ("auto")
+    schemes = [scheme, *(other for other in SCHEMES if other != scheme)]
+    kwargs = {}
+    if "bcrypt__rounds" in options:
+        # min_rounds makes needs_update() flag hashes with fewer rounds for a rehash
+        kwargs["bcrypt__default_rounds"] = kwargs["bcrypt__min_rounds"] = options["bcrypt__rounds"]
+    for name in ("argon2__time_cost", "argon2__memory_cost", "argon2__parallelism"):
+        if name in options:
+            kwargs[name] = options[name]
+    return CryptContext(schemes=schemes, deprecated="auto", **kwargs)
+
+
+scheme, options = settings()
+pwd_context = build_context(scheme, options)
+password_hash_cost.set(pwd_context.handler("bcrypt").default_rounds, scheme="bcrypt")
+if "argon2__time_cost" in options:
+    password_hash_cost.set(options["argon2__time_cost"], scheme="argon2")
+
+
+def hash_password(password):
+    start = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        password_hash_duration.observe(time.perf_counter() - start, scheme=scheme, operation="hash")
+
+
+def verify_and_update(password, hashed_password):
+    """(valid, new hash or None); the new hash replaces one made with outdated settings."""
+    start = time.perf_counter()
+    try:
+        hashed_scheme = pwd_context.identify(hashed_password)
+    except ValueError:
+        return False, None
+    try:
+        valid, new_hash = pwd_context.verify_and_update(password, hashed_password)
+    finally:
+        # When a rehash happens this includes it, which is the latency the login sees
+        password_hash_duration.observe(time.perf_counter() - start, scheme=hashed_scheme, operation="verify")
+    if new_hash is not None:
+        password_rehashes.inc(scheme=hashed_scheme)
+    return valid, new_hash
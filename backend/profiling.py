@@ -0,0 +1,189 @@
+"""
+Opt-in statistical profiling of individual requests.
+
+A request is profiled when it carries `X-Profile-Token: <PROFILE_TOKEN>` or is
+picked by sampling PROFILE_SAMPLE_RATE of all requests. While it runs, a
+background thread samples the stacks of the event loop and of the worker
+threads executing the request's sync handlers, dependencies and ORM work.
+The result is written as a speedscope or collapsed-stack file to a bounded
+ring in PROFILE_DIR.
+
+The middleware is only installed when a token or a sample rate is configured,
+so requests pay nothing when profiling is disabled.
+"""
+
+import contextvars
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+# Load environment variables
+load_dotenv()
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "speedscope")  # "speedscope" or "collapsed"
+
+PROFILE_HEADER = b"x-profile-token"
+
+_active_profile = contextvars.ContextVar("active_profile", default=None)
+
+
+def enabled():
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    """Stack samples attributed to one request."""
+
+    def __init__(self, method, path, interval):
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.samples = {}
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def add(self, stack):
+        self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def collapsed(self):
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def speedscope(self):
+        frames, frame_index, samples, weights = [], {}, [], []
+        for stack, count in self.samples.items():
+            indexes = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    frames.append({"name": label})
+                indexes.append(frame_index[label])
+            samples.append(indexes)
+            weights.append(count * self.interval * 1000)
+        name = f"{self.method} {self.path}"
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "feedback-system profiling",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        })
+
+    def write(self, route):
+        """Write the profile into the ring directory and drop the oldest files beyond the limit."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        extension = "speedscope.json" if PROFILE_FORMAT == "speedscope" else "collapsed.txt"
+        filename = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{self.method}_{slug}_{self.duration * 1000:.0f}ms.{extension}"
+        with open(os.path.join(PROFILE_DIR, filename), "w") as f:
+            f.write(self.speedscope() if PROFILE_FORMAT == "speedscope" else self.collapsed())
+
+        existing = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith((".speedscope.json", ".collapsed.txt")))
+        for name in existing[:max(0, len(existing) - PROFILE_MAX_FILES)]:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        return filename
+
+
+class Sampler(threading.Thread):
+    """Samples every thread and keeps the stacks that belong to the profiled request."""
+
+    def __init__(self, profile, boundary_code, loop_thread_id):
+        super().__init__(name="request-profiler", daemon=True)
+        self.profile = profile
+        self.boundary_code = boundary_code
+        self.loop_thread_id = loop_thread_id
+        self.stopped = threading.Event()
+
+    def request_stack(self, frame, on_loop_thread):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            if code is self.boundary_code:
+                return tuple(reversed(stack))
+            # Worker threads run sync handlers via context.run(); the copied context tells us whose work it is
+            if not on_loop_thread and "context" in code.co_varnames:
+                context = frame.f_locals.get("context")
+                if isinstance(context, contextvars.Context) and context.get(_active_profile) is self.profile:
+                    return tuple(reversed(stack))
+            stack.append(_frame_label(code))
+            frame = frame.f_back
+        return None
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.profile.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self.request_stack(frame, thread_id == self.loop_thread_id)
+                if stack:
+                    self.profile.add(stack)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests selected by token header or sampling."""
+
+    # Only one request is profiled at a time, which bounds the overhead and keeps attribution exact
+    _busy = threading.Lock()
+
+    def __init__(self, app):
+        self.app = app
+
+    def _requested(self, scope):
+        if PROFILE_TOKEN:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value.decode("latin-1"), PROFILE_TOKEN)
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profiled(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    async def _profiled(self, scope, receive, send):
+        profile = RequestProfile(scope["method"], scope["path"], PROFILE_INTERVAL_MS / 1000)
+        token = _active_profile.set(profile)
+        sampler = Sampler(profile, ProfilingMiddleware._profiled.__code__, threading.get_ident())
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            _active_profile.reset(token)
+            profile.duration = time.perf_counter() - profile.started
+            route = scope.get("route")
+            await run_in_threadpool(profile.write, route.path if route is not None else scope["path"])
@@ -0,0 +1,195 @@
+"""
+Access token revocation.
+
+Tokens carry a jti claim; logging out or revoking a token records its jti in
+the revoked_tokens table until the token would have expired. Looking that
+table up on every request would add a query to every route, so each process
+keeps a Bloom filter of the revoked jtis per tenant database:
+
+- a jti that is not in the filter is certainly not revoked (no database access)
+- a filter hit is confirmed against the table, since it may be a false positive
+
+Revocations made by this process are added to its filter immediately. A
+filter is rebuilt when the invalidation bus reports a committed change to
+revoked_tokens, so other worker processes see a revocation within
+INVALIDATION_POLL_MS; a background task also rebuilds every
+REVOCATION_REFRESH_SECONDS the filters whose revoked_tokens version
+(data_versions) changed, in case the bus is disabled. Until a tenant's filter
+is first built, every check goes to the table.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import threading
+from datetime import datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+import app_log
+import data_version
+import database
+import invalidation
+import metrics
+import models
+
+# Load environment variables
+load_dotenv()
+
+logger = app_log.get_logger(__name__)
+
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "10"))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "10000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+
+revocation_checks = metrics.Counter(
+    "token_revocation_checks_total",
+    "Revocation checks by result (not_revoked: filter miss, revoked, false_positive, unfiltered)",
+    ["result"],
+)
+revoked_tokens = metrics.Gauge("revoked_tokens", "Unexpired revoked tokens in the Bloom filter", ["tenant"])
+
+
+class BloomFilter:
+    """Set membership with no false negatives and about error_rate false positives at capacity."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter:
+    """The Bloom filter of one tenant database, rebuilt when its revoked_tokens version changes."""
+
+    def __init__(self):
+        self.bloom = None
+        self.version = None
+        self._lock = threading.Lock()
+        # Revoked by this process since the last rebuild started; re-added to the new filter
+        self._recent = set()
+
+    def add(self, jti):
+        with self._lock:
+            self._recent.add(jti)
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def might_contain(self, jti):
+        """False only when jti is certainly not revoked; True before the first build."""
+        bloom = self.bloom
+        return bloom is None or jti in bloom
+
+    def refresh(self, tenant):
+        with tenant.engine.connect() as connection:
+            version = data_version.stored(connection, ["revoked_tokens"])
+            if version is not None and version == self.version:
+                return
+            with self._lock:
+                self._recent.clear()
+            revoked = models.RevokedToken.__table__
+            jtis = connection.execute(
+                select(revoked.c.jti).where(revoked.c.expires_at > datetime.utcnow())
+            ).scalars().all()
+        bloom = BloomFilter(max(REVOCATION_BLOOM_CAPACITY, 2 * len(jtis)), REVOCATION_BLOOM_ERROR_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        with self._lock:
+            # Revocations committed while the table was being read
+            for jti in self._recent:
+                bloom.add(jti)
+            self.bloom, self.version = bloom, version
+        revoked_tokens.set(len(jtis), tenant=tenant.name)
+
+
+_filters = {}
+_filters_lock = threading.Lock()
+
+
+def filter_for(tenant_name):
+    with _filters_lock:
+        return _filters.setdefault(tenant_name, RevocationFilter())
+
+
+def is_revoked(db, jti):
+    """Whether the token with this jti was revoked; queries the current tenant's database only on a filter hit."""
+    revocations = filter_for(database.current_tenant.get())
+    if not revocations.might_contain(jti):
+        revocation_checks.inc(result="not_revoked")
+        return False
+    found = db.query(models.RevokedToken.jti).filter(models.RevokedToken.jti == jti).first() is not None
+    if revocations.bloom is None:
+        revocation_checks.inc(result="unfiltered")
+    else:
+        revocation_checks.inc(result="revoked" if found else "false_positive")
+    return found
+
+
+def revoke(db, jti, user_id, expires_at):
+    """Record a revocation in the caller's transaction; the caller commits (under the write lock)."""
+    if db.get(models.RevokedToken, jti) is None:
+        db.add(models.RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at))
+
+
+def remember(jti):
+    """Add a committed revocation to this process's filter without waiting for the next refresh."""
+    filter_for(database.current_tenant.get()).add(jti)
+
+
+async def _revocations_changed(tenant_name, tables):
+    await run_in_threadpool(filter_for(tenant_name).refresh, database.tenants.get(tenant_name))
+
+
+invalidation.bus.subscribe(["revoked_tokens"], _revocations_changed)
+
+
+def refresh_all():
+    for tenant in database.tenants.all():
+        try:
+            filter_for(tenant.name).refresh(tenant)
+        except Exception:
+            logger.exception("Revocation filter refresh failed", extra={"tenant": tenant.name, "rate_key": tenant.name})
+
+
+class RevocationRefresher:
+    """Rebuilds the filters of every open tenant on a background asyncio task."""
+
+    def __init__(self, interval=REVOCATION_REFRESH_SECONDS):
+        self.interval = interval
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await run_in_threadpool(refresh_all)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
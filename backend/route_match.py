@@ -0,0 +1,29 @@
+"""
+Route lookup for the pure ASGI middlewares.
+
+Routing happens after middleware, so admission control, idempotency and
+single-flight each need the route template of a request before the router has
+run. route_for() matches it once per request and keeps the result in
+scope["route"], where the router would put it; the next middleware reuses it,
+and the metrics, tracing and profiling middlewares can label responses sent
+from a middleware (a 503 rejection, a replayed response) with their route.
+"""
+
+from starlette.routing import Match
+
+# Stored for a request that matched no route, so the routes are scanned once
+_UNMATCHED = None
+
+
+def route_for(router, scope):
+    """The route that fully matches scope, or None; looked up once per request."""
+    if "route" in scope:
+        return scope["route"]
+    route = _UNMATCHED
+    for candidate in router.routes:
+        match, _ = candidate.matches(scope)
+        if match == Match.FULL:
+            route = candidate
+            break
+    scope["route"] = route
+    return route
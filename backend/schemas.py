@@ -32,6 +32,9 @@ class Token(BaseModel):
     token_type: str
     user: User
 
+class TokenRevoke(BaseModel):
+    token: str
+
 class TagBase(BaseModel):
     name: str
     color: str = "#3B82F6"
@@ -57,7 +60,7 @@ class FeedbackUpdate(BaseModel):
     sentiment: Optional[str] = None
     tag_ids: Optional[List[int]] = None
 
-class Feedback(FeedbackBase):
+class FeedbackSummary(FeedbackBase):
     id: int
     manager_id: int
     employee_id: int
@@ -65,13 +68,20 @@ class Feedback(FeedbackBase):
     updated_at: datetime
     acknowledged: bool
     acknowledged_at: Optional[datetime] = None
-    manager: User
-    employee: User
     tags: List[Tag] = []
     
     class Config:
         from_attributes = True
 
+class Feedback(FeedbackSummary):
+    manager: User
+    employee: User
+
+class NormalizedFeedback(BaseModel):
+    """Feedback list with each user sent once and referenced by manager_id/employee_id."""
+    users: List[User]
+    feedback: List[FeedbackSummary]
+
 class FeedbackRequestBase(BaseModel):
     message: str
 
@@ -81,17 +91,38 @@ class FeedbackRequestCreate(FeedbackRequestBase):
 class FeedbackRequest(FeedbackRequestBase):
     id: int
     employee_id: int
+    manager_id: Optional[int] = None
     status: str
     created_at: datetime
+    responded_at: Optional[datetime] = None
+    feedback_id: Optional[int] = None
     employee: User
     
     class Config:
         from_attributes = True
 
+class FeedbackRequestCounts(BaseModel):
+    pending: int
+    completed: int
+    declined: int
+
 class DashboardStats(BaseModel):
     total_feedback: int
     positive_feedback: int
     neutral_feedback: int
     negative_feedback: int
     team_members_count: int
-    recent_feedback: List[Feedback]
\ No newline at end of file
+    recent_feedback: List[Feedback]
+
+class Bootstrap(BaseModel):
+    """Everything the frontend loads on startup. feedback and feedback_requests hold the
+    newest items (in the same order as their list routes); *_complete is false when
+    there are more to fetch from those routes."""
+    user: User
+    tags: List[Tag]
+    team: List[User]
+    stats: Optional[DashboardStats] = None
+    feedback: List[Feedback]
+    feedback_complete: bool
+    feedback_requests: List[FeedbackRequest]
+    feedback_requests_complete: bool
@@ -0,0 +1,168 @@
+"""
+Fast JSON responses for list routes.
+
+Routes that return ORM objects pay three times per row: the ORM builds
+objects (for feedback, also its manager and employee), FastAPI validates them
+into the response model and then converts the models back to dicts for
+json.dumps. The builders here select only the columns of the response schema
+as row tuples, zip them into dicts in the schema's field order and encode
+them with orjson when it is installed (pydantic-core's encoder otherwise),
+returning a ready Response. The output is the same JSON the response models
+produce; benchmarks/serialization.py checks that against the prebuilt
+TypeAdapters in ADAPTERS.
+
+normalized=True sends every user once under "users" and leaves feedback rows
+with only manager_id/employee_id, which is much smaller for large lists.
+"""
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+import models
+import schemas
+
+try:
+    import orjson
+except ImportError:  # Optional: pip install orjson
+    orjson = None
+    from pydantic_core import to_json
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return to_json(data)
+
+
+def json_response(data, response=None):
+    """Encode data; headers dependencies set on the route's injected response (ETag) are kept."""
+    encoded = Response(dumps(data), media_type="application/json")
+    if response is not None:
+        encoded.headers.update({name: value for name, value in response.headers.items() if name != "content-length"})
+    return encoded
+
+
+# Response models the builders mirror; used to validate their output in benchmarks and checks
+ADAPTERS = {
+    "users": TypeAdapter(list[schemas.User]),
+    "feedback": TypeAdapter(list[schemas.Feedback]),
+    "normalized_feedback": TypeAdapter(schemas.NormalizedFeedback),
+    "feedback_requests": TypeAdapter(list[schemas.FeedbackRequest]),
+}
+
+USER_FIELDS = tuple(schemas.User.model_fields)
+USER_ID = USER_FIELDS.index("id")
+TAG_FIELDS = tuple(schemas.Tag.model_fields)
+FEEDBACK_ORDER = tuple(schemas.Feedback.model_fields)
+SUMMARY_ORDER = tuple(schemas.FeedbackSummary.model_fields)
+# Stored columns of a feedback row; tag_ids is input-only and always serialized as []
+FEEDBACK_FIELDS = tuple(name for name in SUMMARY_ORDER if name not in ("tag_ids", "tags"))
+REQUEST_FIELDS = tuple(name for name in schemas.FeedbackRequest.model_fields if name != "employee")
+
+users = models.User.__table__
+feedback = models.Feedback.__table__
+tags = models.Tag.__table__
+feedback_requests = models.FeedbackRequest.__table__
+managers = users.alias("manager")
+employees = users.alias("employee")
+
+
+def _columns(table, fields):
+    return [table.c[name] for name in fields]
+
+
+def user_dict(user):
+    """A loaded User object shaped like schemas.User."""
+    return {name: getattr(user, name) for name in USER_FIELDS}
+
+
+def user_rows(db, *criteria):
+    """Users shaped like list[schemas.User]."""
+    rows = db.execute(select(*_columns(users, USER_FIELDS)).where(*criteria)).all()
+    return [dict(zip(USER_FIELDS, row)) for row in rows]
+
+
+def tag_rows(db):
+    """All tags shaped like list[schemas.Tag]."""
+    return [dict(zip(TAG_FIELDS, row)) for row in db.execute(select(*_columns(tags, TAG_FIELDS))).all()]
+
+
+def _tags_by_feedback(db, feedback_ids):
+    tagged = (
+        select(models.feedback_tags.c.feedback_id, *_columns(tags, TAG_FIELDS))
+        .join(tags, tags.c.id == models.feedback_tags.c.tag_id)
+        .where(models.feedback_tags.c.feedback_id.in_(feedback_ids))
+    )
+    by_feedback = {}
+    for feedback_id, *tag in db.execute(tagged).all():
+        by_feedback.setdefault(feedback_id, []).append(dict(zip(TAG_FIELDS, tag)))
+    return by_feedback
+
+
+def feedback_rows(db, *criteria, order_by=None, limit=None):
+    """Feedback matching criteria (on feedback columns) with users and tags, in two queries.
+
+    Returns (feedback dicts with tags, users by id)."""
+    ids = select(feedback.c.id).where(*criteria)
+    statement = (
+        select(*_columns(feedback, FEEDBACK_FIELDS), *_columns(managers, USER_FIELDS), *_columns(employees, USER_FIELDS))
+        .join(managers, managers.c.id == feedback.c.manager_id)
+        .join(employees, employees.c.id == feedback.c.employee_id)
+        .where(*criteria)
+    )
+    if order_by is not None:
+        ids, statement = ids.order_by(order_by), statement.order_by(order_by)
+    if limit is not None:
+        ids, statement = ids.limit(limit), statement.limit(limit)
+    rows = db.execute(statement).all()
+    # A subquery rather than a list of ids, which could pass SQLite's parameter limit
+    tags_by_feedback = _tags_by_feedback(db, ids) if rows else {}
+
+    width = len(FEEDBACK_FIELDS)
+    items, users_by_id = [], {}
+    for row in rows:
+        item = dict(zip(FEEDBACK_FIELDS, row[:width]))
+        item["tag_ids"] = []
+        item["tags"] = tags_by_feedback.get(item["id"], [])
+        items.append(item)
+        for user in (row[width:width + len(USER_FIELDS)], row[width + len(USER_FIELDS):]):
+            if user[USER_ID] not in users_by_id:
+                users_by_id[user[USER_ID]] = dict(zip(USER_FIELDS, user))
+    return items, users_by_id
+
+
+def feedback_list(db, *criteria, normalized=False, order_by=None, limit=None):
+    """Feedback shaped like list[schemas.Feedback], or schemas.NormalizedFeedback."""
+    items, users_by_id = feedback_rows(db, *criteria, order_by=order_by, limit=limit)
+    if normalized:
+        return {
+            "users": list(users_by_id.values()),
+            "feedback": [{name: item[name] for name in SUMMARY_ORDER} for item in items],
+        }
+    nested = []
+    for item in items:
+        item["manager"] = users_by_id[item["manager_id"]]
+        item["employee"] = users_by_id[item["employee_id"]]
+        nested.append({name: item[name] for name in FEEDBACK_ORDER})
+    return nested
+
+
+def feedback_request_rows(db, *criteria, order_by=None, limit=None):
+    """Feedback requests with their employee, shaped like list[schemas.FeedbackRequest]."""
+    width = len(REQUEST_FIELDS)
+    statement = (
+        select(*_columns(feedback_requests, REQUEST_FIELDS), *_columns(employees, USER_FIELDS))
+        .join(employees, employees.c.id == feedback_requests.c.employee_id)
+        .where(*criteria)
+    )
+    if order_by is not None:
+        statement = statement.order_by(order_by)
+    if limit is not None:
+        statement = statement.limit(limit)
+    result = []
+    for row in db.execute(statement).all():
+        item = dict(zip(REQUEST_FIELDS, row[:width]))
+        item["employee"] = dict(zip(USER_FIELDS, row[width:]))
+        result.append(item)
+    return result
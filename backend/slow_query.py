@@ -0,0 +1,134 @@
+"""
+Slow-statement log for the Feedback System database.
+
+Statements slower than SLOW_QUERY_MS are written as JSON lines to a rotating
+log together with their parameter shapes, originating route and the SQLite
+EXPLAIN QUERY PLAN output. Use slow_query_report.py to summarize the log.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+import app_log
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# Statements that EXPLAIN QUERY PLAN can describe
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+
+slow_query_logger = logging.getLogger("feedback_system.slow_query")
+slow_query_logger.propagate = False
+
+_threshold_seconds = None
+
+
+def get_threshold_ms():
+    return None if _threshold_seconds is None else _threshold_seconds * 1000
+
+
+def set_threshold_ms(threshold_ms):
+    """Change the slow-statement threshold; None or a negative value disables logging."""
+    global _threshold_seconds
+    _threshold_seconds = None if threshold_ms is None or threshold_ms < 0 else threshold_ms / 1000
+
+
+# Process-wide, set once here: installing the hooks on another engine (a tenant database)
+# must not undo a threshold changed since
+set_threshold_ms(SLOW_QUERY_MS)
+
+
+def _ensure_handler():
+    if not slow_query_logger.handlers:
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_MAX_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        # Written on the log writer thread, not by the statement that was slow
+        slow_query_logger.addHandler(app_log.background(handler))
+        slow_query_logger.setLevel(logging.INFO)
+
+
+def parameter_shape(parameters):
+    """Describe bound parameters by type only, so no user data reaches the log."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def explain_query_plan(cursor, statement, parameters):
+    """Return EXPLAIN QUERY PLAN output as indented lines, or None if not applicable."""
+    if statement.lstrip().split(None, 1)[0].upper() not in EXPLAINABLE:
+        return None
+
+    plan_cursor = cursor.connection.cursor()
+    try:
+        plan_cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        rows = plan_cursor.fetchall()
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        plan_cursor.close()
+
+    # Rows are (id, parent, notused, detail); indent children under their parent
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _threshold_seconds is None:
+        return
+    elapsed = time.perf_counter() - context._slow_query_start
+    if elapsed < _threshold_seconds:
+        return
+
+    first_parameters = parameters[0] if executemany and parameters else parameters
+    plan = None
+    if conn.dialect.name == "sqlite" and not executemany:
+        plan = explain_query_plan(cursor, statement, parameters)
+
+    stats = metrics.current_request.get()
+    record = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "duration_ms": round(elapsed * 1000, 3),
+        "statement": statement,
+        "parameters": parameter_shape(first_parameters),
+        "executemany": len(parameters) if executemany else None,
+        "method": stats.scope.get("method") if stats else None,
+        "route": stats.route if stats else None,
+        "plan": plan,
+    }
+    _ensure_handler()
+    slow_query_logger.info(json.dumps(record))
+
+
+def install(engine, threshold_ms=None):
+    """Attach the slow-statement hooks to an engine; threshold_ms, when given, changes the
+    process-wide threshold."""
+    if threshold_ms is not None:
+        set_threshold_ms(threshold_ms)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
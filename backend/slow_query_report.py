@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Slow-query report for the Feedback System.
+Summarizes the slow-statement log written by slow_query.py and lists the worst offenders.
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from slow_query import SLOW_QUERY_LOG
+
+def normalize_statement(statement):
+    """Collapse whitespace and literals so identical query shapes group together."""
+    statement = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    statement = re.sub(r"\b\d+(\.\d+)?\b", "?", statement)
+    statement = re.sub(r"\(\?(?:\s*,\s*\?)+\)", "(?, ...)", statement)
+    return " ".join(statement.split())
+
+def read_records(log_path):
+    """Read the log and its rotated backups, oldest first."""
+    # Backups are numbered newest first (.1, .2, ... .10); compare the numbers, not the strings
+    paths = [p for p in glob.glob(f"{glob.escape(log_path)}.*") if p.rsplit(".", 1)[-1].isdigit()]
+    paths.sort(key=lambda p: int(p.rsplit(".", 1)[-1]), reverse=True)
+    if os.path.exists(log_path):
+        paths.append(log_path)
+
+    records = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(records):
+    """Group records by normalized statement."""
+    groups = {}
+    for record in records:
+        key = normalize_statement(record["statement"])
+        group = groups.setdefault(key, {"statement": key, "durations": [], "routes": {}, "plan": None})
+        group["durations"].append(record["duration_ms"])
+        route = f"{record.get('method') or '-'} {record.get('route') or '(no request)'}"
+        group["routes"][route] = group["routes"].get(route, 0) + 1
+        if record.get("plan"):
+            group["plan"] = record["plan"]
+
+    summaries = []
+    for group in groups.values():
+        durations = sorted(group["durations"])
+        summaries.append({
+            "statement": group["statement"],
+            "count": len(durations),
+            "total_ms": sum(durations),
+            "mean_ms": sum(durations) / len(durations),
+            "p95_ms": percentile(durations, 0.95),
+            "max_ms": durations[-1],
+            "routes": sorted(group["routes"].items(), key=lambda item: -item[1]),
+            "plan": group["plan"],
+        })
+    return summaries
+
+def show_report(summaries, top, sort_key):
+    print("🐢 Slow Query Report")
+    print("=" * 30)
+
+    if not summaries:
+        print("✅ No slow statements recorded.")
+        return
+
+    summaries.sort(key=lambda s: s[sort_key], reverse=True)
+    for rank, summary in enumerate(summaries[:top], start=1):
+        print(f"\n{rank}. {summary['statement'][:300]}")
+        print(f"   Count: {summary['count']}  Total: {summary['total_ms']:.2f}ms  "
+              f"Mean: {summary['mean_ms']:.2f}ms  p95: {summary['p95_ms']:.2f}ms  Max: {summary['max_ms']:.2f}ms")
+        for route, count in summary["routes"][:5]:
+            print(f"   • {route} ({count})")
+        if summary["plan"]:
+            print("   Query plan:")
+            for line in summary["plan"]:
+                print(f"     {line}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the slow-statement log.")
+    parser.add_argument("--log", default=SLOW_QUERY_LOG, help="Path to the slow-statement log")
+    parser.add_argument("--top", type=int, default=10, help="Number of statements to show")
+    parser.add_argument("--sort", choices=["total_ms", "max_ms", "p95_ms", "count"], default="total_ms")
+    args = parser.parse_args()
+
+    records = read_records(args.log)
+    print(f"📄 {len(records)} slow statements in {args.log}\n")
+    show_report(summarize(records), args.top, args.sort)
@@ -0,0 +1,149 @@
+"""
+Per-request SQL statement budgets.
+
+Routes declare how many statements one request may issue with @sql_budget(n).
+In regression checks (see check_sql_budget.py) install() attaches a recorder to
+the engine and a middleware to the app; any request that issues more
+statements than its route allows is reported with every statement and the
+code that issued it, so N+1 lazy loads are caught before they ship.
+"""
+
+import contextvars
+import os
+import sys
+
+from sqlalchemy import event
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Frames from these locations are skipped when attributing a statement to a call site
+_SKIPPED_PATHS = (
+    os.path.join("site-packages", "sqlalchemy"),
+    os.path.abspath(__file__),
+    os.path.join(BACKEND_DIR, "metrics.py"),
+    os.path.join(BACKEND_DIR, "slow_query.py"),
+    "<string>",
+)
+
+
+def sql_budget(max_statements):
+    """Declare the maximum SQL statements a route may issue per request.
+
+    Apply below the route decorator so FastAPI registers the annotated function:
+
+        @app.get("/tags")
+        @sql_budget(1)
+        def get_tags(...): ...
+    """
+    def decorator(func):
+        func.sql_budget = max_statements
+        return func
+    return decorator
+
+
+class SQLBudgetExceeded(AssertionError):
+    pass
+
+
+class Violation:
+    def __init__(self, method, route, budget, statements):
+        self.method = method
+        self.route = route
+        self.budget = budget
+        self.statements = statements
+
+    def report(self):
+        budget = "no budget declared" if self.budget is None else f"budget {self.budget}"
+        lines = [f"{self.method} {self.route}: {len(self.statements)} statements ({budget})"]
+        for number, (statement, call_site) in enumerate(self.statements, start=1):
+            lines.append(f"  {number:>3}. {' '.join(statement.split())[:160]}")
+            for frame in call_site:
+                lines.append(f"         at {frame}")
+        return "\n".join(lines)
+
+
+def call_site(limit=3):
+    """Describe the innermost frames outside SQLAlchemy that led to a statement."""
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < limit:
+        filename = frame.f_code.co_filename
+        if not any(skipped in filename for skipped in _SKIPPED_PATHS):
+            frames.append(f"{os.path.relpath(filename, BACKEND_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}")
+        frame = frame.f_back
+    return frames
+
+
+_recording = contextvars.ContextVar("sql_budget_recording", default=None)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = _recording.get()
+    if statements is not None:
+        statements.append((statement, call_site()))
+
+
+class SQLBudgetChecker:
+    """Collects budget violations for requests served by an instrumented app."""
+
+    def __init__(self):
+        self.violations = []
+        self.requests = 0
+
+    def reset(self):
+        self.violations = []
+        self.requests = 0
+
+    def check(self, method, route, budget, statements):
+        self.requests += 1
+        if budget is None or len(statements) > budget:
+            self.violations.append(Violation(method, route, budget, statements))
+
+    def assert_within_budget(self):
+        if self.violations:
+            raise SQLBudgetExceeded("\n\n".join(violation.report() for violation in self.violations))
+
+
+class SQLBudgetMiddleware:
+    """ASGI middleware that records each request's statements and checks the route's budget."""
+
+    def __init__(self, app, checker):
+        self.app = app
+        self.checker = checker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statements = []
+        token = _recording.set(statements)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _recording.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                budget = getattr(route.endpoint, "sql_budget", None)
+                self.checker.check(scope["method"], route.path, budget, statements)
+
+
+def routes_without_budget(app):
+    """Return 'METHOD /path' for every API route that does not declare a budget."""
+    missing = []
+    for route in app.routes:
+        endpoint = getattr(route, "endpoint", None)
+        methods = getattr(route, "methods", None)
+        if endpoint is None or not methods or route.path.startswith(("/docs", "/redoc", "/openapi")):
+            continue
+        if getattr(endpoint, "sql_budget", None) is None:
+            missing.extend(f"{method} {route.path}" for method in sorted(methods))
+    return missing
+
+
+def install(app, engine):
+    """Instrument an app and engine for budget checks; call before the first request."""
+    checker = SQLBudgetChecker()
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_middleware(SQLBudgetMiddleware, checker=checker)
+    return checker
@@ -0,0 +1,167 @@
+"""
+Opt-in, anonymized request traces for replay.
+
+With TRACE_FILE set, every request (or TRACE_SAMPLE_RATE of them) is appended
+to that file as one compact JSON line:
+
+    {"t": 1718000000123.4, "m": "GET", "r": "/feedback/{feedback_id}", "u": "3f9c0a1be27d",
+     "role": "manager", "q": {"shape": "normalized", "q": "~3"}, "b": 0, "s": 200, "d": 12.71}
+
+t is the start time in epoch milliseconds, r the route template (path
+parameters such as ids are dropped), u a pseudonym of the tenant and user id
+(keyed with TRACE_SALT, so it can't be reversed without it), b the request
+body size, s the status and d the server-side duration in milliseconds.
+Bodies are never recorded. Query values are kept only for the parameters in
+TRACE_KEEP_PARAMS and for numbers; other values (search text, emails, tokens)
+are replaced by "~<length>".
+
+Lines are written by a background thread, so a request only pays for
+building the record. The file is rotated to <TRACE_FILE>.1 at
+TRACE_MAX_BYTES. benchmarks/replay.py re-issues a trace against a local
+instance of the app.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import queue
+import random
+import threading
+import time
+from urllib.parse import parse_qsl
+
+from dotenv import load_dotenv
+
+import app_log
+
+# Load environment variables
+load_dotenv()
+
+logger = app_log.get_logger(__name__)
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1"))
+TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(100 * 1024 * 1024)))
+# Pseudonyms are stable across workers and restarts for one salt; change it to unlink captures
+TRACE_SALT = os.getenv("TRACE_SALT") or os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+TRACE_KEEP_PARAMS = {name.strip() for name in os.getenv("TRACE_KEEP_PARAMS", "shape,scope,role,limit,status").split(",") if name.strip()}
+
+ROLE_KEY = "trace.role"
+
+
+def enabled():
+    return bool(TRACE_FILE) and TRACE_SAMPLE_RATE > 0
+
+
+def record_role(request, role):
+    """Note the authenticated user's role on the request, for the trace (replays pick a user with it)."""
+    request.scope[ROLE_KEY] = role
+
+
+def pseudonym(principal, salt=TRACE_SALT):
+    return hmac.new(salt.encode(), principal.encode(), hashlib.sha256).hexdigest()[:12]
+
+
+def anonymize_query(query_string, keep=TRACE_KEEP_PARAMS):
+    params = {}
+    for name, value in parse_qsl(query_string.decode("latin-1"), keep_blank_values=True):
+        params[name] = value if name in keep or value.isdigit() else f"~{len(value)}"
+    return params
+
+
+class TraceWriter(threading.Thread):
+    """Appends queued records to the trace file, rotating it at max_bytes."""
+
+    def __init__(self, path, max_bytes=TRACE_MAX_BYTES):
+        super().__init__(name="trace-writer", daemon=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.records = queue.SimpleQueue()
+
+    def run(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        while True:
+            lines = [self.records.get()]
+            # Write whatever else is queued in the same call
+            while True:
+                try:
+                    lines.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write("".join(lines))
+            except OSError as e:
+                logger.error("Request trace write failed", extra={"error": str(e)})
+
+    def _write(self, data):
+        # Appends of whole lines from several workers interleave at line boundaries (O_APPEND)
+        with open(self.path, "a") as f:
+            f.write(data)
+            size = f.tell()
+        if size >= self.max_bytes:
+            os.replace(self.path, f"{self.path}.1")
+
+
+class TraceMiddleware:
+    """ASGI middleware that records one anonymized line per sampled HTTP request."""
+
+    def __init__(self, app, principal, path=TRACE_FILE, sample_rate=TRACE_SAMPLE_RATE):
+        self.app = app
+        # Maps request headers to "tenant:user id", or None when the request is not authenticated
+        self.principal = principal
+        self.sample_rate = sample_rate
+        self.writer = TraceWriter(path)
+        self._pid = None
+
+    def _writer(self):
+        # Threads don't survive a fork, so each worker starts its own
+        if self._pid != os.getpid():
+            self.writer = TraceWriter(self.writer.path, self.writer.max_bytes)
+            self.writer.start()
+            self._pid = os.getpid()
+        return self.writer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        start = time.perf_counter()
+        status = 500
+        body_size = 0
+
+        async def receive_wrapper():
+            nonlocal body_size
+            message = await receive()
+            if message["type"] == "http.request":
+                body_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+            principal = self.principal(headers)
+            route = scope.get("route")
+            record = {
+                "t": round(started_at * 1000, 1),
+                "m": scope["method"],
+                "r": route.path if route is not None else None,
+                "u": pseudonym(principal) if principal is not None else None,
+                "role": scope.get(ROLE_KEY),
+                "q": anonymize_query(scope["query_string"]),
+                "b": body_size,
+                "s": status,
+                "d": round(duration_ms, 2),
+            }
+            self._writer().records.put(json.dumps(record, separators=(",", ":")) + "\n")
@@ -0,0 +1,80 @@
+"""
+Typeahead search over users.
+
+GET /users/search matches each word of the query as a prefix of a word in the
+user's full name or the part of their email before "@", so "jo sm" finds
+"John Smith" and "jo.smith@company.com". The email domain is left out: nearly
+every user shares it, and a search matching the whole table is the one query
+the index cannot answer quickly.
+
+On SQLite this runs against the users_fts FTS5 index (models.py), whose
+prefix indexes answer even one- and two-letter queries without scanning the
+users table; results are ordered by bm25 rank. Other databases fall back to
+LIKE filters that match each word at the start of a name or email word.
+"""
+
+import re
+
+from sqlalchemy import column, func, literal_column, or_, select, table
+
+import serialization
+
+MAX_TERMS = 8
+# Matches ranked per query. FTS5 yields matches in rowid order, so when a query matches
+# more users only the oldest RANK_CANDIDATES are ranked; typing more letters narrows it
+RANK_CANDIDATES = 1000
+# Where the FTS5 tokenizer starts a new word, for the LIKE fallback
+NAME_SEPARATORS = (" ", "-")
+EMAIL_SEPARATORS = (".", "_", "-", "+")
+
+users = serialization.users
+users_fts = table("users_fts", column("rowid"), column("rank"))
+
+# Letters and digits; "_" separates words, as in the FTS5 tokenizer
+_WORD = re.compile(r"[^\W_]+")
+
+
+def terms(query):
+    """Lowercase words of the query before any "@", in order, without duplicates."""
+    return list(dict.fromkeys(_WORD.findall(query.split("@", 1)[0].lower())))[:MAX_TERMS]
+
+
+def match_expression(words):
+    # Quoted so FTS5 operators in the query (AND, NEAR, column filters) are plain text
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _escape_like(text):
+    # "%" and "_" are LIKE wildcards
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def word_start(word):
+    """LIKE filter matching word at the start of a word of the full name or email name."""
+    word = _escape_like(word)
+    full_name = func.lower(users.c.full_name)
+    email = func.lower(users.c.email)
+    # The "@%" suffix keeps email matches before the "@", like the index
+    patterns = [(full_name, f"{word}%"), (email, f"{word}%@%")]
+    patterns += [(full_name, f"%{separator}{word}%") for separator in NAME_SEPARATORS]
+    patterns += [(email, f"%{_escape_like(separator)}{word}%@%") for separator in EMAIL_SEPARATORS]
+    return or_(*(expression.like(pattern, escape="\\") for expression, pattern in patterns))
+
+
+def search(db, query, limit, *criteria):
+    """Users matching every word of the query, shaped like list[schemas.User]."""
+    words = terms(query)
+    if not words:
+        return []
+    columns = [users.c[name] for name in serialization.USER_FIELDS]
+    if db.get_bind().dialect.name == "sqlite":
+        # Rank only the first RANK_CANDIDATES matches, not the best ones: bm25 costs about a
+        # microsecond per match, and a one-letter query matches most of the table
+        candidates = select(users.c.id, users_fts.c.rank).join(users_fts, users_fts.c.rowid == users.c.id).where(
+            literal_column("users_fts").op("MATCH")(match_expression(words)), *criteria
+        ).limit(RANK_CANDIDATES).subquery()
+        statement = select(*columns).join(candidates, candidates.c.id == users.c.id).order_by(candidates.c.rank)
+    else:
+        statement = select(*columns).where(*criteria, *(word_start(word) for word in words)).order_by(users.c.full_name)
+    rows = db.execute(statement.limit(limit)).all()
+    return [dict(zip(serialization.USER_FIELDS, row)) for row in rows]
@@ -0,0 +1,120 @@
+"""
+Write coordination across worker processes.
+
+SQLite allows a single writer at a time. A threading.Lock only orders the
+writers of one process, so with several uvicorn/gunicorn workers the others
+fell back to SQLite's busy timeout. WriteLock pairs the thread lock with an
+advisory lock (flock) on a file next to the database, so writers from every
+worker queue for the database instead of retrying on "database is locked".
+"""
+
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are coordinated
+    fcntl = None
+
+# Load environment variables
+load_dotenv()
+
+# "file" coordinates writers across processes, "thread" only within one process
+WRITE_LOCK = os.getenv("WRITE_LOCK", "file")
+WRITE_LOCK_FILE = os.getenv("WRITE_LOCK_FILE")
+WRITE_LOCK_TIMEOUT = float(os.getenv("WRITE_LOCK_TIMEOUT", "30"))
+
+
+class WriteLockTimeout(TimeoutError):
+    pass
+
+
+class WriteLock:
+    """Re-usable, non-reentrant lock shared by threads and, with a path, by processes."""
+
+    def __init__(self, path=None, timeout=WRITE_LOCK_TIMEOUT):
+        self.path = path if fcntl is not None else None
+        self.timeout = timeout
+        self._thread_lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+
+    def _file(self):
+        # flock belongs to the open file, so each process (including forked workers) opens its own
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if not self._thread_lock.acquire(timeout=timeout):
+            raise WriteLockTimeout(f"Write lock timeout after {timeout}s")
+        if self.path is None:
+            return
+        try:
+            fd = self._file()
+            delay = 0.0005
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise WriteLockTimeout(f"Write lock timeout after {timeout}s (held by another process)")
+                    time.sleep(delay)
+                    delay = min(delay * 2, 0.01)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        try:
+            if self.path is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    def locked(self):
+        return self._thread_lock.locked()
+
+    def close(self):
+        """Close this process's lock file handle; the next acquire reopens it."""
+        with self._thread_lock:
+            if self._fd is not None and self._pid == os.getpid():
+                os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def lock_file_for(database_url, kind="write", tenant=None):
+    """Lock file path for a SQLite database URL, or None when processes can't share one.
+
+    With WRITE_LOCK_FILE set, that file belongs to the default database and each tenant
+    database gets its own file next to it, so tenants still write independently."""
+    if WRITE_LOCK_FILE:
+        path = WRITE_LOCK_FILE if tenant is None else f"{WRITE_LOCK_FILE}.tenant-{tenant}"
+        return path if kind == "write" else f"{path}.{kind}"
+    if not database_url.startswith("sqlite"):
+        return None
+    path = database_url.split(":///", 1)[-1]
+    if not path or path == ":memory:" or database_url == "sqlite://":
+        return None
+    return f"{os.path.abspath(path)}.{kind}-lock"
+
+
+def for_database(database_url, tenant=None):
+    """The write lock configured by WRITE_LOCK for this database (a tenant's, when named)."""
+    if WRITE_LOCK == "thread":
+        return WriteLock()
+    return WriteLock(lock_file_for(database_url, tenant=tenant))
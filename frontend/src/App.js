@@ -8,8 +8,9 @@ import {
 import { Provider } from "react-redux";
 import { PersistGate } from "redux-persist/integration/react";
 import { store, persistor } from "./store";
-import { useAuthStatus } from "./store/hooks";
+import { useAuthStatus, useBootstrap } from "./store/hooks";
 import { fetchCurrentUser } from "./store/slices/authSlice";
+import { fetchBootstrap } from "./store/slices/bootstrapSlice";
 import Login from "./components/Login";
 import Dashboard from "./components/Dashboard";
 import FeedbackList from "./components/FeedbackList";
@@ -28,6 +29,7 @@ function ProtectedRoute({ children }) {
 
 function AppContent() {
   const { isAuthenticated, user, loading } = useAuthStatus();
+  const bootstrap = useBootstrap();
 
   useEffect(() => {
     // Check for existing token and fetch user data
@@ -37,7 +39,15 @@ function AppContent() {
     }
   }, [user]);
 
-  if (loading) {
+  useEffect(() => {
+    // Hydrate the store with one request instead of one per page
+    if (isAuthenticated && !bootstrap.loaded && !bootstrap.loading && !bootstrap.error) {
+      store.dispatch(fetchBootstrap());
+    }
+  }, [isAuthenticated, bootstrap.loaded, bootstrap.loading, bootstrap.error]);
+
+  // Pages render once the store is hydrated (or bootstrapping failed and they fetch their own data)
+  if (loading || (isAuthenticated && !bootstrap.loaded && !bootstrap.error)) {
     return <LoadingSpinner />;
   }
 
@@ -1,20 +1,23 @@
 import React, { useState, useEffect } from 'react';
 import { useDispatch } from 'react-redux';
-import { useNavigate } from 'react-router-dom';
-import { useAuthStatus, useUsers, useFeedback } from '../store/hooks';
-import { fetchTeamMembers } from '../store/slices/userSlice';
+import { useLocation, useNavigate } from 'react-router-dom';
+import { useAuthStatus, useBootstrap, useFeedback } from '../store/hooks';
 import { fetchTags, createFeedback } from '../store/slices/feedbackSlice';
 import { addNotification } from '../store/slices/uiSlice';
 import LoadingSpinner from './LoadingSpinner';
+import UserSearch from './UserSearch';
 
 function CreateFeedback() {
   const { user } = useAuthStatus();
-  const { teamMembers, loading: usersLoading } = useUsers();
   const { tags, createLoading, tagsLoading } = useFeedback();
+  const { loaded: bootstrapped } = useBootstrap();
   const dispatch = useDispatch();
   const navigate = useNavigate();
+  const location = useLocation();
+  // Preselected when coming from a feedback request
+  const [employee, setEmployee] = useState(location.state?.employee || null);
   const [form, setForm] = useState({
-    employee_id: '',
+    employee_id: location.state?.employee?.id || '',
     strengths: '',
     areas_to_improve: '',
     sentiment: 'positive',
@@ -26,13 +29,23 @@ function CreateFeedback() {
       navigate('/');
       return;
     }
-    dispatch(fetchTeamMembers());
-    dispatch(fetchTags());
-  }, [dispatch, user?.role, navigate]);
+    // Tags are part of the bootstrap data; team members are searched as the manager types
+    if (!bootstrapped) {
+      dispatch(fetchTags());
+    }
+  }, [dispatch, user?.role, navigate, bootstrapped]);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
 
+    if (!form.employee_id) {
+      dispatch(addNotification({
+        type: 'error',
+        message: 'Please select a team member.'
+      }));
+      return;
+    }
+
     const result = await dispatch(createFeedback(form));
     
     if (createFeedback.fulfilled.match(result)) {
@@ -58,7 +71,12 @@ function CreateFeedback() {
     }));
   };
 
-  if (usersLoading || tagsLoading) {
+  const handleEmployeeSelect = (member) => {
+    setEmployee(member);
+    setForm(prev => ({ ...prev, employee_id: member ? member.id : '' }));
+  };
+
+  if (tagsLoading) {
     return <LoadingSpinner message="Loading form data..." />;
   }
 
@@ -72,20 +90,13 @@ function CreateFeedback() {
             <label htmlFor="employee_id" className="block text-sm font-medium text-gray-700 mb-2">
               Team Member
             </label>
-            <select
+            <UserSearch
               id="employee_id"
-              required
-              value={form.employee_id}
-              onChange={(e) => setForm({...form, employee_id: e.target.value})}
-              className="w-full border border-gray-300 rounded-md px-3 py-2 focus:outline-none focus:ring-indigo-500 focus:border-indigo-500"
-            >
-              <option value="">Select a team member</option>
-              {teamMembers.map((member) => (
-                <option key={member.id} value={member.id}>
-                  {member.full_name} ({member.email})
-                </option>
-              ))}
-            </select>
+              scope="team"
+              placeholder="Search your team by name or email"
+              selected={employee}
+              onSelect={handleEmployeeSelect}
+            />
           </div>
 
           <div>
@@ -1,7 +1,7 @@
 import React, { useEffect } from 'react';
 import { useDispatch } from 'react-redux';
 import { Link } from 'react-router-dom';
-import { useAuthStatus, useDashboard, useFeedback } from '../store/hooks';
+import { useAuthStatus, useBootstrap, useDashboard, useFeedback } from '../store/hooks';
 import { fetchDashboardStats } from '../store/slices/dashboardSlice';
 import { fetchFeedback } from '../store/slices/feedbackSlice';
 import LoadingSpinner from './LoadingSpinner';
@@ -10,15 +10,20 @@ function Dashboard() {
   const { user } = useAuthStatus();
   const { stats, loading: dashboardLoading } = useDashboard();
   const { feedback, loading: feedbackLoading } = useFeedback();
+  const { loaded: bootstrapped, error: bootstrapError } = useBootstrap();
   const dispatch = useDispatch();
 
   useEffect(() => {
+    // Stats and feedback come from the bootstrap request; fetch them only if it failed
+    if (bootstrapped || !bootstrapError) {
+      return;
+    }
     if (user?.role === 'manager') {
       dispatch(fetchDashboardStats());
     } else {
       dispatch(fetchFeedback());
     }
-  }, [dispatch, user?.role]);
+  }, [dispatch, user?.role, bootstrapped, bootstrapError]);
 
   const getSentimentColor = (sentiment) => {
     switch (sentiment) {
@@ -10,6 +10,9 @@ function EmailVerification() {
   const [resendEmail, setResendEmail] = useState('');
   const [resending, setResending] = useState(false);
 
+  // Verification links for a company database carry its name, sent as X-Tenant
+  const tenant = searchParams.get('tenant');
+
   useEffect(() => {
     const token = searchParams.get('token');
     if (token) {
@@ -22,13 +25,13 @@ function EmailVerification() {
 
   const verifyEmail = async (token) => {
     try {
-      const response = await apiService.auth.verifyEmail(token);
+      const response = await apiService.auth.verifyEmail(token, tenant);
       setStatus('success');
       setMessage(response.data.message);
       
       // Redirect to login after 3 seconds
       setTimeout(() => {
-        navigate('/login');
+        navigate(tenant ? `/login?tenant=${encodeURIComponent(tenant)}` : '/login');
       }, 3000);
     } catch (error) {
       setStatus('error');
@@ -42,7 +45,7 @@ function EmailVerification() {
 
     setResending(true);
     try {
-      const response = await apiService.auth.resendVerification(resendEmail);
+      const response = await apiService.auth.resendVerification(resendEmail, tenant);
       alert('Verification email sent successfully! Please check your inbox.');
       setResendEmail('');
     } catch (error) {
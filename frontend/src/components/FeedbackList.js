@@ -1,6 +1,6 @@
 import React, { useEffect } from 'react';
 import { useDispatch } from 'react-redux';
-import { useAuthStatus, useFeedback, useUI } from '../store/hooks';
+import { useAuthStatus, useBootstrap, useFeedback, useUI } from '../store/hooks';
 import { fetchFeedback, updateFeedback, acknowledgeFeedback, optimisticAcknowledge, rollbackAcknowledge, deleteFeedback } from '../store/slices/feedbackSlice';
 import { setEditingFeedback, clearEditingFeedback, updateEditingForm, addNotification } from '../store/slices/uiSlice';
 import ReactMarkdown from 'react-markdown';
@@ -10,11 +10,15 @@ function FeedbackList() {
   const { user } = useAuthStatus();
   const { feedback, loading } = useFeedback();
   const { editingFeedbackId, editingUserForm } = useUI();
+  const { loaded: bootstrapped, feedbackComplete } = useBootstrap();
   const dispatch = useDispatch();
 
   useEffect(() => {
-    dispatch(fetchFeedback());
-  }, [dispatch]);
+    // Bootstrap includes the newest page; fetch the full list only when there is more
+    if (!bootstrapped || !feedbackComplete) {
+      dispatch(fetchFeedback());
+    }
+  }, [dispatch, bootstrapped, feedbackComplete]);
 
   const handleAcknowledgeFeedback = async (feedbackId) => {
     // Optimistic update
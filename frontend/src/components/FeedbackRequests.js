@@ -1,21 +1,64 @@
 import React, { useState, useEffect } from 'react';
 import { useDispatch } from 'react-redux';
-import { useAuthStatus, useFeedback } from '../store/hooks';
-import { fetchFeedbackRequests, createFeedbackRequest } from '../store/slices/feedbackSlice';
+import { Link } from 'react-router-dom';
+import { useAuthStatus, useBootstrap, useFeedback } from '../store/hooks';
+import {
+  fetchFeedbackRequests,
+  fetchFeedbackRequestCounts,
+  createFeedbackRequest,
+  respondToFeedbackRequest,
+} from '../store/slices/feedbackSlice';
 import { addNotification } from '../store/slices/uiSlice';
 import LoadingSpinner from './LoadingSpinner';
 
+const STATUS_FILTERS = ['pending', 'completed', 'declined'];
+
 function FeedbackRequests() {
   const { user } = useAuthStatus();
-  const { feedbackRequests, requestsLoading } = useFeedback();
+  const { feedbackRequests, requestsLoading, requestCounts } = useFeedback();
+  const { loaded: bootstrapped, requestsComplete } = useBootstrap();
   const dispatch = useDispatch();
   const [showCreateForm, setShowCreateForm] = useState(false);
   const [newRequest, setNewRequest] = useState({ message: '' });
+  const [statusFilter, setStatusFilter] = useState(null);
+  const [respondingId, setRespondingId] = useState(null);
+
+  useEffect(() => {
+    // Bootstrap includes the newest page; fetch the full list only when there is more
+    if (!bootstrapped || !requestsComplete) {
+      dispatch(fetchFeedbackRequests());
+    }
+  }, [dispatch, bootstrapped, requestsComplete]);
 
   useEffect(() => {
-    dispatch(fetchFeedbackRequests());
+    dispatch(fetchFeedbackRequestCounts());
   }, [dispatch]);
 
+  const handleRespond = async (request, action) => {
+    setRespondingId(request.id);
+    const result = await dispatch(respondToFeedbackRequest({ id: request.id, action }));
+    setRespondingId(null);
+
+    if (respondToFeedbackRequest.fulfilled.match(result)) {
+      dispatch(addNotification({
+        type: 'success',
+        message: action === 'complete' ? 'Request marked as completed.' : 'Request declined.'
+      }));
+    } else {
+      dispatch(addNotification({
+        type: 'error',
+        message: result.payload || 'Error updating request. Please try again.'
+      }));
+      // Someone else may have answered it; show the current state
+      dispatch(fetchFeedbackRequests());
+      dispatch(fetchFeedbackRequestCounts());
+    }
+  };
+
+  const visibleRequests = statusFilter
+    ? feedbackRequests.filter((request) => request.status === statusFilter)
+    : feedbackRequests;
+
   const handleCreateRequest = async (e) => {
     e.preventDefault();
 
@@ -112,19 +155,38 @@ function FeedbackRequests() {
           </div>
         )}
 
-        {feedbackRequests.length === 0 ? (
+        <div className="flex space-x-2 mb-6">
+          {[null, ...STATUS_FILTERS].map((status) => (
+            <button
+              key={status || 'all'}
+              onClick={() => setStatusFilter(status)}
+              className={`px-3 py-1 rounded-full text-sm font-medium capitalize ${
+                statusFilter === status
+                  ? 'bg-indigo-100 text-indigo-700'
+                  : 'text-gray-500 hover:text-gray-700'
+              }`}
+            >
+              {status || 'all'}
+              {status && requestCounts && ` (${requestCounts[status]})`}
+            </button>
+          ))}
+        </div>
+
+        {visibleRequests.length === 0 ? (
           <div className="text-center py-12">
             <p className="text-gray-500 text-lg">
-              {user?.role === 'manager' 
-                ? 'No feedback requests from your team yet.'
-                : 'You haven\'t requested any feedback yet.'
+              {statusFilter
+                ? `No ${statusFilter} feedback requests.`
+                : user?.role === 'manager' 
+                  ? 'No feedback requests from your team yet.'
+                  : 'You haven\'t requested any feedback yet.'
               }
             </p>
           </div>
         ) : (
           <div className="bg-white shadow overflow-hidden sm:rounded-md">
             <ul className="divide-y divide-gray-200">
-              {feedbackRequests.map((request) => (
+              {visibleRequests.map((request) => (
                 <li key={request.id} className="px-6 py-4">
                   <div className="flex items-center justify-between">
                     <div className="flex-1">
@@ -150,8 +212,31 @@ function FeedbackRequests() {
                       {user?.role === 'manager' && request.status === 'pending' && (
                         <div className="mt-3">
                           <p className="text-sm text-gray-500 mb-2">
-                            You can create feedback for this employee to address their request.
+                            Giving this employee feedback completes their request.
                           </p>
+                          <div className="flex space-x-2">
+                            <Link
+                              to="/feedback/create"
+                              state={{ employee: request.employee }}
+                              className="bg-indigo-600 hover:bg-indigo-700 text-white px-3 py-1 rounded-md text-sm font-medium"
+                            >
+                              Give Feedback
+                            </Link>
+                            <button
+                              onClick={() => handleRespond(request, 'complete')}
+                              disabled={respondingId === request.id}
+                              className="bg-green-100 hover:bg-green-200 text-green-700 px-3 py-1 rounded-md text-sm font-medium disabled:opacity-50"
+                            >
+                              Mark Completed
+                            </button>
+                            <button
+                              onClick={() => handleRespond(request, 'decline')}
+                              disabled={respondingId === request.id}
+                              className="bg-red-100 hover:bg-red-200 text-red-700 px-3 py-1 rounded-md text-sm font-medium disabled:opacity-50"
+                            >
+                              Decline
+                            </button>
+                          </div>
                         </div>
                       )}
                     </div>
@@ -1,6 +1,6 @@
 import React, { useState } from "react";
 import { useAuthStatus } from "../store/hooks";
-import { Navigate } from "react-router-dom";
+import { Navigate, useSearchParams } from "react-router-dom";
 import { useDispatch } from "react-redux";
 import { loginUser, resendVerification, clearError } from "../store/slices/authSlice";
 import { addNotification } from "../store/slices/uiSlice";
@@ -8,6 +8,10 @@ import { addNotification } from "../store/slices/uiSlice";
 function Login() {
   const [email, setEmail] = useState("");
   const [password, setPassword] = useState("");
+  const [searchParams] = useSearchParams();
+  // Company database to sign in to: from an emailed link, or the one used last on this browser
+  const [tenant, setTenant] = useState(searchParams.get("tenant") || localStorage.getItem("tenant") || "");
+  const showTenant = process.env.REACT_APP_MULTI_TENANT === "true" || Boolean(tenant);
   const dispatch = useDispatch();
   
   const { 
@@ -27,7 +31,7 @@ function Login() {
     e.preventDefault();
     dispatch(clearError());
     
-    const result = await dispatch(loginUser({ email, password }));
+    const result = await dispatch(loginUser({ email, password, tenant: tenant.trim() }));
     
     if (loginUser.fulfilled.match(result)) {
       dispatch(addNotification({
@@ -38,7 +42,7 @@ function Login() {
   };
 
   const handleResendVerification = async () => {
-    const result = await dispatch(resendVerification(verificationEmail || email));
+    const result = await dispatch(resendVerification({ email: verificationEmail || email, tenant: tenant.trim() }));
     
     if (resendVerification.fulfilled.match(result)) {
       dispatch(addNotification({
@@ -77,11 +81,22 @@ function Login() {
             </div>
           )}
           <div className="rounded-md shadow-sm -space-y-px">
+            {showTenant && (
+              <div>
+                <input
+                  type="text"
+                  className="appearance-none rounded-none relative block w-full px-3 py-2 border border-gray-300 placeholder-gray-500 text-gray-900 rounded-t-md focus:outline-none focus:ring-indigo-500 focus:border-indigo-500 focus:z-10 sm:text-sm"
+                  placeholder="Company (leave empty for the default)"
+                  value={tenant}
+                  onChange={(e) => setTenant(e.target.value)}
+                />
+              </div>
+            )}
             <div>
               <input
                 type="email"
                 required
-                className="appearance-none rounded-none relative block w-full px-3 py-2 border border-gray-300 placeholder-gray-500 text-gray-900 rounded-t-md focus:outline-none focus:ring-indigo-500 focus:border-indigo-500 focus:z-10 sm:text-sm"
+                className={`appearance-none rounded-none relative block w-full px-3 py-2 border border-gray-300 placeholder-gray-500 text-gray-900 ${showTenant ? '' : 'rounded-t-md'} focus:outline-none focus:ring-indigo-500 focus:border-indigo-500 focus:z-10 sm:text-sm`}
                 placeholder="Email address"
                 value={email}
                 onChange={(e) => setEmail(e.target.value)}
@@ -1,14 +1,23 @@
-import React from 'react';
+import React, { useEffect } from 'react';
 import { Link, useLocation } from 'react-router-dom';
 import { useDispatch } from 'react-redux';
-import { useAuthStatus } from '../store/hooks';
-import { logout } from '../store/slices/authSlice';
+import { useAuthStatus, useFeedback } from '../store/hooks';
+import { logoutUser } from '../store/slices/authSlice';
+import { fetchFeedbackRequestCounts } from '../store/slices/feedbackSlice';
 import { addNotification } from '../store/slices/uiSlice';
 
 function Navbar() {
   const { user } = useAuthStatus();
   const dispatch = useDispatch();
   const location = useLocation();
+  const { requestCounts } = useFeedback();
+
+  useEffect(() => {
+    // Pending inbox size for the badge
+    if (user?.role === 'manager') {
+      dispatch(fetchFeedbackRequestCounts());
+    }
+  }, [dispatch, user?.role]);
 
   const isActive = (path) => location.pathname === path;
 
@@ -67,6 +76,11 @@ function Navbar() {
               }`}
             >
               {user?.role === 'manager' ? 'Feedback Requests' : 'My Requests'}
+              {user?.role === 'manager' && requestCounts?.pending > 0 && (
+                <span className="ml-2 inline-flex items-center px-2 py-0.5 rounded-full text-xs font-medium bg-indigo-600 text-white">
+                  {requestCounts.pending}
+                </span>
+              )}
             </Link>
             
             {user?.role === 'manager' && (
@@ -88,7 +102,7 @@ function Navbar() {
               </span>
               <button
                 onClick={() => {
-                  dispatch(logout());
+                  dispatch(logoutUser());
                   dispatch(addNotification({
                     type: 'success',
                     message: 'Logged out successfully!',
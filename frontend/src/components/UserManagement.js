@@ -1,8 +1,7 @@
 import React, { useState, useEffect } from "react";
 import { useDispatch } from "react-redux";
-import { useAuthStatus, useUsers } from "../store/hooks";
+import { useAuthStatus, useUsers, useUserSearch } from "../store/hooks";
 import {
-  fetchUsers,
   fetchManagers,
   createUser,
   deleteUser,
@@ -11,9 +10,16 @@ import { addNotification } from "../store/slices/uiSlice";
 
 function UserManagement() {
   const { user } = useAuthStatus();
-  const { users, managers, loading, createLoading, createError } = useUsers();
+  const { managers, loading, createLoading, createError } = useUsers();
   const dispatch = useDispatch();
   const [showCreateForm, setShowCreateForm] = useState(false);
+  const [query, setQuery] = useState("");
+  const {
+    results: users,
+    setResults,
+    searching,
+    error: searchError,
+  } = useUserSearch(query, { limit: 50 });
   const [newUser, setNewUser] = useState({
     email: "",
     password: "",
@@ -26,7 +32,8 @@ function UserManagement() {
     if (user?.role !== "manager") {
       return;
     }
-    dispatch(fetchUsers());
+    // Only managers are loaded up front (for the manager picker and names);
+    // other users are found through search instead of loading all of them
     dispatch(fetchManagers());
   }, [dispatch, user?.role]);
 
@@ -75,6 +82,7 @@ function UserManagement() {
       const result = await dispatch(deleteUser(userId));
 
       if (deleteUser.fulfilled.match(result)) {
+        setResults((results) => results.filter((u) => u.id !== userId));
         dispatch(
           addNotification({
             type: "success",
@@ -274,16 +282,32 @@ function UserManagement() {
         <div className="bg-white shadow overflow-hidden sm:rounded-md">
           <div className="px-4 py-5 sm:px-6">
             <h3 className="text-lg leading-6 font-medium text-gray-900">
-              All Users ({users.length})
+              Find Users
             </h3>
             <p className="mt-1 max-w-2xl text-sm text-gray-500">
               Manage employees and managers in your organization.
             </p>
+            <input
+              type="text"
+              aria-label="Search users"
+              value={query}
+              onChange={(e) => setQuery(e.target.value)}
+              className="mt-4 w-full border border-gray-300 rounded-md px-3 py-2 focus:outline-none focus:ring-indigo-500 focus:border-indigo-500"
+              placeholder="Search by name or email"
+            />
           </div>
           <ul className="divide-y divide-gray-200">
-            {users.length === 0 ? (
+            {searchError ? (
+              <li className="px-4 py-4 text-red-500 text-center">
+                {searchError}
+              </li>
+            ) : !query.trim() ? (
+              <li className="px-4 py-4 text-gray-500 text-center">
+                Type a name or email to find users.
+              </li>
+            ) : users.length === 0 ? (
               <li className="px-4 py-4 text-gray-500 text-center">
-                No users found.
+                {searching ? "Searching..." : "No users found."}
               </li>
             ) : (
               users.map((userItem) => (
@@ -323,8 +347,9 @@ function UserManagement() {
                           {userItem.manager_id && (
                             <span className="text-xs text-gray-500">
                               Manager:{" "}
-                              {users.find((u) => u.id === userItem.manager_id)
-                                ?.full_name || "Unknown"}
+                              {managers.find(
+                                (m) => m.id === userItem.manager_id
+                              )?.full_name || "Unknown"}
                             </span>
                           )}
                           <span className="text-xs text-gray-500">
@@ -0,0 +1,80 @@
+import React, { useState } from 'react';
+import { useUserSearch } from '../store/hooks';
+
+// Typeahead picker backed by GET /users/search; only the matches are loaded,
+// never the whole user list
+function UserSearch({ id, scope = 'all', role, placeholder, selected, onSelect }) {
+  const [query, setQuery] = useState('');
+  const [open, setOpen] = useState(false);
+  const { results, searching, error } = useUserSearch(query, { scope, role });
+
+  const handleSelect = (user) => {
+    onSelect(user);
+    setQuery('');
+    setOpen(false);
+  };
+
+  if (selected) {
+    return (
+      <div className="flex items-center justify-between w-full border border-gray-300 rounded-md px-3 py-2">
+        <span className="text-sm text-gray-900">
+          {selected.full_name} <span className="text-gray-500">({selected.email})</span>
+        </span>
+        <button
+          type="button"
+          onClick={() => onSelect(null)}
+          className="text-sm text-indigo-600 hover:text-indigo-800 font-medium"
+        >
+          Change
+        </button>
+      </div>
+    );
+  }
+
+  return (
+    <div className="relative">
+      <input
+        type="text"
+        id={id}
+        autoComplete="off"
+        value={query}
+        onChange={(e) => {
+          setQuery(e.target.value);
+          setOpen(true);
+        }}
+        onFocus={() => setOpen(true)}
+        // Delayed so a click on a result lands before the list closes
+        onBlur={() => setTimeout(() => setOpen(false), 150)}
+        placeholder={placeholder}
+        className="w-full border border-gray-300 rounded-md px-3 py-2 focus:outline-none focus:ring-indigo-500 focus:border-indigo-500"
+      />
+      {open && query.trim() && (
+        <ul className="absolute z-10 mt-1 w-full bg-white shadow-lg rounded-md border border-gray-200 max-h-60 overflow-auto">
+          {error ? (
+            <li className="px-3 py-2 text-sm text-red-500">{error}</li>
+          ) : results.length === 0 ? (
+            <li className="px-3 py-2 text-sm text-gray-500">
+              {searching ? 'Searching...' : 'No matching users'}
+            </li>
+          ) : (
+            results.map((user) => (
+              <li key={user.id}>
+                <button
+                  type="button"
+                  onMouseDown={(e) => e.preventDefault()}
+                  onClick={() => handleSelect(user)}
+                  className="w-full text-left px-3 py-2 text-sm hover:bg-indigo-50"
+                >
+                  <span className="text-gray-900">{user.full_name}</span>{' '}
+                  <span className="text-gray-500">({user.email})</span>
+                </button>
+              </li>
+            ))
+          )}
+        </ul>
+      )}
+    </div>
+  );
+}
+
+export default UserSearch;
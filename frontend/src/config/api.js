@@ -13,6 +13,28 @@ const api = axios.create({
   },
 });
 
+// Conditional GETs: the last ETag and body per user and URL. The server answers
+// 304 Not Modified when the data has not changed, and the cached body is reused.
+const etagCache = new Map();
+
+const cacheKey = (config) => `${config.headers.Authorization || ''} ${config.url} ${JSON.stringify(config.params || {})}`;
+
+export const clearEtagCache = () => etagCache.clear();
+
+// Creates carry an Idempotency-Key, so a request that timed out while the server
+// was busy can be retried without creating a duplicate
+const IDEMPOTENT_RETRIES = 2;
+
+const withIdempotencyKey = (key) => ({ headers: { 'Idempotency-Key': key } });
+
+// Requests made before login name the tenant (company) database; after login the token carries it
+const withTenant = (tenant) => (tenant ? { headers: { 'X-Tenant': tenant } } : {});
+
+const retryDelay = (error, attempt) => {
+  const retryAfter = parseInt(error.response?.headers?.['retry-after']);
+  return (retryAfter || 0.5 * 2 ** attempt) * 1000;
+};
+
 // Request interceptor to add auth token
 api.interceptors.request.use(
   (config) => {
@@ -20,6 +42,13 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    if (config.method === 'get') {
+      const cached = etagCache.get(cacheKey(config));
+      if (cached) {
+        config.headers['If-None-Match'] = cached.etag;
+      }
+      config.validateStatus = (status) => (status >= 200 && status < 300) || status === 304;
+    }
     return config;
   },
   (error) => {
@@ -30,14 +59,40 @@ api.interceptors.request.use(
 // Response interceptor for error handling
 api.interceptors.response.use(
   (response) => {
+    if (response.config.method === 'get') {
+      const key = cacheKey(response.config);
+      if (response.status === 304) {
+        if (etagCache.has(key)) {
+          return { ...response, status: 200, data: etagCache.get(key).data };
+        }
+        // The cache was cleared (logout, 401) while this request was in flight: fetch the body again
+        if (!response.config.etagRetried) {
+          const config = { ...response.config, etagRetried: true };
+          delete config.headers['If-None-Match'];
+          return api(config);
+        }
+      }
+      if (response.headers.etag) {
+        etagCache.set(key, { etag: response.headers.etag, data: response.data });
+      }
+    }
     return response;
   },
-  (error) => {
+  async (error) => {
+    const config = error.config;
+    const retryable = !error.response || error.response.status === 503 || error.response.status === 409;
+    if (config?.headers?.['Idempotency-Key'] && retryable && (config.retries || 0) < IDEMPOTENT_RETRIES) {
+      config.retries = (config.retries || 0) + 1;
+      await new Promise((resolve) => setTimeout(resolve, retryDelay(error, config.retries - 1)));
+      return api(config);
+    }
+    
     // Handle common errors
     if (error.response?.status === 401) {
       // Token expired or invalid
       localStorage.removeItem('token');
       delete api.defaults.headers.common['Authorization'];
+      clearEtagCache();
       window.location.href = '/login';
     }
     return Promise.reject(error);
@@ -52,6 +107,7 @@ export const API_ENDPOINTS = {
     ME: '/auth/me',
     VERIFY_EMAIL: '/auth/verify-email',
     RESEND_VERIFICATION: '/auth/resend-verification',
+    LOGOUT: '/auth/logout',
   },
   
   // Users
@@ -60,6 +116,7 @@ export const API_ENDPOINTS = {
     LIST: '/users',
     TEAM: '/users/team',
     MANAGERS: '/users/managers',
+    SEARCH: '/users/search',
   },
   
   // Feedback
@@ -80,36 +137,46 @@ export const API_ENDPOINTS = {
   FEEDBACK_REQUESTS: {
     CREATE: '/feedback-requests',
     LIST: '/feedback-requests',
+    COUNTS: '/feedback-requests/counts',
+    COMPLETE: (id) => `/feedback-requests/${id}/complete`,
+    DECLINE: (id) => `/feedback-requests/${id}/decline`,
   },
   
   // Dashboard
   DASHBOARD: {
     STATS: '/dashboard/stats',
   },
+  
+  // Startup data for the store
+  BOOTSTRAP: '/bootstrap',
 };
 
 // API Service Functions
 export const apiService = {
   // Authentication
   auth: {
-    login: (credentials) => api.post(API_ENDPOINTS.AUTH.LOGIN, credentials),
+    login: (credentials, tenant) => api.post(API_ENDPOINTS.AUTH.LOGIN, credentials, withTenant(tenant)),
     getMe: () => api.get(API_ENDPOINTS.AUTH.ME),
-    verifyEmail: (token) => api.post(API_ENDPOINTS.AUTH.VERIFY_EMAIL, null, { params: { token } }),
-    resendVerification: (email) => api.post(API_ENDPOINTS.AUTH.RESEND_VERIFICATION, null, { params: { email } }),
+    verifyEmail: (token, tenant) => api.post(API_ENDPOINTS.AUTH.VERIFY_EMAIL, null, { params: { token }, ...withTenant(tenant) }),
+    resendVerification: (email, tenant) => api.post(API_ENDPOINTS.AUTH.RESEND_VERIFICATION, null, { params: { email }, ...withTenant(tenant) }),
+    logout: () => api.post(API_ENDPOINTS.AUTH.LOGOUT),
   },
   
   // Users
   users: {
-    create: (userData) => api.post(API_ENDPOINTS.USERS.CREATE, userData),
+    create: (userData, idempotencyKey) => api.post(API_ENDPOINTS.USERS.CREATE, userData, withIdempotencyKey(idempotencyKey)),
     getAll: () => api.get(API_ENDPOINTS.USERS.LIST),
     getTeam: () => api.get(API_ENDPOINTS.USERS.TEAM),
     getManagers: () => api.get(API_ENDPOINTS.USERS.MANAGERS),
+    // scope: 'all' or 'team'; pass an AbortController signal to cancel superseded searches
+    search: (q, { scope = 'all', role, limit = 10, signal } = {}) =>
+      api.get(API_ENDPOINTS.USERS.SEARCH, { params: { q, scope, role, limit }, signal }),
     delete: (id) => api.delete(`/users/${id}`),
   },
   
   // Feedback
   feedback: {
-    create: (feedbackData) => api.post(API_ENDPOINTS.FEEDBACK.CREATE, feedbackData),
+    create: (feedbackData, idempotencyKey) => api.post(API_ENDPOINTS.FEEDBACK.CREATE, feedbackData, withIdempotencyKey(idempotencyKey)),
     getAll: () => api.get(API_ENDPOINTS.FEEDBACK.LIST),
     update: (id, updateData) => api.put(API_ENDPOINTS.FEEDBACK.UPDATE(id), updateData),
     acknowledge: (id) => api.post(API_ENDPOINTS.FEEDBACK.ACKNOWLEDGE(id)),
@@ -124,14 +191,23 @@ export const apiService = {
   
   // Feedback Requests
   feedbackRequests: {
-    create: (requestData) => api.post(API_ENDPOINTS.FEEDBACK_REQUESTS.CREATE, requestData),
-    getAll: () => api.get(API_ENDPOINTS.FEEDBACK_REQUESTS.LIST),
+    create: (requestData, idempotencyKey) => api.post(API_ENDPOINTS.FEEDBACK_REQUESTS.CREATE, requestData, withIdempotencyKey(idempotencyKey)),
+    // status: 'pending', 'completed' or 'declined'; all requests when omitted
+    getAll: (status) => api.get(API_ENDPOINTS.FEEDBACK_REQUESTS.LIST, { params: { status } }),
+    getCounts: () => api.get(API_ENDPOINTS.FEEDBACK_REQUESTS.COUNTS),
+    complete: (id) => api.post(API_ENDPOINTS.FEEDBACK_REQUESTS.COMPLETE(id)),
+    decline: (id) => api.post(API_ENDPOINTS.FEEDBACK_REQUESTS.DECLINE(id)),
   },
   
   // Dashboard
   dashboard: {
     getStats: () => api.get(API_ENDPOINTS.DASHBOARD.STATS),
   },
+  
+  // Bootstrap
+  bootstrap: {
+    get: () => api.get(API_ENDPOINTS.BOOTSTRAP),
+  },
 };
 
 export default api;
\ No newline at end of file
@@ -1,6 +1,7 @@
 import { useSelector, useDispatch } from 'react-redux';
-import { useMemo } from 'react';
+import { useEffect, useMemo, useState } from 'react';
 import { createSelector } from '@reduxjs/toolkit';
+import { apiService } from '../config/api';
 
 // Typed hooks for better TypeScript support (optional)
 export const useAppDispatch = () => useDispatch();
@@ -47,6 +48,10 @@ export const useDashboard = () => {
   }), [dashboard, dispatch]);
 };
 
+export const useBootstrap = () => {
+  return useAppSelector((state) => state.bootstrap);
+};
+
 export const useUI = () => {
   const ui = useAppSelector((state) => state.ui);
   const dispatch = useAppDispatch();
@@ -57,6 +62,46 @@ export const useUI = () => {
   }), [ui, dispatch]);
 };
 
+// Typeahead over GET /users/search: waits for a pause in typing and cancels
+// the request of a query that was replaced before its response arrived
+const SEARCH_DELAY_MS = 200;
+
+export const useUserSearch = (query, { scope = 'all', role, limit = 10 } = {}) => {
+  const [results, setResults] = useState([]);
+  const [searching, setSearching] = useState(false);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setResults([]);
+      setSearching(false);
+      return undefined;
+    }
+    const controller = new AbortController();
+    setSearching(true);
+    const timer = setTimeout(async () => {
+      try {
+        const response = await apiService.users.search(q, { scope, role, limit, signal: controller.signal });
+        setResults(response.data);
+        setError(null);
+      } catch (err) {
+        if (controller.signal.aborted) {
+          return;
+        }
+        setError(err.response?.data?.detail || 'Failed to search users');
+      }
+      setSearching(false);
+    }, SEARCH_DELAY_MS);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query, scope, role, limit]);
+
+  return { results, setResults, searching, error };
+};
+
 // Selector hooks for computed values
 export const useAuthStatus = () => {
   return useAppSelector((state) => ({
@@ -9,6 +9,7 @@ import userSlice from './slices/userSlice';
 import feedbackSlice from './slices/feedbackSlice';
 import dashboardSlice from './slices/dashboardSlice';
 import uiSlice from './slices/uiSlice';
+import bootstrapSlice from './slices/bootstrapSlice';
 
 // Persist configuration
 const persistConfig = {
@@ -24,6 +25,7 @@ const rootReducer = combineReducers({
   feedback: feedbackSlice,
   dashboard: dashboardSlice,
   ui: uiSlice,
+  bootstrap: bootstrapSlice,
 });
 
 // Persisted reducer
@@ -1,12 +1,13 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
-import { apiService } from '../../config/api';
+import { apiService, clearEtagCache } from '../../config/api';
+import { fetchBootstrap } from './bootstrapSlice';
 
 // Async thunks for authentication
 export const loginUser = createAsyncThunk(
   'auth/loginUser',
-  async ({ email, password }, { rejectWithValue }) => {
+  async ({ email, password, tenant }, { rejectWithValue }) => {
     try {
-      const response = await apiService.auth.login({ email, password });
+      const response = await apiService.auth.login({ email, password }, tenant);
       const { access_token, user } = response.data;
       
       // Check if user is verified
@@ -20,6 +21,12 @@ export const loginUser = createAsyncThunk(
       
       // Store token in localStorage
       localStorage.setItem('token', access_token);
+      // Remembered for the next login on this browser
+      if (tenant) {
+        localStorage.setItem('tenant', tenant);
+      } else {
+        localStorage.removeItem('tenant');
+      }
       
       return { user, token: access_token };
     } catch (error) {
@@ -46,9 +53,9 @@ export const fetchCurrentUser = createAsyncThunk(
 
 export const resendVerification = createAsyncThunk(
   'auth/resendVerification',
-  async (email, { rejectWithValue }) => {
+  async ({ email, tenant }, { rejectWithValue }) => {
     try {
-      const response = await apiService.auth.resendVerification(email);
+      const response = await apiService.auth.resendVerification(email, tenant);
       return response.data;
     } catch (error) {
       return rejectWithValue(error.response?.data?.detail || 'Failed to send verification email');
@@ -58,9 +65,9 @@ export const resendVerification = createAsyncThunk(
 
 export const verifyEmail = createAsyncThunk(
   'auth/verifyEmail',
-  async (token, { rejectWithValue }) => {
+  async ({ token, tenant }, { rejectWithValue }) => {
     try {
-      const response = await apiService.auth.verifyEmail(token);
+      const response = await apiService.auth.verifyEmail(token, tenant);
       return response.data;
     } catch (error) {
       return rejectWithValue(error.response?.data?.detail || 'Email verification failed');
@@ -68,6 +75,19 @@ export const verifyEmail = createAsyncThunk(
   }
 );
 
+// Revokes the token on the server, then clears the local session even if that failed
+export const logoutUser = createAsyncThunk(
+  'auth/logoutUser',
+  async (_, { dispatch }) => {
+    try {
+      await apiService.auth.logout();
+    } catch (error) {
+      // The token is dropped locally either way
+    }
+    dispatch(authSlice.actions.logout());
+  }
+);
+
 // Initial state
 const initialState = {
   user: null,
@@ -90,6 +110,7 @@ const authSlice = createSlice({
   reducers: {
     logout: (state) => {
       localStorage.removeItem('token');
+      clearEtagCache();
       state.user = null;
       state.token = null;
       state.isAuthenticated = false;
@@ -131,6 +152,11 @@ const authSlice = createSlice({
         state.verificationEmail = action.payload.email;
       })
       
+      // Startup data carries a fresh copy of the profile
+      .addCase(fetchBootstrap.fulfilled, (state, action) => {
+        state.user = action.payload.user;
+      })
+      
       // Fetch current user
       .addCase(fetchCurrentUser.pending, (state) => {
         state.loading = true;
@@ -0,0 +1,54 @@
+import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
+import { apiService } from '../../config/api';
+
+// Loads everything the app shows on startup in one request; the other slices
+// hydrate themselves from fetchBootstrap.fulfilled
+export const fetchBootstrap = createAsyncThunk(
+  'bootstrap/fetchBootstrap',
+  async (_, { rejectWithValue }) => {
+    try {
+      const response = await apiService.bootstrap.get();
+      return response.data;
+    } catch (error) {
+      return rejectWithValue(error.response?.data?.detail || 'Failed to load application data');
+    }
+  }
+);
+
+// Initial state
+const initialState = {
+  loaded: false,
+  loading: false,
+  error: null,
+  // False when only the newest page was included; the list pages then fetch the rest
+  feedbackComplete: false,
+  requestsComplete: false,
+};
+
+// Bootstrap slice
+const bootstrapSlice = createSlice({
+  name: 'bootstrap',
+  initialState,
+  reducers: {},
+  extraReducers: (builder) => {
+    builder
+      .addCase(fetchBootstrap.pending, (state) => {
+        state.loading = true;
+        state.error = null;
+      })
+      .addCase(fetchBootstrap.fulfilled, (state, action) => {
+        state.loading = false;
+        state.loaded = true;
+        state.feedbackComplete = action.payload.feedback_complete;
+        state.requestsComplete = action.payload.feedback_requests_complete;
+      })
+      .addCase(fetchBootstrap.rejected, (state, action) => {
+        state.loading = false;
+        state.error = action.payload;
+      })
+      // The next user loads their own data
+      .addCase('auth/logout', () => initialState);
+  },
+});
+
+export default bootstrapSlice.reducer;
@@ -1,5 +1,6 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import { apiService } from '../../config/api';
+import { fetchBootstrap } from './bootstrapSlice';
 
 // Async thunks for dashboard
 export const fetchDashboardStats = createAsyncThunk(
@@ -76,6 +77,13 @@ const dashboardSlice = createSlice({
   },
   extraReducers: (builder) => {
     builder
+      // Startup data (managers only)
+      .addCase(fetchBootstrap.fulfilled, (state, action) => {
+        if (action.payload.stats) {
+          state.stats = action.payload.stats;
+        }
+      })
+      
       .addCase(fetchDashboardStats.pending, (state) => {
         state.loading = true;
         state.error = null;
@@ -1,5 +1,6 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import { apiService } from '../../config/api';
+import { fetchBootstrap } from './bootstrapSlice';
 
 // Async thunks for feedback management
 export const fetchFeedback = createAsyncThunk(
@@ -16,9 +17,10 @@ export const fetchFeedback = createAsyncThunk(
 
 export const createFeedback = createAsyncThunk(
   'feedback/createFeedback',
-  async (feedbackData, { rejectWithValue }) => {
+  async (feedbackData, { rejectWithValue, requestId }) => {
     try {
-      const response = await apiService.feedback.create(feedbackData);
+      // The thunk's requestId doubles as the Idempotency-Key for retries of this create
+      const response = await apiService.feedback.create(feedbackData, requestId);
       return response.data;
     } catch (error) {
       return rejectWithValue(error.response?.data?.detail || 'Failed to create feedback');
@@ -88,9 +90,9 @@ export const fetchFeedbackRequests = createAsyncThunk(
 
 export const createFeedbackRequest = createAsyncThunk(
   'feedback/createFeedbackRequest',
-  async (requestData, { rejectWithValue }) => {
+  async (requestData, { rejectWithValue, requestId }) => {
     try {
-      const response = await apiService.feedbackRequests.create(requestData);
+      const response = await apiService.feedbackRequests.create(requestData, requestId);
       return response.data;
     } catch (error) {
       return rejectWithValue(error.response?.data?.detail || 'Failed to create feedback request');
@@ -98,6 +100,31 @@ export const createFeedbackRequest = createAsyncThunk(
   }
 );
 
+export const fetchFeedbackRequestCounts = createAsyncThunk(
+  'feedback/fetchFeedbackRequestCounts',
+  async (_, { rejectWithValue }) => {
+    try {
+      const response = await apiService.feedbackRequests.getCounts();
+      return response.data;
+    } catch (error) {
+      return rejectWithValue(error.response?.data?.detail || 'Failed to fetch feedback request counts');
+    }
+  }
+);
+
+// action: 'complete' or 'decline'
+export const respondToFeedbackRequest = createAsyncThunk(
+  'feedback/respondToFeedbackRequest',
+  async ({ id, action }, { rejectWithValue }) => {
+    try {
+      const response = await apiService.feedbackRequests[action](id);
+      return response.data;
+    } catch (error) {
+      return rejectWithValue(error.response?.data?.detail || 'Failed to update feedback request');
+    }
+  }
+);
+
 export const deleteFeedback = createAsyncThunk(
   'feedback/deleteFeedback',
   async (feedbackId, { rejectWithValue }) => {
@@ -115,6 +142,8 @@ const initialState = {
   feedback: [],
   tags: [],
   feedbackRequests: [],
+  // { pending, completed, declined } for the user's requests (a manager's inbox); null until fetched
+  requestCounts: null,
   loading: false,
   createLoading: false,
   updateLoading: false,
@@ -145,6 +174,7 @@ const feedbackSlice = createSlice({
     clearFeedback: (state) => {
       state.feedback = [];
       state.feedbackRequests = [];
+      state.requestCounts = null;
     },
     // Optimistic update for acknowledgment
     optimisticAcknowledge: (state, action) => {
@@ -167,6 +197,13 @@ const feedbackSlice = createSlice({
   },
   extraReducers: (builder) => {
     builder
+      // Startup data
+      .addCase(fetchBootstrap.fulfilled, (state, action) => {
+        state.feedback = action.payload.feedback;
+        state.tags = action.payload.tags;
+        state.feedbackRequests = action.payload.feedback_requests;
+      })
+      
       // Fetch feedback
       .addCase(fetchFeedback.pending, (state) => {
         state.loading = true;
@@ -191,6 +228,18 @@ const feedbackSlice = createSlice({
         state.createLoading = false;
         state.feedback.push(action.payload);
         state.createError = null;
+        // The server completes the employee's pending requests with the new feedback
+        state.feedbackRequests.forEach((request) => {
+          if (request.employee_id === action.payload.employee_id && request.status === 'pending') {
+            request.status = 'completed';
+            request.feedback_id = action.payload.id;
+            request.responded_at = action.payload.created_at;
+            if (state.requestCounts) {
+              state.requestCounts.pending -= 1;
+              state.requestCounts.completed += 1;
+            }
+          }
+        });
       })
       .addCase(createFeedback.rejected, (state, action) => {
         state.createLoading = false;
@@ -268,6 +317,26 @@ const feedbackSlice = createSlice({
       // Create feedback request
       .addCase(createFeedbackRequest.fulfilled, (state, action) => {
         state.feedbackRequests.unshift(action.payload);
+        if (state.requestCounts) {
+          state.requestCounts.pending += 1;
+        }
+      })
+      
+      // Feedback request counts
+      .addCase(fetchFeedbackRequestCounts.fulfilled, (state, action) => {
+        state.requestCounts = action.payload;
+      })
+      
+      // Complete or decline a feedback request
+      .addCase(respondToFeedbackRequest.fulfilled, (state, action) => {
+        const index = state.feedbackRequests.findIndex(r => r.id === action.payload.id);
+        if (index !== -1) {
+          state.feedbackRequests[index] = action.payload;
+        }
+        if (state.requestCounts) {
+          state.requestCounts.pending -= 1;
+          state.requestCounts[action.payload.status] += 1;
+        }
       })
       
       // Delete feedback
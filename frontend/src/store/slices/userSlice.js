@@ -1,5 +1,6 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import { apiService } from '../../config/api';
+import { fetchBootstrap } from './bootstrapSlice';
 
 // Async thunks for user management
 export const fetchUsers = createAsyncThunk(
@@ -40,9 +41,9 @@ export const fetchManagers = createAsyncThunk(
 
 export const createUser = createAsyncThunk(
   'users/createUser',
-  async (userData, { rejectWithValue }) => {
+  async (userData, { rejectWithValue, requestId }) => {
     try {
-      const response = await apiService.users.create(userData);
+      const response = await apiService.users.create(userData, requestId);
       return response.data;
     } catch (error) {
       return rejectWithValue(error.response?.data?.detail || 'Failed to create user');
@@ -90,6 +91,11 @@ const userSlice = createSlice({
   },
   extraReducers: (builder) => {
     builder
+      // Startup data
+      .addCase(fetchBootstrap.fulfilled, (state, action) => {
+        state.teamMembers = action.payload.team;
+      })
+      
       // Fetch all users
       .addCase(fetchUsers.pending, (state) => {
         state.loading = true;
@@ -98,6 +104,8 @@ const userSlice = createSlice({
       .addCase(fetchUsers.fulfilled, (state, action) => {
         state.loading = false;
         state.users = action.payload;
+        // Same list GET /users/managers returns, without a second request
+        state.managers = action.payload.filter((user) => user.role === 'manager');
         state.error = null;
       })
       .addCase(fetchUsers.rejected, (state, action) => {